@@ -3,9 +3,13 @@ import time
 import logging
 import os
 import platform
+import sys
 import asyncio
 import threading
 from typing import Optional
+# Must precede the livekit imports: sets up Prometheus multiprocess mode
+from telemetry import setup_multiprocess_dir
+setup_multiprocess_dir()
 from livekit.plugins import openai as openai_plugin
 from livekit.plugins import deepgram
 
@@ -20,7 +24,7 @@ if platform.system() != "Darwin":  # Disable on Linux (Render) and Windows
     print("🔧 Inference executor disabled for deployment environment")
 
 from livekit import agents, rtc
-from livekit.agents import AgentSession, Agent, RoomInputOptions, llm, WorkerOptions, WorkerType, JobContext
+from livekit.agents import AgentSession, Agent, RoomInputOptions, llm, WorkerOptions, WorkerType, JobContext, JobProcess
 from livekit.plugins import openai
 from livekit.plugins.cartesia import tts as cartesia_tts
 from livekit.plugins import elevenlabs
@@ -39,9 +43,27 @@ else:
     noise_cancellation = None
     EnglishModel = None
     
-from tools.router import ToolRouter
+from services.provider_health import is_provider_healthy, start_provider_health_monitor
+from services.tts_failover import LatencyAwareTTS
+from system_prompt import get_system_prompt
+from telemetry.loop_monitor import LOOP_MONITOR, LoopLagMonitor
+from telemetry.turn_timeline import TurnTimelineRecorder
+from telemetry.tracing import end_call_span, setup_tracing, start_call_span, trace_engine
+from telemetry.metrics import (
+    call_ended,
+    call_started,
+    instrument_engine,
+    metrics_response,
+    record_tool_dispatch,
+    record_turn,
+)
+from tools.router import DispatchScope, ToolRouter, set_dispatch_scope
+from tools.journal import ToolJournal
 from tools.handlers import register_handlers
 from tools.livekit_tools import create_livekit_tools
+from tools.call_context import CallContext, get_call_context, set_call_context
+from tools.unit_of_work import CallUnitOfWork
+from utils.phone import normalize_phone
 
 logging.basicConfig(
     level=logging.INFO,
@@ -53,49 +75,12 @@ logging.getLogger("openai").setLevel(logging.WARNING)
 logging.getLogger("httpx").setLevel(logging.WARNING)
 logging.getLogger("httpcore").setLevel(logging.WARNING)
 
-from database import engine, Base, AsyncSessionLocal
+from sqlalchemy import text
+from database import engine, AsyncSessionLocal, log_query_stats, verify_schema_version, SchemaVersionError
 
+instrument_engine(engine)
+trace_engine(engine)
 
-def elevenlabs_healthcheck(api_key: str, voice_id: str, model: str) -> Optional[str]:
-    """
-    Best-effort healthcheck to surface the real HTTP status/body from ElevenLabs.
-    Returns None on success, or a short error string on failure.
-    """
-    if os.getenv("ELEVEN_HEALTHCHECK", "1") == "0":
-        logger.info("⏩ ElevenLabs healthcheck skipped (ELEVEN_HEALTHCHECK=0)")
-        return None
-
-    try:
-        import httpx
-    except Exception as e:
-        logger.warning(f"Skipping ElevenLabs healthcheck (httpx missing/unavailable): {e}")
-        return "httpx-missing"
-
-    url = f"https://api.elevenlabs.io/v1/text-to-speech/{voice_id}/stream"
-    payload = {
-        "text": "healthcheck",
-        "model_id": model,
-        "voice_settings": {"stability": 0.5, "similarity_boost": 0.5},
-    }
-    headers = {
-        "xi-api-key": api_key,
-        "accept": "audio/mpeg",
-        "content-type": "application/json",
-    }
-
-    try:
-        resp = httpx.post(url, json=payload, headers=headers, timeout=10)
-    except Exception as e:
-        logger.error(f"❌ ElevenLabs healthcheck network error: {e}")
-        return f"request-error:{type(e).__name__}"
-
-    body_preview = resp.text[:400] if resp.text else "<empty>"
-    logger.info(f"🎧 ElevenLabs healthcheck status={resp.status_code}, bytes={len(resp.content)}")
-    if resp.status_code != 200:
-        logger.error(f"❌ ElevenLabs healthcheck failed: status={resp.status_code}, body_preview={body_preview}")
-        return f"status-{resp.status_code}"
-
-    return None
 
 # Lightweight HTTP healthcheck server for Railway
 def start_healthcheck_server():
@@ -112,9 +97,15 @@ def start_healthcheck_server():
     async def handle_health(_):
         return web.Response(text="ok")
 
+    async def handle_metrics(_):
+        body, content_type = metrics_response()
+        # aiohttp wants the charset separately from the content type
+        return web.Response(body=body, headers={"Content-Type": content_type})
+
     async def run():
         app = web.Application()
         app.router.add_get("/health", handle_health)
+        app.router.add_get("/metrics", handle_metrics)
         port = int(os.getenv("PORT", "8000"))
         runner = web.AppRunner(app)
         await runner.setup()
@@ -135,395 +126,8 @@ def start_healthcheck_server():
 
 LIVEKIT_SIP_NUMBER = "+15184006003"
 
-def get_system_prompt() -> str:
-    """Generate system prompt with current date context."""
-    from datetime import datetime, timezone
-    current_date = datetime.now(timezone.utc).strftime("%A, %B %d, %Y")
-
-    return (
-        f"# Medical Clinic Voice Assistant - Complete System Prompt\n\n"
-        f"## YOUR ROLE\n"
-        f"You're a real-time voice assistant for The Hexaa Clinic. You help patients with appointments—booking, rescheduling, canceling—and answer questions about the clinic. You're professional but friendly, efficient but patient, and always reassuring. Think of yourself as having a natural phone conversation with someone who called in.\n\n"
-        f"**IMPORTANT - TODAY'S DATE: {current_date}**\n"
-        f"Use this date to calculate 'tomorrow', 'next week', etc. All times must be in ISO8601 format with timezone (e.g., 2025-11-14T14:00:00+00:00).\n\n"
-       
-        f"## CRITICAL SPEAKING RULES\n\n"
-        f"### You MUST Always Speak Out Loud\n"
-        f"- After EVERY tool call, you MUST generate a spoken response\n"
-        f"- NEVER just execute a tool and stay silent - always tell the user what you found\n"
-        f"- If a tool returns results, immediately tell the user about them in a friendly way\n"
-        f"- Example: After check_availability returns slots, say: 'Okay, so I've got a few times available for you...'\n"
-        f"- As soon as the call starts, you MUST speak an initial greeting, even if the caller hasn't said anything yet. Do NOT wait for them to speak first.\n\n"
-       
-        f"### Initial Greeting\n"
-        f"- Start friendly: 'Hey, thanks for calling Hexaa Clinic! What can I do for you?' or 'Thank you for calling Hexaa Clinic. How may I help you today?'\n\n"
-       
-        f"## CRITICAL TIME PRONUNCIATION RULES\n\n"
-        f"### Method 1 - Natural Conversational (RECOMMENDED)\n"
-        f"Say times in a friendly, drawn-out way with natural pauses:\n"
-        f"- 09:00 → 'nine in the morning'\n"
-        f"- 09:30 → 'nine thirty in the morning'\n"
-        f"- 14:00 → 'two in the afternoon'\n"
-        f"- 14:30 → 'two thirty in the afternoon'\n"
-        f"- 17:00 → 'five in the evening'\n\n"
-       
-        f"### Method 2 - With Extra Clarity (for phone/noisy environments)\n"
-        f"Use written-out pauses to force slower speech:\n"
-        f"- 09:00 → 'nine. A. M' or 'nine o'clock A M'\n"
-        f"- 09:30 → 'nine. thirty. A. M'\n"
-        f"- 14:00 → 'two. P. M' or 'two o'clock P M'\n"
-        f"- 14:30 → 'two. thirty. P. M'\n\n"
-       
-        f"### Examples of Good vs Bad\n"
-        f"❌ **BAD**: 'I have 9:30 AM to 10:00 AM available' (TTS will rush this)\n"
-        f"✅ **GOOD**: 'I have nine thirty in the morning available'\n"
-        f"✅ **GOOD**: 'I've got a nine thirty A M slot open'\n"
-        f"✅ **GOOD**: 'How about nine... thirty... in the morning?'\n\n"
-       
-        f"### When Listing Multiple Times\n"
-        f"- ONLY give 2-3 options maximum (don't overwhelm them)\n"
-        f"- Add natural pauses between each option\n"
-        f"- Use connector words: 'I've got. nine thirty. or. two o'clock. which works better?'\n"
-        f"- Give them time to process: 'So there's nine in the morning available, or if you prefer afternoon, I have two P M. What do you think?'\n\n"
-       
-        f"### Conversion Reference (12-hour format when speaking)\n"
-        f"- 09:00 = 'nine A M' or 'nine in the morning'\n"
-        f"- 10:00 = 'ten A M' or 'ten in the morning'\n"
-        f"- 11:00 = 'eleven A M' or 'eleven in the morning'\n"
-        f"- 12:00 = 'noon' or 'twelve P M'\n"
-        f"- 13:00 = 'one P M' or 'one in the afternoon'\n"
-        f"- 14:00 = 'two P M' or 'two in the afternoon'\n"
-        f"- 15:00 = 'three P M' or 'three in the afternoon'\n"
-        f"- 16:00 = 'four P M' or 'four in the afternoon'\n"
-        f"- 17:00 = 'five P M' or 'five in the evening'\n\n"
-       
-        f"## CRITICAL INFORMATION COLLECTION PROTOCOL\n\n"
-        f"### 1. NAMES (spell-back required)\n"
-        f"- **First time asking**: 'Can I get your full name, and could you please spell it for me?'\n"
-        f"- **Subsequent times**: 'Can you spell that for me?'\n"
-        f"- **Spell it back letter-by-letter**: 'Let me confirm—that's. J. O. H. N... S. M. I. T. H. Is that right?'\n"
-        f"- **For complex names**: 'M. O. H. A. M. M. E. D. Is that correct?'\n"
-        f"- **If unsure**: ALWAYS ask them to spell it rather than guessing\n"
-        f"- **Wait for confirmation** before proceeding\n\n"
-       
-        f"### 2. PHONE NUMBERS (pause between groups)\n"
-        f"- **Ask**: 'What's the best phone number to reach you?'\n"
-        f"- **Format**: Area code... pause... first three... pause... last four\n"
-        f"- **Example**: '555... 123... 4567' (NOT '5551234567')\n"
-        f"- **Confirming**: 'So that's... 555... 123... 4567... correct?'\n"
-        f"- **Natural alternative**: 'five five five, one two three, four five six seven'\n\n"
-       
-        f"### 3. EMAIL ADDRESSES (SUPER CRITICAL - spell every character)\n"
-        f"- **ALWAYS ask for spelling**: 'What's your email address? Can you spell that for me, letter by letter?'\n"
-        f"- **Spell back the ENTIRE email letter-by-letter with pauses**:\n"
-        f"  * Example: 'Let me make sure I have this exactly right. J. O. H. N.  S. M. I. T. H. 2. 0. 2. 5. at. G. M. A. I. L. dot. C. O. M. Is that correct?'\n"
-        f"- **For numbers in emails**: Say them individually: 'two... zero... two... five' (NOT 'two thousand twenty-five')\n"
-        f"- **Wait for confirmation** before proceeding\n\n"
-       
-        f"#### CRITICAL FOR TOOLS - Email Conversion\n"
-        f"When calling book_appointment, convert spoken format to proper email:\n"
-        f"- Replace spoken 'at' with @ symbol\n"
-        f"- Replace spoken 'dot' with . symbol\n"
-        f"- Convert number words to digits (e.g., 'four five six' → '456')\n"
-        f"- Remove all spaces\n"
-        f"- **Example**: 'mohid youssef four five six at gmail dot com' → 'mohidyoussef456@gmail.com'\n"
-        f"- **Example**: 'sarah jones one two three at gmail dot com' → 'sarahjones123@gmail.com'\n\n"
-        f" **Example**: 'mohid youssef seven eight nine at gmail dot com' → 'mohidyoussef789@gmail.com'\n"        
-        f"### 4. APPOINTMENT TIMES (confirm with natural pauses)\n"
-        f"- After selecting a time: 'Just to confirm, that's... Thursday... December 12th... at two thirty P M. Does that work for you?'\n"
-        f"- Always give them a chance to correct before booking\n\n"
-       
-        f"### 5. DATES (clear and natural)\n"
-        f"- Say: 'Tuesday... December 10th' (NOT 'TuesdayDecember10th')\n"
-        f"- When confirming: 'So that's... Thursday... the 15th... at two P M. Correct?'\n\n"
-       
-        f"### 6. FINAL CONFIRMATION (before booking)\n"
-        f"Summarize everything: 'Alright, let me confirm the details. I have... John Smith... phone number 555.. 123.. 4567.. email john dot smith 2025 at gmail dot com... for a checkup... on Thursday, December 12th... at two thirty P M. Is everything correct?'\n\n"
-        f"Only proceed after receiving confirmation.\n\n"
-       
-        f"## VOICE TONE & PERSONALITY\n\n"
-        f"### Professional but Friendly\n"
-        f"- Calm, reassuring, and professional—like an experienced medical receptionist\n"
-        f"- Warm but not overly casual—you're helpful, not a friend\n"
-        f"- Use contractions naturally: 'I'll', 'we're', 'that's', 'you're', 'can't', 'there's'\n"
-        f"- Natural fillers when appropriate: 'um', 'uh', 'like', 'you know', 'I mean', 'so', 'well'\n\n"
-       
-        f"### Natural Acknowledgments\n"
-        f"- 'Gotcha', 'Alright', 'Cool', 'Sure thing', 'Makes sense', 'I hear you', 'Right', 'Okay', 'Totally'\n"
-        f"- 'I understand', 'Of course', 'Certainly', 'Absolutely', 'No problem'\n"
-        f"- 'I'd be happy to help', 'Let me take care of that', 'I appreciate your patience'\n\n"
-       
-        f"### Conversational Transitions\n"
-        f"'So', 'Anyway', 'By the way', 'Actually', 'Oh', 'Hmm'\n\n"
-       
-        f"### Keep It Concise\n"
-        f"- 1 to 2 sentences at a time\n"
-        f"- Short and snappy—like you're texting, but talking\n"
-        f"- Speak at a measured pace—not rushed, but efficient\n"
-        f"- If interrupted, stop immediately and listen (interruptions are normal)\n\n"
-       
-        f"## HANDLING USER SILENCE / TIMEOUTS\n\n"
-        f"If you ask a question and hear nothing for ~8-10 seconds:\n"
-        f"1. **First check-in**: 'Are you still there? I'm ready when you are.'\n"
-        f"2. **If still no response (~5 more seconds)**: 'I'm not hearing anything—can you hear me? If you're still there, please let me know.'\n"
-        f"3. **If still silent (~5 more seconds)**: 'I think we may have lost connection. If you can hear me, please say something. Otherwise, feel free to call back at your convenience.'\n\n"
-        f"Be patient and understanding—they might be looking for information or distracted.\n\n"
-       
-        f"## WHAT YOU CAN HELP WITH\n\n"
-        f"### 1. Booking Appointments\n"
-        f"Collect: name (with spelling), reason for visit, preferred time, phone number (with pauses), email (spelled letter-by-letter), and insurance. Check availability, suggest times, confirm details, book, and let them know they'll receive a confirmation.\n\n"
-       
-        f"### 2. Canceling Appointments\n"
-        f"Get their name, appointment date/time, and optionally the reason for canceling. Confirm details, cancel it, acknowledge completion, and offer to reschedule if appropriate.\n\n"
-       
-        f"### 3. Rescheduling Appointments\n"
-        f"Identify their current appointment, ask for new preferred time, check availability, confirm new time, reschedule, and confirm they'll get updated confirmation.\n\n"
-       
-        f"### 4. Clinic Information\n"
-        f"Provide hours, location, insurance accepted, etc. Keep it brief and relevant. Then ask if they need to book an appointment.\n\n"
-       
-        f"### 5. Connecting to a Real Person\n"
-        f"If they ask to talk to someone or if you hear anything that sounds serious or urgent, get them to a staff member ASAP.\n\n"
-       
-        f"## WHAT YOU CANNOT HELP WITH (Visit Clinic Instead)\n\n"
-        f"When you encounter these topics, respond professionally:\n\n"
-       
-        f"### Employment & HR Questions\n"
-        f"- Jobs, salaries, hiring, careers at the clinic\n"
-        f"- Staff schedules or internal operations\n\n"
-        f"**Response**: 'That's not something I can help with over the phone, but I can connect you with someone from our office who can assist you. Would you like me to do that?'\n\n"
-        f"**Alternative**: 'Unfortunately, I can't handle that over the phone. I'd recommend visiting the clinic or calling back during business hours to speak with our staff directly.'\n\n"
-       
-        f"### Medical Topics\n"
-        f"- Medical advice, diagnosis, or treatment recommendations\n"
-        f"- Specific medical questions requiring professional judgment\n\n"
-        f"**Response**: 'I can't provide medical advice. For medical questions, please schedule an appointment with one of our doctors, or if it's urgent, visit the clinic directly.'\n\n"
-       
-        f"### Billing & Complex Insurance\n"
-        f"- Billing disputes or detailed insurance claims\n\n"
-        f"**Response**: 'I'm not able to assist with billing matters. Please visit our clinic to speak with our billing department, or call during business hours.'\n\n"
-       
-        f"### Staff-Specific Requests\n"
-        f"- Requests to speak with specific doctors, dermatologists, surgeons, or any specialists\n\n"
-        f"**Response**: 'I can't transfer you directly, but I can help you book an appointment with that specialist, or you can call during business hours to speak with them.'\n\n"
-       
-        f"### CRITICAL - DO NOT Offer Transfers\n"
-        f"We don't have the capability to 'connect to staff' or 'transfer to someone' during this call.\n\n"
-        f"Instead, say: 'Unfortunately, I can't handle that over the phone. I'd recommend visiting the clinic or calling back during business hours to speak with our staff directly.'\n\n"
-       
-        f"## EMERGENCY SITUATIONS (CRITICAL SAFETY)\n\n"
-        f"If someone mentions emergency symptoms—chest pain, difficulty breathing, stroke symptoms, severe bleeding, loss of consciousness:\n\n"
-        f"1. **STOP everything immediately**\n"
-        f"2. **Say firmly but calmly**: 'This sounds like a medical emergency. Please hang up and call 911 right away, or go to the nearest emergency room immediately.'\n"
-        f"3. **DO NOT** try to book an appointment or continue the conversation\n"
-        f"4. **Prioritize their safety** above all else\n\n"
-       
-        f"## PROFESSIONAL BOUNDARIES\n\n"
-        f"- You are **NOT a doctor**—never diagnose, prescribe medications, or give medical advice\n"
-        f"- Only collect necessary information: name, reason for visit, preferred time, phone, email, insurance\n"
-        f"- Always confirm details before booking/canceling/rescheduling\n"
-        f"- Respect privacy—don't share or request unnecessary information\n"
-        f"- If unsure about anything, ask for clarification rather than guessing\n\n"
-       
-        f"## TOOL USAGE PROTOCOL\n\n"
-        f"### CRITICAL - Always Speak Before Checking Database\n"
-        f"- When you need to check availability or look up appointments, **ALWAYS acknowledge the user FIRST**\n"
-        f"- Say something like: 'Let me check that for you... one moment' or 'Wait for a moment, let me look up our availability'\n"
-        f"- **IMMEDIATELY after saying this, you MUST call the appropriate tool in the SAME response**\n"
-        f"- NEVER say 'let me check' and then wait for the user to speak again - call the tool RIGHT AWAY\n"
-        f"- Example flow: Say 'Let me check...' → Call tool → Wait for results → Present results\n"
-        f"- DO NOT create a separate turn just to say 'let me check' - combine the speech and tool call\n\n"
-       
-        f"### Filling Silence During Tool Execution\n"
-        f"- While a tool is running, you MUST NOT sit in awkward silence\n"
-        f"- Keep the patient lightly engaged with short, natural lines:\n"
-        f"  * 'I'm just pulling that up now for you...'\n"
-        f"  * 'One sec, I'm loading your details...'\n"
-        f"  * Simple follow-up: 'And just to confirm, this is for a follow-up visit, right?'\n"
-        f"- **EXCEPTION**: For check_availability specifically, do NOT ask follow-up questions while the tool runs. Just say your 'checking' line and let the tool execute. Speak again only AFTER you have the results.\n"
-        f"- Never leave more than about a second of dead air—always fill it with brief reassurance\n"
-        f"- As soon as the tool returns, immediately tell the patient what you found in simple language\n\n"
-       
-        f"### General Tool Rules\n"
-        f"- **ALWAYS call check_availability BEFORE suggesting times**\n"
-        f"- Only share what the tools return—never make up availability\n"
-        f"- If a tool fails, apologize and try once more. If it still fails: 'I'm having a technical issue. I'd recommend calling back in a few minutes or visiting the clinic to book in person. I apologize for the inconvenience.'\n"
-        f"- When presenting time slots, offer the top 1-2 options (don't overwhelm with many choices)\n"
-        f"- Use EXACT slot start/end times from check_availability results when booking\n\n"
-       
-        f"## TWO CRITICAL WORKFLOWS - DO NOT CONFUSE\n\n"
-        f"### WORKFLOW A: CHECKING AVAILABILITY (for NEW appointments)\n"
-        f"**When**: Patient asks 'What's available?' or mentions wanting to book\n"
-        f"**Process**:\n"
-        f"1. You do NOT need to verify anything - just check availability\n"
-        f"2. IMMEDIATELY call check_availability with the date\n"
-        f"3. DO NOT call lookup_appointment - that's only for existing appointments\n\n"
-        f"**Example**: \n"
-        f"- Patient: 'What's available tomorrow?'\n"
-        f"- You: 'Wait for a moment, let me check tomorrow for you.' [IMMEDIATELY CALL check_availability]\n\n"
-       
-        f"### WORKFLOW B: CANCEL/RESCHEDULE (for EXISTING appointments)\n"
-        f"**When**: Patient says 'I want to cancel' or 'I want to reschedule'\n"
-        f"**Process**:\n"
-        f"1. You MUST verify the appointment exists first\n"
-        f"2. ALWAYS call lookup_appointment FIRST\n"
-        f"3. Only after verification, call cancel_appointment or reschedule_appointment\n\n"
-       
-        f"## CANCELLATION WORKFLOW (MANDATORY - 8 STEPS)\n\n"
-        f"1. Patient says 'I want to cancel my appointment'\n"
-        f"2. Ask: 'Can I get your full name and spell it for me?'\n"
-        f"3. Ask: 'What day is your appointment?'\n"
-        f"4. Say: 'Let me look that up for you, just a moment.'\n"
-        f"5. **CALL lookup_appointment** with name and date\n"
-        f"6. If found, confirm: 'I see your appointment on [date] at [time] for [reason]. Is that the one you want to cancel?'\n"
-        f"7. After confirmation, **CALL cancel_appointment** using EXACT start_time from lookup results\n"
-        f"8. Confirm: 'Alright, that appointment is cancelled. Would you like to reschedule?'\n\n"
-       
-        f"### If Lookup Finds NO Appointments\n"
-        f"- Say: 'I'm not seeing an appointment under that name for [date]. Let me double-check - can you confirm the name spelling and date?'\n"
-        f"- Try lookup again with corrected info\n"
-        f"- If still not found: 'I'm still not finding it. Could it be under a different name or date? Would you like me to connect you with our office?'\n\n"
-       
-        f"### If Lookup Finds MULTIPLE Appointments\n"
-        f"- List them clearly: 'I see 2 appointments: one on Monday the 15th at two P M for a checkup, and one on Thursday the 18th at ten A M. Which one?'\n"
-        f"- Wait for their choice, then proceed\n\n"
-       
-        f"## RESCHEDULING WORKFLOW (MANDATORY)\n\n"
-        f"1. Patient says 'I want to reschedule'\n"
-        f"2. Ask for name and date of CURRENT appointment\n"
-        f"3. **CALL lookup_appointment** to verify it exists\n"
-        f"4. If found, ask: 'What day and time would work better?'\n"
-        f"5. **CALL check_availability** for new date (NOT lookup_appointment)\n"
-        f"6. Present options and get their choice\n"
-        f"7. **CALL reschedule_appointment** with current + new times\n\n"
-       
-        f"## AUTOMATIC APPOINTMENT INITIATION RULE\n\n"
-        f"### CRITICAL - Instant Tool Call for Availability\n"
-        f"When patient mentions ANY appointment-related information:\n\n"
-       
-        f"#### If They Provide a REASON (checkup, consultation, follow-up)\n"
-        f"- Say: 'Wait for a moment, let me check the available slots for you.'\n"
-        f"- **IMMEDIATELY** call check_availability with default window (next 3 days)\n"
-        f"- NO additional questions first\n"
-        f"- DO NOT wait for user to say 'check' or 'yes'\n\n"
-       
-        f"#### If They Provide a DATE (tomorrow, Tuesday, next week)\n"
-        f"- Say: 'Wait for a moment, let me check [date] for you.'\n"
-        f"- **IMMEDIATELY** call check_availability for that specific date\n"
-        f"- NO asking for time preference first\n\n"
-       
-        f"#### If They Provide BOTH Reason AND Date\n"
-        f"- Say: 'Got it, let me check [date] for your [reason].'\n"
-        f"- **IMMEDIATELY** call check_availability for that date\n\n"
-       
-        f"### The ONLY Acceptable Flow for New Appointments\n"
-        f"1. Patient mentions reason/date\n"
-        f"2. You say 'Wait for a moment, let me check...'\n"
-        f"3. You IMMEDIATELY call check_availability in the SAME response\n"
-        f"4. Tool returns results\n"
-        f"5. You speak the results: 'Okay, I've got [time options] available'\n\n"
-       
-        f"### NEVER Ask These Questions BEFORE Calling check_availability\n"
-        f"❌ 'What time works best for you?'\n"
-        f"❌ 'Morning or afternoon?'\n"
-        f"❌ 'What time were you thinking?'\n"
-        f"❌ 'Any specific time preference?'\n"
-        f"✅ **Instead**: Just check the entire day and present 1-2 best options\n\n"
-       
-        f"### Examples of CORRECT Behavior\n"
-        f"**Example 1**:\n"
-        f"- Patient: 'Regular checkup.'\n"
-        f"- You: 'Wait for a moment, let me check the available slots for you.' [IMMEDIATELY CALL check_availability for next 3 days]\n"
-        f"- [Tool returns: 09:00, 09:30, 10:00, 14:00, 14:30, 15:00]\n"
-        f"- You: 'Okay, I've got nine in the morning, or two in the afternoon. Which works better for you?'\n\n"
-       
-        f"**Example 2**:\n"
-        f"- Patient: 'What's available tomorrow?'\n"
-        f"- You: 'Wait for a moment, let me check tomorrow for you.' [IMMEDIATELY CALL check_availability for entire day]\n"
-        f"- [Tool returns: 09:00, 09:30, 10:00, 14:00, 14:30, 15:00]\n"
-        f"- You: 'Okay, I've got nine in the morning, or two in the afternoon. Which works better for you?'\n\n"
-       
-        f"**Example 3**:\n"
-        f"- Patient: 'Tohid. Regular checkup.'\n"
-        f"- You: 'Got it, Tohid. Wait for a moment, let me check the available slots for your checkup.' [IMMEDIATELY CALL check_availability]\n\n"
-       
-        f"### Example of WRONG Behavior (DO NOT DO THIS)\n"
-        f"❌ Patient: 'Regular checkup.'\n"
-        f"❌ You: 'Sure! What time works best for you - morning or afternoon?' \n"
-        f"❌ (WRONG - you should check first!)\n\n"
-       
-        f"## MATCHING PATIENT'S REQUESTED TIME TO SLOTS\n\n"
-        f"When patient says a specific time (e.g., '2:30 PM tomorrow' or 'Tuesday at 3'):\n\n"
-        f"1. **FIRST** call check_availability for that date\n"
-        f"2. Look through the slots returned by check_availability\n"
-        f"3. Check if ANY slot's start time matches their request (within 15 minutes is okay)\n"
-        f"4. **If match found**: Say 'Perfect! I have... [pause]... two thirty P M... available' and use that exact slot\n"
-        f"5. **If no match**: Say 'That exact time isn't available, but I have... [pause]... [nearest slot]' and offer alternatives\n"
-        f"6. **If check_availability returns NO slots**: Say 'I'm not seeing availability that day. Let me try another day for you.'\n\n"
-       
-        f"### Important Notes\n"
-        f"- Always read times back in friendly format with pauses: 'Tuesday... at... two thirty P M', NOT the ISO8601 format\n"
-        f"- Time conversions: 14:00 = 2 PM, 14:30 = 2:30 PM, 15:00 = 3 PM, etc.\n"
-        f"- If unsure whether a slot matches, offer it: 'I have two thirty P M - would that work for you?'\n\n"
-       
-        f"## BOOKING WORKFLOW\n\n"
-        f"### After check_availability Returns\n\n"
-        f"#### If Empty\n"
-        f"'That day's full, let me try [next day]' and check again automatically\n\n"
-        f"#### If Slots Found\n"
-        f"- Present top 1-2 options with clear pauses between times\n"
-        f"- NEVER say 'that time isn't available' without calling check_availability first\n\n"
-       
-        f"### When Booking\n"
-        f"- Use EXACT start/end times from check_availability results\n"
-        f"- All appointments are exactly 30 minutes long\n"
-        f"- Copy slot times EXACTLY - never calculate or modify them\n"
-        f"- **Example**: If slot shows {{start: '2025-11-14T14:00:00+00:00', end: '2025-11-14T14:30:00+00:00'}}, use these EXACT values\n\n"
-       
-        f"## APPOINTMENT VERIFICATION RULES\n\n"
-        f"### CRITICAL Rules\n"
-        f"1. **NEVER assume an appointment exists** — ALWAYS verify with tools first\n"
-        f"2. **Before canceling/rescheduling**: Call lookup_appointment with their name and date\n"
-        f"3. **If no appointment found**: 'I'm not seeing an appointment under that name for that date. Could you double-check the name and date with me?'\n"
-        f"4. **NEVER say 'yes, I see your appointment'** unless the tool confirms it\n"
-        f"5. **For existing patients**: Use the EXACT name from database results—don't modify spelling unless they explicitly request a correction\n\n"
-       
-        f"### Tool Distinctions\n"
-        f"- **lookup_appointment** = verify EXISTING appointments (for cancel/reschedule)\n"
-        f"- **check_availability** = find OPEN time slots (for new bookings)\n"
-        f"- **NEVER confuse these two tools**\n"
-        f"- When using cancel/reschedule: Use EXACT start_time from lookup results\n"
-        f"- Name matching: Use EXACT name from lookup results\n\n"
-       
-        f"## CONVERSATION FLOW & PACING\n\n"
-        f"### Opening\n"
-        f"- Greeting: 'Thank you for calling Hexaa Clinic. How may I help you today?' or 'Hey, thanks for calling Hexaa Clinic! What can I do for you?'\n\n"
-       
-        f"### During Conversation\n"
-        f"- Keep the conversation moving naturally, but don't rush\n"
-        f"- One clear thought at a time—avoid overwhelming them with too much information\n"
-        f"- If they're providing information slowly (looking for a card, etc.), be patient\n"
-        f"- If they're chatty, that's cool, but gently guide back to what they need\n"
-        f"- If they decline to provide something (like insurance), that's fine: 'No problem, we can handle that when you arrive.' or 'No worries, we can handle that when you come in.'\n\n"
-       
-        f"### After Booking\n"
-        f"- Confirm: 'Perfect! You're all set. You'll receive a confirmation email shortly with all the details.'\n"
-        f"- The system automatically sends a confirmation email—you don't need to call any tool\n"
-        f"- If they ask about the email: 'You should receive it within the next few minutes. Check your spam folder if you don't see it.'\n\n"
-       
-        f"## REMEMBER - KEY PRINCIPLES\n\n"
-        f"1. **You're professional, warm, and real**—not a robot\n"
-        f"2. **Spell out names and emails completely**—every letter\n"
-        f"3. **Pause naturally** when saying times, phone numbers, and dates\n"
-        f"4. **If user is silent for 8-10 seconds**, check if they're still there\n"
-        f"5. **For requests you can't handle**, direct them to visit the clinic (don't offer transfers)\n"
-        f"6. **Emergency symptoms**: Tell them to call 911 immediately\n"
-        f"7. **Always confirm details** before taking action\n"
-        f"8. **Confirmation emails are sent automatically** after booking—just let them know\n"
-        f"9. **After ANY tool call**, immediately speak and tell them what you found\n"
-        f"10. **When patient mentions appointment reason/date**, immediately check availability—don't ask for preferences first\n"
-    )
-
+# How long the greeting may wait for the caller-ID prefetch before going without it
+CALLER_PREFETCH_TIMEOUT = float(os.getenv("CALLER_PREFETCH_TIMEOUT", "1.0"))
 
 
 class LatencyTracker:
@@ -583,8 +187,13 @@ class LatencyTracker:
 
 
 class Assistant(Agent):
-    def __init__(self, latency_tracker: LatencyTracker, tools: list = None) -> None:
-        super().__init__(instructions=get_system_prompt(), tools=tools)
+    def __init__(
+        self,
+        latency_tracker: LatencyTracker,
+        tools: list = None,
+        instructions: Optional[str] = None,
+    ) -> None:
+        super().__init__(instructions=instructions or get_system_prompt(), tools=tools)
         self.latency_tracker = latency_tracker
         self.full_response_buffer = []  # Buffer to collect full response
     
@@ -622,11 +231,182 @@ class Assistant(Agent):
         return text
 
 
-async def initialize_database():
-    """Create all tables if they don't exist."""
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
-    logger.info("✅ Database tables initialized")
+# CLI commands that start a worker (and therefore need a migrated database)
+WORKER_COMMANDS = {"start", "dev", "console", "connect"}
+
+
+async def check_schema_at_startup():
+    """Verify migrations are at head once, before the worker accepts jobs."""
+    try:
+        await verify_schema_version()
+    finally:
+        # Connections are bound to this short-lived loop; jobs open their own
+        await engine.dispose()
+
+
+# ===== TTS SELECTION: ElevenLabs -> Deepgram -> Cartesia (OpenAI TTS commented) =====
+# Wrap multiple providers so slow TTS (high time-to-first-audio) fails over mid-call
+TTS_LATENCY_FAILOVER = os.getenv("TTS_LATENCY_FAILOVER", "1") != "0"
+
+
+def build_tts_providers(skip_unhealthy: bool = True) -> dict:
+    """
+    Build every configured TTS provider in preference order, skipping any the
+    provider health monitor reports down. Reads cached status only (no network).
+    """
+    providers = {}
+
+    # 1) ElevenLabs (preferred)
+    eleven_labs_key = os.getenv("ELEVEN_LABS")
+    if eleven_labs_key:
+        voice_id = os.getenv("ELEVEN_VOICE_ID", "O4cGUVdAocn0z4EpQ9yF")
+        model = os.getenv("ELEVEN_MODEL", "eleven_turbo_v2_5")
+        masked_key = eleven_labs_key[:4] + "****" + eleven_labs_key[-4:] if len(eleven_labs_key) > 8 else "****"
+        logger.info(f"✅ ELEVEN_LABS key found: {masked_key}")
+
+        if skip_unhealthy and not is_provider_healthy("elevenlabs"):
+            logger.warning("🔎 ElevenLabs marked unhealthy by the provider monitor. "
+                           "Agent will continue and try next fallback.")
+        else:
+            try:
+                providers["elevenlabs"] = el_tts.TTS(
+                    voice_id=voice_id,
+                    model=model,
+                    api_key=eleven_labs_key,
+                    enable_ssml_parsing=False,
+                    chunk_length_schedule=[100, 160, 220],
+                    streaming_latency=2,
+                )
+                logger.info(f"🎙️  ElevenLabs TTS ready (voice={voice_id}, model={model})")
+            except Exception as e:
+                logger.error(f"❌ ElevenLabs TTS init failed, will fallback: {e}")
+
+    # 2) Deepgram TTS (secondary)
+    dg_key = os.getenv("DEEPGRAM_API_KEY")
+    if dg_key and skip_unhealthy and not is_provider_healthy("deepgram"):
+        logger.warning("🔎 Deepgram TTS marked unhealthy by the provider monitor, skipping")
+    elif dg_key:
+        try:
+            dg_model = os.getenv("DEEPGRAM_TTS_MODEL", "aura-2-electra-en")
+            # Deepgram TTS expects 'model', not 'voice'
+            providers["deepgram"] = deepgram.TTS(model=dg_model, api_key=dg_key)
+            logger.info(f"🎙️  Deepgram TTS ready (model={dg_model})")
+        except Exception as e:
+            logger.error(f"❌ Deepgram TTS init failed, will fallback: {e}")
+
+    # 3) Cartesia TTS (tertiary)
+    cartesia_key = os.getenv("CARTESIA_API_KEY")
+    cartesia_voice = os.getenv("CARTESIA_VOICE_ID", "af_sarah")
+    cartesia_model = os.getenv("CARTESIA_MODEL", "sonic-english")
+
+    if cartesia_key and skip_unhealthy and not is_provider_healthy("cartesia"):
+        logger.warning("🔎 Cartesia marked unhealthy by the provider monitor, skipping")
+    elif cartesia_key:
+        try:
+            masked = cartesia_key[:4] + "****" + cartesia_key[-4:] if len(cartesia_key) > 8 else "****"
+            logger.info(f"✅ CARTESIA_API_KEY found: {masked}")
+            providers["cartesia"] = cartesia_tts.TTS(
+                api_key=cartesia_key,
+                voice=cartesia_voice,
+                model=cartesia_model,
+            )
+            logger.info(f"🎙️  Cartesia TTS ready (voice={cartesia_voice}, model={cartesia_model})")
+        except Exception as e:
+            logger.error(f"❌ Cartesia TTS init failed, no more fallbacks: {e}")
+
+    return providers
+
+
+def build_tts(skip_unhealthy: bool = True):
+    """
+    Select TTS for a call. Returns (primary_provider_name, tts).
+
+    With more than one provider configured, the providers are wrapped in a
+    LatencyAwareTTS that fails over on errors and on slow time-to-first-audio.
+    """
+    providers = build_tts_providers(skip_unhealthy)
+    if not providers:
+        if skip_unhealthy:
+            # A stale failure must not leave the agent mute; use whatever is configured
+            logger.warning("⚠️  No healthy TTS provider - ignoring health status")
+            return build_tts(skip_unhealthy=False)
+        raise ValueError("No TTS provider configured or all TTS inits failed.")
+
+    primary = next(iter(providers))
+    if len(providers) == 1 or not TTS_LATENCY_FAILOVER:
+        logger.info(f"🎙️  Using {primary} TTS")
+        return primary, providers[primary]
+
+    logger.info(f"🎙️  Using {primary} TTS with latency-aware failover to {', '.join(list(providers)[1:])}")
+    return primary, LatencyAwareTTS(providers)
+
+
+# Set AGENT_PREWARM=0 to build everything per call (baseline for time-to-first-word comparisons)
+AGENT_PREWARM = os.getenv("AGENT_PREWARM", "1") != "0"
+# Pooled DB connections opened at job start, before the first tool call needs one
+DB_PREWARM_CONNECTIONS = int(os.getenv("DB_PREWARM_CONNECTIONS", "2"))
+
+
+def build_worker_components() -> dict:
+    """Build the call-independent objects: tool router, LiveKit tools, STT/LLM/TTS plugins, system prompt."""
+    start = time.time()
+    router = ToolRouter(journal=ToolJournal.from_env())
+    register_handlers(router, session_factory=AsyncSessionLocal)
+    router.add_observer(record_tool_dispatch)
+    tts_provider, tts_instance = build_tts()
+    components = {
+        "router": router,
+        "livekit_tools": create_livekit_tools(router),
+        "stt": deepgram.STT(model="nova-2-phonecall"),
+        "llm": openai_plugin.LLM(model="gpt-4o-mini"),
+        "tts_provider": tts_provider,
+        "tts": tts_instance,
+    }
+    # Renders the per-day date section once; the static prefix is a module constant
+    get_system_prompt()
+    logger.info(
+        f"📦 Built {len(router.list_tools())} tools, STT/LLM/TTS and system prompt "
+        f"in {(time.time() - start)*1000:.0f}ms"
+    )
+    return components
+
+
+def prewarm(proc: JobProcess):
+    """
+    Worker prewarm: runs once per job process before a call is assigned.
+
+    Jobs only bind per-call state on top of these objects. Network warm-up
+    needs the job's event loop, so it happens in warm_connections().
+    """
+    setup_tracing()
+    if not AGENT_PREWARM:
+        logger.info("⏩ Prewarm disabled (AGENT_PREWARM=0)")
+        return
+    proc.userdata["components"] = build_worker_components()
+
+
+async def warm_connections(components: dict):
+    """Open DB pool connections and provider connections while the call is being set up."""
+    start = time.time()
+
+    async def warm_db_connection():
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    for plugin in (components["stt"], components["llm"], components["tts"]):
+        try:
+            plugin.prewarm()
+        except Exception as e:
+            logger.debug(f"Prewarm of {type(plugin).__name__} failed: {e}")
+
+    results = await asyncio.gather(
+        *(warm_db_connection() for _ in range(DB_PREWARM_CONNECTIONS)),
+        return_exceptions=True,
+    )
+    failed = [r for r in results if isinstance(r, Exception)]
+    if failed:
+        logger.warning(f"⚠️  DB warm-up: {len(failed)}/{len(results)} connections failed ({failed[0]})")
+    logger.info(f"🔥 Warmed {len(results) - len(failed)} DB connection(s) and provider connections in {(time.time() - start)*1000:.0f}ms")
 
 
 async def entrypoint(ctx: JobContext):
@@ -634,6 +414,17 @@ async def entrypoint(ctx: JobContext):
     Main entrypoint for LiveKit SIP calls
     Number: +1 (518) 400-6003
     """
+    call_start = time.time()
+    call_started()
+    ctx.add_shutdown_callback(call_ended)
+    # Root span for the call; everything started below inherits it
+    setup_tracing()
+    call_span = start_call_span(**{"livekit.room": ctx.room.name if ctx.room else ""})
+    ctx.add_shutdown_callback(lambda: end_call_span(call_span))
+    if LOOP_MONITOR:
+        loop_monitor = LoopLagMonitor()
+        loop_monitor.start()
+        ctx.add_shutdown_callback(loop_monitor.log_summary)
     
     # ===== DETECT INCOMING CALL =====
     is_phone_call = False
@@ -655,88 +446,43 @@ async def entrypoint(ctx: JobContext):
                     break
     except Exception as e:
         logger.debug(f"Call detection info: {e}")
-    
-    latency_tracker = LatencyTracker()
-    logger.info("🚀 Initializing Hexaa Clinic Voice Agent...")
-
-    # Initialize database
-    await initialize_database()
-
-    # Initialize tools
-    router = ToolRouter()
-    register_handlers(router, session_factory=AsyncSessionLocal)
-    livekit_tools = create_livekit_tools(router)
-    logger.info(f"📦 Registered {len(router.list_tools())} tools")
-
-    # ===== TTS SELECTION: ElevenLabs -> Deepgram -> Cartesia (OpenAI TTS commented) =====
-    def build_tts():
-        # 1) ElevenLabs (preferred)
-        eleven_labs_key = os.getenv("ELEVEN_LABS")
-        if eleven_labs_key:
-            voice_id = os.getenv("ELEVEN_VOICE_ID", "O4cGUVdAocn0z4EpQ9yF")
-            model = os.getenv("ELEVEN_MODEL", "eleven_turbo_v2_5")
-            masked_key = eleven_labs_key[:4] + "****" + eleven_labs_key[-4:] if len(eleven_labs_key) > 8 else "****"
-            logger.info(f"✅ ELEVEN_LABS key found: {masked_key}")
-            logger.info(f"🎙️  Using ElevenLabs TTS (voice={voice_id}, model={model})")
-
-            health_err = elevenlabs_healthcheck(eleven_labs_key, voice_id, model)
-            if health_err:
-                logger.warning(f"🔎 ElevenLabs healthcheck flagged an issue ({health_err}). "
-                               f"Agent will continue and try next fallback.")
-            else:
-                try:
-                    return el_tts.TTS(
-                        voice_id=voice_id,
-                        model=model,
-                        api_key=eleven_labs_key,
-                        enable_ssml_parsing=False,
-                        chunk_length_schedule=[100, 160, 220],
-                        streaming_latency=2,
-                    )
-                except Exception as e:
-                    logger.error(f"❌ ElevenLabs TTS init failed, will fallback: {e}")
-
-        # 2) Deepgram TTS (secondary)
-        dg_key = os.getenv("DEEPGRAM_API_KEY")
-        if dg_key:
-            try:
-                dg_model = os.getenv("DEEPGRAM_TTS_MODEL", "aura-2-electra-en")
-                logger.info(f"🎙️  Using Deepgram TTS fallback (model={dg_model})")
-                # Deepgram TTS expects 'model', not 'voice'
-                return deepgram.TTS(model=dg_model, api_key=dg_key)
-            except Exception as e:
-                logger.error(f"❌ Deepgram TTS init failed, will fallback: {e}")
-
-        # 3) Cartesia TTS (tertiary)
-        cartesia_key = os.getenv("CARTESIA_API_KEY")
-        cartesia_voice = os.getenv("CARTESIA_VOICE_ID", "af_sarah")
-        cartesia_model = os.getenv("CARTESIA_MODEL", "sonic-english")
+    # The caller's number is patient data and stays out of exported traces
+    call_span.set_attribute("call.is_phone", is_phone_call)
 
-        if cartesia_key:
-            try:
-                masked = cartesia_key[:4] + "****" + cartesia_key[-4:] if len(cartesia_key) > 8 else "****"
-                logger.info(f"✅ CARTESIA_API_KEY found: {masked}")
-                logger.info(f"🎙️  Using Cartesia TTS (voice={cartesia_voice}, model={cartesia_model})")
-                return cartesia_tts.TTS(
-                    api_key=cartesia_key,
-                    voice=cartesia_voice,
-                    model=cartesia_model,
-                )
-            except Exception as e:
-                logger.error(f"❌ Cartesia TTS init failed, no more fallbacks: {e}")
+    # ===== CALLER-ID PREFETCH (runs while TTS/LLM are set up) =====
+    call_context = CallContext(
+        caller_number=normalize_phone(caller_number),
+        uow=CallUnitOfWork(engine, AsyncSessionLocal),
+    )
+    set_call_context(call_context)
+    # Tool calls of one LLM turn run concurrently; this caps them and keeps writes in order
+    set_dispatch_scope(DispatchScope())
+    ctx.add_shutdown_callback(call_context.uow.close)
+    call_context.start_prefetch()
 
-        raise ValueError("No TTS provider configured or all TTS inits failed.")
+    latency_tracker = LatencyTracker()
+    logger.info("🚀 Initializing Hexaa Clinic Voice Agent...")
 
-    tts_instance = build_tts()
+    # Tools, plugins and prompt come from the worker prewarm; build them now if it didn't run
+    components = ctx.proc.userdata.get("components")
+    prewarmed = components is not None
+    if not prewarmed:
+        components = build_worker_components()
+    elif not is_provider_healthy(components["tts_provider"]):
+        # Provider went down after this process was prewarmed
+        logger.warning(f"🔎 Prewarmed TTS ({components['tts_provider']}) is now unhealthy - reselecting")
+        components["tts_provider"], components["tts"] = build_tts()
+    warm_task = asyncio.create_task(warm_connections(components), name="warm-connections")
+    # Clinic hours go in the prompt's dynamic suffix (runs on the call's unit of work)
+    hours_task = asyncio.create_task(components["router"].dispatch("get_hours", {}), name="clinic-hours")
 
-   
     logger.info("⚙️  Configuring AgentSession...")
     
     session = AgentSession(
         
-        stt=deepgram.STT(model="nova-2-phonecall"),
-        llm=openai_plugin.LLM(model="gpt-4o-mini"),
-        tts=tts_instance,
+        stt=components["stt"],
+        llm=components["llm"],
+        tts=components["tts"],
         turn_detection="vad",  # Use VAD (works on all platforms)
         min_endpointing_delay=0.5,  # Slightly longer for natural pauses
         min_interruption_duration=0.25,
@@ -745,8 +491,43 @@ async def entrypoint(ctx: JobContext):
     )
     
     logger.info("✅ AgentSession configured")
+
+    # Per-turn latency breakdown (end of speech -> first audio), logged per turn and at call end
+    timeline = TurnTimelineRecorder(owns_dispatch=lambda: get_call_context() is call_context)
+    timeline.attach(session)
+    timeline.add_listener(record_turn)
+    components["router"].add_observer(timeline.on_tool_dispatch)
+
+    async def detach_timeline():
+        # The router outlives the call when a process serves more than one job
+        components["router"].remove_observer(timeline.on_tool_dispatch)
+
+    ctx.add_shutdown_callback(timeline.log_summary)
+    ctx.add_shutdown_callback(detach_timeline)
+    ctx.add_shutdown_callback(log_query_stats)
+
+    first_word_logged = [False]
+
+    @session.on("agent_state_changed")
+    def _log_time_to_first_word(ev):
+        if ev.new_state == "speaking" and not first_word_logged[0]:
+            first_word_logged[0] = True
+            logger.info(f"⏱️  TIME TO FIRST WORD: {(time.time() - call_start)*1000:.0f}ms (prewarmed={prewarmed})")
     
-    original_agent = Assistant(latency_tracker, tools=livekit_tools)
+    await call_context.wait_prefetch(CALLER_PREFETCH_TIMEOUT)
+    clinic_hours = ""
+    try:
+        clinic_hours = (await asyncio.wait_for(hours_task, CALLER_PREFETCH_TIMEOUT))["hours_text"]
+    except Exception as e:
+        logger.warning(f"⚠️  Clinic hours not loaded for the prompt ({type(e).__name__}) - agent will use get_hours")
+    original_agent = Assistant(
+        latency_tracker,
+        tools=components["livekit_tools"],
+        instructions=get_system_prompt(
+            clinic_hours=clinic_hours,
+            caller_context=call_context.prompt_section(),
+        ),
+    )
     original_generate = session.generate_reply
     last_input_time = [None]
 
@@ -798,6 +579,8 @@ async def entrypoint(ctx: JobContext):
     )
 
     logger.info("✅ Agent ready!")
+    if not warm_task.done():
+        logger.debug("Connection warm-up still running after session start")
     
     # Wait for participant connection (for phone calls)
     if is_phone_call:
@@ -808,10 +591,15 @@ async def entrypoint(ctx: JobContext):
             await asyncio.sleep(0.1)
         await asyncio.sleep(0.2)
     
-    # Generate friendly greeting
-    await session.generate_reply(
-        instructions="Greet them in a friendly, natural way and ask what you can help with today."
-    )
+    # Generate friendly greeting (by name for returning callers recognized by caller ID)
+    greeting = "Greet them in a friendly, natural way and ask what you can help with today."
+    first_name = (call_context.patients[0].name.split() or [""])[0] if call_context.patients else ""
+    if first_name:
+        greeting = (
+            f"Greet them in a friendly, natural way, check whether you're speaking with {first_name}, "
+            f"and ask what you can help with today."
+        )
+    await session.generate_reply(instructions=greeting)
     
     logger.info("💬 Conversation started!")
 
@@ -855,11 +643,25 @@ if __name__ == "__main__":
     
     logger.info("="*70)
     
+    # Schema is migrated by the pre-deploy `alembic upgrade head`; refuse to
+    # take calls against a database that is behind.
+    if len(sys.argv) > 1 and sys.argv[1] in WORKER_COMMANDS and os.getenv("SKIP_SCHEMA_CHECK") != "1":
+        try:
+            asyncio.run(check_schema_at_startup())
+            logger.info("✅ Database schema is up to date")
+        except SchemaVersionError as e:
+            logger.error(f"❌ {e}")
+            sys.exit(1)
+
     # Start healthcheck HTTP endpoint for Railway
     start_healthcheck_server()
 
+    # Probe TTS providers in the background; jobs read the cached status
+    start_provider_health_monitor()
+
     worker_opts = WorkerOptions(
         entrypoint_fnc=entrypoint,
+        prewarm_fnc=prewarm,
         agent_name="hexaa-clinic-agent",
     )
     
@@ -0,0 +1,47 @@
+"""add normalized patients.phone_e164 with backfill
+
+Revision ID: 006
+Revises: da5cb3c0deb3
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from utils.phone import normalize_phone
+
+
+# revision identifiers, used by Alembic.
+revision = '006'
+down_revision = 'da5cb3c0deb3'
+branch_labels = None
+depends_on = None
+
+BACKFILL_BATCH_SIZE = 1000
+
+
+def upgrade() -> None:
+    """Add phone_e164, backfill it from phone, and index it for caller-ID lookup"""
+    op.add_column('patients', sa.Column('phone_e164', sa.String(16), nullable=True))
+
+    # Backfill in Python so stored numbers get exactly the normalization used at lookup time
+    bind = op.get_bind()
+    patients = sa.table('patients', sa.column('id', sa.Integer), sa.column('phone', sa.String))
+    rows = bind.execute(sa.select(patients.c.id, patients.c.phone)).all()
+    updates = [
+        {'patient_id': row.id, 'phone_e164': normalize_phone(row.phone)}
+        for row in rows
+    ]
+    stmt = sa.text('UPDATE patients SET phone_e164 = :phone_e164 WHERE id = :patient_id')
+    for i in range(0, len(updates), BACKFILL_BATCH_SIZE):
+        batch = updates[i:i + BACKFILL_BATCH_SIZE]
+        if batch:
+            bind.execute(stmt, batch)
+
+    op.create_index('ix_patients_phone_e164', 'patients', ['phone_e164'])
+
+
+def downgrade() -> None:
+    """Drop phone_e164 and its index"""
+    op.drop_index('ix_patients_phone_e164', table_name='patients')
+    op.drop_column('patients', 'phone_e164')
@@ -0,0 +1,25 @@
+"""add (end_time, status) index for appointment overlap checks
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '007'
+down_revision = '006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Index end_time so the overlap check (end_time > new start) is a range scan over upcoming rows"""
+    op.create_index('idx_appointments_end_status', 'appointments', ['end_time', 'status'])
+
+
+def downgrade() -> None:
+    """Remove the (end_time, status) index"""
+    op.drop_index('idx_appointments_end_status', table_name='appointments')
@@ -0,0 +1,219 @@
+"""
+AppointmentService / PatientService benchmark at realistic data sizes.
+
+For each dataset scale this wipes and seeds a scratch database (see
+benchmarks.dataset), then times:
+
+- check_availability over 1-day, 2-week and 90-day windows
+- book_appointment with concurrent callers racing for the same free slot
+- find_or_create_patient with fuzzy fallback: known email, misheard email
+  (fuzzy match) and brand-new email (full fuzzy scan, then insert)
+- get_appointments_for_patient
+
+Every operation uses a fresh session, as a tool dispatch does, and writes
+other than the contention rounds are rolled back so iterations see the same
+data. Google Calendar is skipped unless --with-calendar is given, so the
+numbers are database and Python time only. Results go to a JSON file for
+run-over-run comparison.
+
+Usage:
+    python -m benchmarks.appointment_service --database-url URL --reset \\
+        [--scales 10000,100000,1000000] [--patients 5000] [--iterations 20] [--output FILE]
+"""
+import argparse
+import asyncio
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+
+from benchmarks import dataset
+from benchmarks.stats import summarize, timed, write_results
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", required=True, help="Scratch database (postgresql+asyncpg://...)")
+    parser.add_argument("--reset", action="store_true", help="Wipe the database before the first scale")
+    parser.add_argument("--scales", default="10000,100000,1000000", help="Comma-separated appointment counts")
+    parser.add_argument("--patients", type=int, default=5000)
+    parser.add_argument("--holidays", type=int, default=12, help="Closures over the next year")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--contention", type=int, default=10, help="Concurrent bookers per contended slot")
+    parser.add_argument("--rounds", type=int, default=5, help="Contended slots per scale")
+    parser.add_argument("--with-calendar", action="store_true", help="Also create Google Calendar events")
+    parser.add_argument("--output", default="appointment_service_bench.json")
+    return parser.parse_args()
+
+
+def next_weekday_morning(days: int) -> datetime:
+    day = datetime.now(timezone.utc).replace(hour=9, minute=0, second=0, microsecond=0) + timedelta(days=days)
+    while day.weekday() >= 5:
+        day += timedelta(days=1)
+    return day
+
+
+async def bench_availability(session_factory, iterations: int) -> dict:
+    from services.appointment_service import AppointmentService
+
+    results = {}
+    start = next_weekday_morning(1).replace(hour=0)
+    for label, days in (("1_day", 1), ("2_weeks", 14), ("90_days", 90)):
+        samples, slots = [], 0
+        for _ in range(iterations):
+            async with session_factory() as session:
+                with timed(samples):
+                    found = await AppointmentService(session).check_availability(
+                        start, start + timedelta(days=days) - timedelta(seconds=1)
+                    )
+            slots = len(found)
+        results[label] = {**summarize(samples), "slots_returned": slots}
+        print(f"  check_availability {label:>8}: p50 {results[label]['p50_ms']:.1f}ms  "
+              f"p95 {results[label]['p95_ms']:.1f}ms  ({slots} slots)")
+    return results
+
+
+async def bench_contended_booking(session_factory, concurrency: int, rounds: int) -> dict:
+    """Race `concurrency` sessions for each of `rounds` free slots."""
+    from sqlalchemy import func, select
+    from models.appointment import Appointment, AppointmentStatus
+    from models.patient import Patient
+    from services.appointment_service import AppointmentService
+
+    async with session_factory() as session:
+        free = await AppointmentService(session).check_availability(
+            next_weekday_morning(1), next_weekday_morning(1) + timedelta(days=30)
+        )
+        patient_ids = (await session.execute(select(Patient.id).limit(concurrency))).scalars().all()
+    slots = [datetime.fromisoformat(s["start"]) for s in free[:rounds]]
+
+    samples, outcomes = [], {"booked": 0, "conflict": 0, "error": 0}
+
+    async def attempt(patient_id: int, start: datetime):
+        async with session_factory() as session:
+            with timed(samples):
+                try:
+                    async with session.begin():
+                        patient = await session.get(Patient, patient_id)
+                        await AppointmentService(session).book_appointment(
+                            patient, start, start + timedelta(minutes=30), "Benchmark"
+                        )
+                    outcomes["booked"] += 1
+                except ValueError:
+                    outcomes["conflict"] += 1
+                except Exception as e:
+                    outcomes["error"] += 1
+                    print(f"    booking error: {type(e).__name__}: {e}", file=sys.stderr)
+
+    for start in slots:
+        await asyncio.gather(*(attempt(pid, start) for pid in patient_ids))
+
+    async with session_factory() as session:
+        confirmed = (await session.execute(
+            select(Appointment.start_time, func.count())
+            .where(Appointment.start_time.in_(slots), Appointment.status == AppointmentStatus.CONFIRMED)
+            .group_by(Appointment.start_time)
+        )).all()
+    double_booked = sum(1 for _, count in confirmed if count > 1)
+    result = {
+        **summarize(samples),
+        "concurrency": len(patient_ids),
+        "slots": len(slots),
+        **outcomes,
+        "double_booked_slots": double_booked,
+    }
+    print(f"  book_appointment x{len(patient_ids)} per slot: p50 {result.get('p50_ms', 0):.1f}ms  "
+          f"p95 {result.get('p95_ms', 0):.1f}ms  booked {outcomes['booked']}/{len(slots)} slots, "
+          f"double-booked {double_booked}")
+    return result
+
+
+async def bench_find_or_create(session_factory, iterations: int, patients: int) -> dict:
+    from services.patient_service import PatientService
+    from tools.schemas import BookAppointmentInput
+
+    start = next_weekday_morning(5)
+
+    def booking(email: str, i: int) -> BookAppointmentInput:
+        return BookAppointmentInput(
+            name=f"Bench Caller {i}", reason="Checkup", insurance=None, phone="5550000000", email=email,
+            slot_start=start.isoformat(), slot_end=(start + timedelta(minutes=30)).isoformat(),
+        )
+
+    cases = {
+        "existing_email": lambda i: f"patient{1 + i % patients}@example.com",
+        # One transposed character, as a speech-to-text mishearing would produce
+        "fuzzy_match": lambda i: f"pateint{1 + i % patients}@example.com",
+        "new_email": lambda i: f"brand.new.caller{i}@example.org",
+    }
+    results = {}
+    for label, make_email in cases.items():
+        samples = []
+        for i in range(iterations):
+            async with session_factory() as session:
+                with timed(samples):
+                    await PatientService(session).find_or_create_patient(booking(make_email(i), i), fuzzy_fallback=True)
+                await session.rollback()
+        results[label] = summarize(samples)
+        print(f"  find_or_create_patient {label:>14}: p50 {results[label]['p50_ms']:.1f}ms  "
+              f"p95 {results[label]['p95_ms']:.1f}ms")
+    return results
+
+
+async def bench_patient_appointments(session_factory, iterations: int, patients: int) -> dict:
+    from services.appointment_service import AppointmentService
+
+    samples, rows = [], []
+    since = datetime.now(timezone.utc) - timedelta(days=365)
+    for i in range(iterations):
+        async with session_factory() as session:
+            with timed(samples):
+                found = await AppointmentService(session).get_appointments_for_patient(
+                    f"Patient {1 + (i * 7919) % patients}", from_time=since, include_cancelled=True
+                )
+        rows.append(len(found))
+    result = {**summarize(samples), "mean_rows": round(sum(rows) / len(rows), 1)}
+    print(f"  get_appointments_for_patient: p50 {result['p50_ms']:.1f}ms  p95 {result['p95_ms']:.1f}ms")
+    return result
+
+
+async def main() -> int:
+    args = parse_args()
+    os.environ["DATABASE_URL"] = args.database_url
+    os.environ.setdefault("SLOW_QUERY_MS", "600000")
+    from database import AsyncSessionLocal, engine
+    import services.appointment_service as appointment_service
+
+    if not args.with_calendar:
+        appointment_service.CALENDAR_AVAILABLE = False
+
+    scales = [int(s) for s in args.scales.split(",")]
+    results = {"config": vars(args), "scales": {}}
+    for index, appointments in enumerate(scales):
+        try:
+            await dataset.prepare(engine, args.database_url, schema="models", reset=args.reset or index > 0)
+        except RuntimeError as e:
+            print(e, file=sys.stderr)
+            return 2
+        counts = await dataset.seed(
+            engine, patients=args.patients, appointments=appointments, holidays=args.holidays
+        )
+        print(f"\n=== {counts['appointments']:,} appointments, {args.patients:,} patients ===")
+        results["scales"][str(appointments)] = {
+            "dataset": counts,
+            "check_availability": await bench_availability(AsyncSessionLocal, args.iterations),
+            "book_appointment_contended": await bench_contended_booking(
+                AsyncSessionLocal, args.contention, args.rounds
+            ),
+            "find_or_create_patient": await bench_find_or_create(AsyncSessionLocal, args.iterations, args.patients),
+            "get_appointments_for_patient": await bench_patient_appointments(
+                AsyncSessionLocal, args.iterations, args.patients
+            ),
+        }
+
+    await engine.dispose()
+    write_results(args.output, results)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,145 @@
+"""
+Synthetic clinic data for the database benchmarks.
+
+Everything runs against a scratch Postgres database, which is wiped first.
+The schema comes either from the Alembic migrations (production index names,
+used by the query-plan check) or from the ORM models (what the agent writes
+against, used by benchmarks that book appointments).
+
+Seeded data is shaped like a busy single-practitioner clinic:
+- history: appointments spread over the past `history_days`, any status;
+- future: weekday 30-minute slots from tomorrow for `days_ahead` days,
+  a `future_fill` share of them booked (at most one confirmed per slot);
+- holidays: `holidays` closures over the year starting ten days out, every third one a
+  partial day with reduced hours.
+"""
+import os
+import subprocess
+import sys
+
+from sqlalchemy import text
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SLOTS_PER_DAY = 16  # 09:00-17:00 UTC in 30-minute slots
+
+
+async def is_empty(engine) -> bool:
+    async with engine.connect() as conn:
+        tables = (await conn.execute(text(
+            "SELECT count(*) FROM information_schema.tables WHERE table_schema = 'public'"
+        ))).scalar()
+    return tables == 0
+
+
+async def reset_schema(engine) -> None:
+    """Drop everything in the public schema."""
+    async with engine.begin() as conn:
+        await conn.execute(text("DROP SCHEMA public CASCADE"))
+        await conn.execute(text("CREATE SCHEMA public"))
+
+
+def run_migrations(database_url: str) -> None:
+    """`alembic upgrade head` against database_url (in a subprocess: env.py runs its own event loop)."""
+    env = dict(os.environ, DATABASE_URL=database_url)
+    subprocess.run(
+        [sys.executable, "-m", "alembic", "upgrade", "head"],
+        cwd=REPO_ROOT, env=env, check=True, stdout=subprocess.DEVNULL,
+    )
+
+
+async def create_model_schema(engine) -> None:
+    """Create tables from the ORM models, with Mon-Fri 9-5 clinic hours and a 12-1 break."""
+    from database import Base
+    import models  # noqa: F401  (registers the tables on Base.metadata)
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(text(
+            "INSERT INTO clinic_hours (day_of_week, start_time, end_time, is_active, break_start, break_end) "
+            "SELECT d, '09:00', '17:00', true, '12:00', '13:00' FROM generate_series(0, 4) d"
+        ))
+
+
+async def prepare(engine, database_url: str, schema: str, reset: bool) -> None:
+    """
+    Build an empty schema to seed into.
+
+    Raises:
+        RuntimeError: the database has tables and reset is False
+    """
+    if reset:
+        await reset_schema(engine)
+    if not await is_empty(engine):
+        raise RuntimeError("Database is not empty - use a scratch database and pass --reset to wipe it")
+    if schema == "migrations":
+        run_migrations(database_url)
+    else:
+        await create_model_schema(engine)
+
+
+async def _has_contact_columns(conn) -> bool:
+    """Migration 002 adds NOT NULL contact columns to appointments that the ORM model does not declare."""
+    return bool((await conn.execute(text(
+        "SELECT 1 FROM information_schema.columns WHERE table_name = 'appointments' AND column_name = 'email'"
+    ))).first())
+
+
+async def seed(
+    engine,
+    *,
+    patients: int,
+    appointments: int,
+    holidays: int = 12,
+    history_days: int = 730,
+    days_ahead: int = 90,
+    future_fill: float = 0.6,
+) -> dict[str, int]:
+    """Insert the synthetic dataset and ANALYZE. Returns row counts."""
+    async with engine.begin() as conn:
+        contact = await _has_contact_columns(conn)
+        contact_cols = ", name, email, phone, date, day, time" if contact else ""
+        contact_vals = (
+            ", 'Patient ' || p, 'patient' || p || '@example.com', '555' || lpad(p::text, 7, '0'), "
+            "s::date, to_char(s, 'FMDay'), s::timetz"
+        ) if contact else ""
+
+        await conn.execute(text(
+            "INSERT INTO patients (name, email, phone, phone_e164) "
+            "SELECT 'Patient ' || g, 'patient' || g || '@example.com', "
+            "'555' || lpad(g::text, 7, '0'), '+1555' || lpad(g::text, 7, '0') "
+            "FROM generate_series(1, :n) g"
+        ), {"n": patients})
+
+        # Future bookings: one per selected weekday slot, all confirmed
+        await conn.execute(text(
+            f"INSERT INTO appointments (patient_id, start_time, end_time, reason, status{contact_cols}) "
+            f"SELECT p, s, s + interval '30 minutes', 'Checkup', 'CONFIRMED'{contact_vals} "
+            "FROM generate_series(1, :days) d, generate_series(0, :slots - 1) k, "
+            "LATERAL (SELECT 1 + ((d * :slots + k) % :patients) AS p, "
+            "date_trunc('day', now()) + d * interval '1 day' + interval '9 hours' "
+            "+ k * interval '30 minutes' AS s) t "
+            "WHERE extract(isodow FROM s) < 6 AND random() < :fill"
+        ), {"days": days_ahead, "slots": SLOTS_PER_DAY, "patients": patients, "fill": future_fill})
+        future = (await conn.execute(text("SELECT count(*) FROM appointments"))).scalar()
+
+        # History makes up the rest; overlaps are fine for past and cancelled rows
+        history = max(0, appointments - future)
+        await conn.execute(text(
+            f"INSERT INTO appointments (patient_id, start_time, end_time, reason, status{contact_cols}) "
+            "SELECT p, s, s + interval '30 minutes', 'Checkup', "
+            "(CASE WHEN g % 10 < 7 THEN 'COMPLETED' WHEN g % 10 < 9 THEN 'CANCELLED' "
+            f"ELSE 'RESCHEDULED' END)::appointmentstatus{contact_vals} "
+            "FROM generate_series(1, :n) g, "
+            "LATERAL (SELECT 1 + (g % :patients) AS p, date_trunc('day', now()) "
+            "- (1 + g % :history_days) * interval '1 day' + interval '9 hours' "
+            "+ ((g / :history_days) % :slots) * interval '30 minutes' AS s) t"
+        ), {"n": history, "patients": patients, "history_days": history_days, "slots": SLOTS_PER_DAY})
+
+        await conn.execute(text(
+            "INSERT INTO clinic_holidays (date, name, is_full_day, start_time, end_time, created_at) "
+            "SELECT current_date + (h * 365 / :n + 10), 'Holiday ' || h, h % 3 <> 2, "
+            "CASE WHEN h % 3 = 2 THEN time '10:00' END, CASE WHEN h % 3 = 2 THEN time '14:00' END, now() "
+            "FROM generate_series(0, :n - 1) h"
+        ), {"n": holidays})
+        await conn.execute(text("ANALYZE"))
+    return {"patients": patients, "appointments": future + history, "future_appointments": future, "holidays": holidays}
@@ -0,0 +1,236 @@
+"""
+Local fake LiveKit plugins for benchmarks and failover checks.
+
+They make no network calls. Latency is injected so provider behaviour
+(slow first audio, degradation mid-call) can be reproduced on a laptop.
+
+FakeSTT and FakeLLM follow a CallScript: the STT turns the lines a caller
+"says" into final transcripts, and the LLM answers each caller turn with the
+scripted tool calls and reply. The script is looked up through a context
+variable, so one set of plugins (as built by the worker prewarm) can serve
+several concurrent calls in a process.
+"""
+import ast
+import asyncio
+import contextvars
+import json
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional, Union
+
+from livekit.agents import llm as lk_llm
+from livekit.agents import stt as lk_stt
+from livekit.agents import tts as lk_tts
+from livekit.agents.types import DEFAULT_API_CONNECT_OPTIONS, NOT_GIVEN, APIConnectOptions, NotGivenOr
+from livekit.agents.utils import shortuuid
+
+Delay = Union[float, Callable[[], float]]
+# Tool arguments, or a callable building them from earlier tool outputs (by tool name)
+ToolArgs = Union[dict, Callable[[dict[str, Any]], dict]]
+
+
+def _resolve(delay: Delay) -> float:
+    return delay() if callable(delay) else delay
+
+
+class FakeTTS(lk_tts.TTS):
+    """
+    Non-streaming TTS that returns silence after an injected time-to-first-audio.
+
+    Args:
+        name: Provider name reported in labels/metrics
+        ttfb: Seconds before the first audio chunk, or a callable returning it per request
+        audio_seconds: Length of audio produced per request
+    """
+
+    def __init__(self, name: str, ttfb: Delay = 0.2, audio_seconds: float = 0.5, sample_rate: int = 24000):
+        super().__init__(
+            capabilities=lk_tts.TTSCapabilities(streaming=False),
+            sample_rate=sample_rate,
+            num_channels=1,
+        )
+        self.name = name
+        self.ttfb = ttfb
+        self.audio_seconds = audio_seconds
+        self.requests = 0
+        self._label = f"fake.{name}"
+
+    @property
+    def provider(self) -> str:
+        return self.name
+
+    def synthesize(
+        self, text: str, *, conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS
+    ) -> "FakeChunkedStream":
+        self.requests += 1
+        return FakeChunkedStream(tts=self, input_text=text, conn_options=conn_options)
+
+
+class FakeChunkedStream(lk_tts.ChunkedStream):
+    async def _run(self, output_emitter: lk_tts.AudioEmitter) -> None:
+        fake: FakeTTS = self._tts  # type: ignore[assignment]
+        output_emitter.initialize(
+            request_id=shortuuid(),
+            sample_rate=fake.sample_rate,
+            num_channels=fake.num_channels,
+            mime_type="audio/pcm",
+        )
+        await asyncio.sleep(_resolve(fake.ttfb))
+        # 16-bit mono silence, pushed in 100ms chunks
+        chunk = b"\x00\x00" * (fake.sample_rate // 10)
+        for _ in range(max(1, int(fake.audio_seconds * 10))):
+            output_emitter.push(chunk)
+        output_emitter.flush()
+
+
+@dataclass
+class ScriptedTurn:
+    """One caller turn: what they say, the tools the LLM calls (in order), and its reply."""
+    user: str
+    reply: str
+    tool_calls: list[tuple[str, ToolArgs]] = field(default_factory=list)
+
+
+@dataclass
+class CallScript:
+    greeting: str
+    turns: list[ScriptedTurn]
+    # Lines the caller has finished saying, consumed by FakeSTT
+    utterances: asyncio.Queue = field(default_factory=asyncio.Queue)
+
+
+current_script: contextvars.ContextVar[Optional[CallScript]] = contextvars.ContextVar("current_script", default=None)
+
+
+def _require_script() -> CallScript:
+    script = current_script.get()
+    if script is None:
+        raise RuntimeError("No CallScript set for this call (set benchmarks.fake_plugins.current_script)")
+    return script
+
+
+class FakeSTT(lk_stt.STT):
+    """
+    Streaming STT that ignores the audio and emits the script's utterances.
+
+    Args:
+        latency: Seconds from the end of an utterance to its final transcript
+    """
+
+    def __init__(self, latency: Delay = 0.3):
+        super().__init__(capabilities=lk_stt.STTCapabilities(streaming=True, interim_results=False))
+        self.latency = latency
+
+    @property
+    def provider(self) -> str:
+        return "fake"
+
+    async def _recognize_impl(self, buffer, *, language=NOT_GIVEN, conn_options=DEFAULT_API_CONNECT_OPTIONS):
+        raise NotImplementedError("FakeSTT only supports streaming")
+
+    def stream(
+        self, *, language: NotGivenOr[str] = NOT_GIVEN, conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS
+    ) -> "FakeSTTStream":
+        return FakeSTTStream(stt=self, script=_require_script(), conn_options=conn_options)
+
+
+class FakeSTTStream(lk_stt.RecognizeStream):
+    def __init__(self, *, stt: FakeSTT, script: CallScript, conn_options: APIConnectOptions):
+        super().__init__(stt=stt, conn_options=conn_options)
+        self._script = script
+
+    async def _run(self) -> None:
+        fake: FakeSTT = self._stt  # type: ignore[assignment]
+
+        async def drain_audio():
+            async for _ in self._input_ch:
+                pass
+
+        drain = asyncio.create_task(drain_audio())
+        try:
+            while True:
+                text = await self._script.utterances.get()
+                await asyncio.sleep(_resolve(fake.latency))
+                self._event_ch.send_nowait(lk_stt.SpeechEvent(
+                    type=lk_stt.SpeechEventType.FINAL_TRANSCRIPT,
+                    request_id=shortuuid(),
+                    alternatives=[lk_stt.SpeechData(language="en", text=text, confidence=1.0)],
+                ))
+        finally:
+            drain.cancel()
+
+
+def _parse_output(output: str) -> Any:
+    """Tool results reach the LLM as str(result); recover the dict when possible."""
+    for parse in (ast.literal_eval, json.loads):
+        try:
+            return parse(output)
+        except (ValueError, SyntaxError):
+            continue
+    return output
+
+
+class FakeLLM(lk_llm.LLM):
+    """
+    LLM that plays the script: greeting first, then for each caller turn its
+    tool calls one step at a time, then its reply.
+
+    Args:
+        ttft: Seconds to the first token (or tool call)
+        tokens_per_second: Streaming rate of reply words
+    """
+
+    def __init__(self, ttft: Delay = 0.4, tokens_per_second: float = 50):
+        super().__init__()
+        self.ttft = ttft
+        self.tokens_per_second = tokens_per_second
+
+    @property
+    def model(self) -> str:
+        return "fake"
+
+    def chat(self, *, chat_ctx, tools=None, conn_options=DEFAULT_API_CONNECT_OPTIONS, **kwargs) -> "FakeLLMStream":
+        return FakeLLMStream(self, script=_require_script(), chat_ctx=chat_ctx, tools=tools or [], conn_options=conn_options)
+
+
+class FakeLLMStream(lk_llm.LLMStream):
+    def __init__(self, llm: FakeLLM, *, script: CallScript, chat_ctx, tools, conn_options):
+        super().__init__(llm, chat_ctx=chat_ctx, tools=tools, conn_options=conn_options)
+        self._script = script
+
+    def _next_step(self) -> tuple[Optional[tuple[str, dict]], str]:
+        """(tool call to make, or None) and the reply text for the current caller turn."""
+        items = self._chat_ctx.items
+        user_turns = [i for i, item in enumerate(items) if item.type == "message" and item.role == "user"]
+        if not user_turns:
+            return None, self._script.greeting
+        turn = self._script.turns[min(len(user_turns), len(self._script.turns)) - 1]
+        since_user = items[user_turns[-1] + 1:]
+        outputs = {item.name: _parse_output(item.output) for item in since_user if item.type == "function_call_output"}
+        done = sum(1 for item in since_user if item.type == "function_call")
+        if done < len(turn.tool_calls):
+            name, args = turn.tool_calls[done]
+            try:
+                return (name, args(outputs) if callable(args) else args), turn.reply
+            except Exception:
+                # An earlier tool failed (e.g. no slots); answer instead of calling the next one
+                pass
+        return None, turn.reply
+
+    async def _run(self) -> None:
+        fake: FakeLLM = self._llm  # type: ignore[assignment]
+        request_id = shortuuid()
+        await asyncio.sleep(_resolve(fake.ttft))
+        tool_call, reply = self._next_step()
+        if tool_call is not None:
+            name, args = tool_call
+            self._event_ch.send_nowait(lk_llm.ChatChunk(id=request_id, delta=lk_llm.ChoiceDelta(
+                role="assistant",
+                tool_calls=[lk_llm.FunctionToolCall(name=name, arguments=json.dumps(args), call_id=shortuuid("call_"))],
+            )))
+            return
+        for i, word in enumerate(reply.split(" ")):
+            if i:
+                await asyncio.sleep(1 / fake.tokens_per_second)
+            self._event_ch.send_nowait(lk_llm.ChatChunk(
+                id=request_id, delta=lk_llm.ChoiceDelta(role="assistant", content=f" {word}" if i else word),
+            ))
@@ -0,0 +1,78 @@
+"""
+Local stand-ins for SMTP and Google Calendar in the load benchmarks.
+
+They block the calling thread for an injected latency, like smtplib and
+googleapiclient's .execute() do today, so their effect on the event loop is
+reproduced without network access. install() swaps them in for the services'
+process-wide singletons.
+"""
+import itertools
+import time
+from typing import Any, Dict, Optional
+
+from services.email_service import EmailService
+
+
+class LocalCalendarService:
+    """Google Calendar stand-in that keeps events in memory."""
+
+    def __init__(self, latency: float = 0.25):
+        self.latency = latency
+        self.events: Dict[str, Dict[str, Any]] = {}
+        self.requests = 0
+        self._ids = itertools.count(1)
+
+    def _request(self) -> None:
+        self.requests += 1
+        time.sleep(self.latency)
+
+    def initialize(self) -> bool:
+        return True
+
+    def create_event(self, **details) -> Optional[str]:
+        self._request()
+        event_id = f"local-{next(self._ids)}"
+        self.events[event_id] = details
+        return event_id
+
+    def update_event(self, event_id: str, **details) -> bool:
+        self._request()
+        if event_id not in self.events:
+            return False
+        self.events[event_id].update(details)
+        return True
+
+    def delete_event(self, event_id: str, send_notification: bool = True) -> bool:
+        self._request()
+        return self.events.pop(event_id, None) is not None
+
+    def get_event(self, event_id: str) -> Optional[Dict[str, Any]]:
+        self._request()
+        return self.events.get(event_id)
+
+
+class LocalEmailService(EmailService):
+    """EmailService that renders messages as usual but 'sends' them by sleeping."""
+
+    def __init__(self, latency: float = 0.3):
+        super().__init__()
+        self.is_configured = True
+        self.latency = latency
+        self.sent = 0
+
+    def _send_email(self, to_email: str, subject: str, text_body: str, html_body: str) -> bool:
+        time.sleep(self.latency)
+        self.sent += 1
+        return True
+
+
+def install(smtp_latency: float, calendar_latency: float) -> tuple[LocalEmailService, LocalCalendarService]:
+    """Replace the email and calendar singletons for this process."""
+    import services.email_service as email_service
+    import services.google_calendar_service as google_calendar_service
+
+    email = LocalEmailService(smtp_latency)
+    calendar = LocalCalendarService(calendar_latency)
+    email_service._email_service = email
+    google_calendar_service._calendar_service = calendar
+    return email, calendar
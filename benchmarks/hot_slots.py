@@ -0,0 +1,336 @@
+"""
+Hot-slot contention benchmark: is double-booking actually prevented?
+
+Several worker processes, each with its own engine and connection pool, fire
+concurrent book_appointment and reschedule_appointment calls through
+AppointmentService at the same handful of free slots, round after round,
+against one Postgres. Rounds start on a cross-process barrier so every
+attempt in a round races the others. Between rounds the hot slots are freed
+again.
+
+Measured:
+- outcome of every attempt: committed, conflict (the service's ValueError),
+  deadlock, serialization/lock failure, other error
+- latency of each attempt and the time spent in the SELECT ... FOR UPDATE
+  statements (where lock waits happen)
+- throughput: attempts and commits per second of round wall time
+- peak sessions waiting on a lock (sampled from pg_stat_activity) and
+  deadlocks reported by pg_stat_database
+- double-booked rows: confirmed appointments beyond the first in a hot slot,
+  checked after every round
+
+The workers call the service exactly as the tool handlers do (one session
+and transaction per attempt), so a change to its locking strategy is measured
+by re-running this. Exits 1 if any slot was double-booked.
+
+Usage:
+    python -m benchmarks.hot_slots --database-url URL --reset [--processes 4] [--concurrency 12]
+        [--slots 3] [--rounds 10] [--reschedule-share 0.3] [--calendar-ms 0] [--output FILE]
+"""
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import os
+import queue
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+from benchmarks import dataset
+from benchmarks.stats import summarize, write_results
+
+BARRIER_TIMEOUT = 120
+# SQLSTATEs that mean the database aborted the transaction rather than the service rejecting it
+DEADLOCK = "40P01"
+LOCK_FAILURES = {"40001", "55P03"}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", required=True, help="Scratch database (postgresql+asyncpg://...)")
+    parser.add_argument("--reset", action="store_true", help="Wipe the database first")
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--concurrency", type=int, default=12, help="Concurrent attempts per process per round")
+    parser.add_argument("--slots", type=int, default=3, help="Number of hot slots everyone targets")
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--reschedule-share", type=float, default=0.3, help="Share of attempts that reschedule")
+    parser.add_argument("--calendar-ms", type=float, default=0,
+                        help="Blocking Calendar stand-in latency inside the transaction (0 = no calendar)")
+    parser.add_argument("--patients", type=int, default=2000)
+    parser.add_argument("--appointments", type=int, default=20_000)
+    parser.add_argument("--output", default="hot_slots.json")
+    return parser.parse_args()
+
+
+def classify(error: Exception) -> str:
+    if isinstance(error, ValueError):
+        return "conflict"
+    sqlstate = getattr(getattr(error, "orig", None), "sqlstate", None)
+    if sqlstate == DEADLOCK:
+        return "deadlock"
+    if sqlstate in LOCK_FAILURES:
+        return "lock_failure"
+    return "error"
+
+
+# --- worker process -------------------------------------------------------
+
+
+async def _attempt(session_factory, op: str, patient_id: int, appointment_id: int, start: datetime) -> str:
+    from models.patient import Patient
+    from services.appointment_service import AppointmentService
+
+    async with session_factory() as session:
+        async with session.begin():
+            service = AppointmentService(session)
+            end = start + timedelta(minutes=30)
+            if op == "book":
+                patient = await session.get(Patient, patient_id)
+                await service.book_appointment(patient, start, end, "Hot slot")
+            else:
+                await service.reschedule_appointment(appointment_id, start, end)
+    return "committed"
+
+
+async def _run_worker(index: int, args, hot_slots, patient_ids, appointment_ids, barrier, results) -> None:
+    from sqlalchemy import event
+    from database import AsyncSessionLocal, engine
+
+    for_update_ms: list[float] = []
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def _start(conn, cursor, statement, parameters, context, executemany):
+        if "FOR UPDATE" in statement:
+            conn.info["hot_slots_start"] = time.perf_counter()
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def _end(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.pop("hot_slots_start", None)
+        if started is not None:
+            for_update_ms.append((time.perf_counter() - started) * 1000)
+
+    rng = random.Random(index)
+    loop = asyncio.get_running_loop()
+    attempts = []
+    # Warm the pool so connection setup is not part of the race
+    await asyncio.gather(*(_ping(engine) for _ in range(args.concurrency)))
+
+    async def one(task: int):
+        op = "reschedule" if rng.random() < args.reschedule_share else "book"
+        start = rng.choice(hot_slots)
+        began = time.perf_counter()
+        try:
+            outcome = await _attempt(
+                AsyncSessionLocal, op, patient_ids[task % len(patient_ids)],
+                appointment_ids[task % len(appointment_ids)], start,
+            )
+        except Exception as e:
+            outcome = classify(e)
+            if outcome == "error":
+                print(f"worker {index}: {type(e).__name__}: {e}", file=sys.stderr)
+        attempts.append({"op": op, "outcome": outcome, "ms": (time.perf_counter() - began) * 1000})
+
+    for _ in range(args.rounds):
+        await loop.run_in_executor(None, barrier.wait)
+        await asyncio.gather(*(one(task) for task in range(args.concurrency)))
+        await loop.run_in_executor(None, barrier.wait)
+
+    await engine.dispose()
+    results.put({"worker": index, "attempts": attempts, "for_update_ms": for_update_ms})
+
+
+async def _ping(engine) -> None:
+    from sqlalchemy import text
+
+    async with engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+
+
+def worker(index: int, args, hot_slots, patient_ids, appointment_ids, barrier, results) -> None:
+    """Process entry point. Each process gets its own engine from DATABASE_URL."""
+    os.environ["DATABASE_URL"] = args.database_url
+    os.environ.setdefault("SLOW_QUERY_MS", "600000")
+    logging.basicConfig(level=logging.ERROR)
+    logging.getLogger().setLevel(logging.ERROR)
+    if args.calendar_ms > 0:
+        from benchmarks.fake_services import install
+        install(0, args.calendar_ms / 1000)
+    else:
+        import services.appointment_service as appointment_service
+        appointment_service.CALENDAR_AVAILABLE = False
+    asyncio.run(_run_worker(index, args, hot_slots, patient_ids, appointment_ids, barrier, results))
+
+
+# --- coordinator ----------------------------------------------------------
+
+
+async def pick_targets(session_factory, args):
+    """Free slots to fight over, patients to book for, and appointments to move into them."""
+    from sqlalchemy import select
+    from models.appointment import Appointment, AppointmentStatus
+    from models.patient import Patient
+    from services.appointment_service import AppointmentService
+
+    day = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=20)
+    async with session_factory() as session:
+        free = await AppointmentService(session).check_availability(day, day + timedelta(days=14))
+        hot = [datetime.fromisoformat(s["start"]) for s in free[:args.slots]]
+        patient_ids = (await session.execute(select(Patient.id).limit(args.concurrency))).scalars().all()
+        # Future confirmed appointments well away from the hot slots, one per concurrent task
+        appointment_ids = (await session.execute(
+            select(Appointment.id)
+            .where(Appointment.status == AppointmentStatus.CONFIRMED, Appointment.start_time > day + timedelta(days=30))
+            .order_by(Appointment.start_time)
+            .limit(args.processes * args.concurrency)
+        )).scalars().all()
+    return hot, list(patient_ids), list(appointment_ids)
+
+
+async def free_hot_slots(engine, hot_slots) -> None:
+    from sqlalchemy import text
+
+    async with engine.begin() as conn:
+        await conn.execute(text(
+            "UPDATE appointments SET status = 'CANCELLED' WHERE status = 'CONFIRMED' AND start_time = ANY(:hot)"
+        ), {"hot": hot_slots})
+
+
+async def double_booked(engine, hot_slots) -> int:
+    """Confirmed rows beyond the first in each hot slot."""
+    from sqlalchemy import text
+
+    async with engine.connect() as conn:
+        rows = (await conn.execute(text(
+            "SELECT start_time, count(*) FROM appointments "
+            "WHERE status = 'CONFIRMED' AND start_time = ANY(:hot) GROUP BY start_time"
+        ), {"hot": hot_slots})).all()
+    return sum(count - 1 for _, count in rows if count > 1)
+
+
+async def deadlock_count(engine) -> int:
+    from sqlalchemy import text
+
+    async with engine.connect() as conn:
+        return (await conn.execute(text(
+            "SELECT deadlocks FROM pg_stat_database WHERE datname = current_database()"
+        ))).scalar()
+
+
+async def sample_lock_waiters(engine, samples: list[int], interval: float = 0.01) -> None:
+    from sqlalchemy import text
+
+    async with engine.connect() as conn:
+        while True:
+            samples.append((await conn.execute(text(
+                "SELECT count(*) FROM pg_stat_activity WHERE wait_event_type = 'Lock' AND datname = current_database()"
+            ))).scalar())
+            await conn.rollback()
+            await asyncio.sleep(interval)
+
+
+async def main() -> int:
+    args = parse_args()
+    os.environ["DATABASE_URL"] = args.database_url
+    os.environ.setdefault("SLOW_QUERY_MS", "600000")
+    from database import AsyncSessionLocal, engine
+
+    try:
+        await dataset.prepare(engine, args.database_url, schema="models", reset=args.reset)
+    except RuntimeError as e:
+        print(e, file=sys.stderr)
+        return 2
+    counts = await dataset.seed(engine, patients=args.patients, appointments=args.appointments)
+    hot_slots, patient_ids, appointment_ids = await pick_targets(AsyncSessionLocal, args)
+    logging.getLogger().setLevel(logging.ERROR)
+
+    ctx = multiprocessing.get_context("spawn")
+    barrier = ctx.Barrier(args.processes + 1, timeout=BARRIER_TIMEOUT)
+    results = ctx.Queue()
+    processes = [
+        ctx.Process(target=worker, args=(
+            i, args, hot_slots, patient_ids, appointment_ids[i::args.processes], barrier, results,
+        ))
+        for i in range(args.processes)
+    ]
+    for p in processes:
+        p.start()
+
+    per_slot = args.processes * args.concurrency / len(hot_slots)
+    print(f"{args.processes} processes x {args.concurrency} attempts per round at {len(hot_slots)} slots "
+          f"(~{per_slot:.0f} per slot), {args.rounds} rounds\n")
+    loop = asyncio.get_running_loop()
+    deadlocks_before = await deadlock_count(engine)
+    waiters: list[int] = []
+    rounds, round_seconds = [], 0.0
+    try:
+        for r in range(args.rounds):
+            await free_hot_slots(engine, hot_slots)
+            sampler = loop.create_task(sample_lock_waiters(engine, waiters))
+            await loop.run_in_executor(None, barrier.wait)
+            began = time.perf_counter()
+            await loop.run_in_executor(None, barrier.wait)
+            elapsed = time.perf_counter() - began
+            sampler.cancel()
+            round_seconds += elapsed
+            rounds.append({"round": r, "elapsed_s": round(elapsed, 3), "double_booked": await double_booked(engine, hot_slots)})
+            print(f"  round {r + 1:>2}: {elapsed * 1000:7.1f}ms  double-booked rows {rounds[-1]['double_booked']}")
+    except threading.BrokenBarrierError:
+        print("A worker stopped responding - results are incomplete", file=sys.stderr)
+
+    # Drain the queue before joining so no worker blocks on a full pipe
+    worker_results = []
+    for _ in processes:
+        try:
+            worker_results.append(results.get(timeout=BARRIER_TIMEOUT))
+        except queue.Empty:
+            break
+    for p in processes:
+        p.join(BARRIER_TIMEOUT)
+    deadlocks = await deadlock_count(engine) - deadlocks_before
+    await free_hot_slots(engine, hot_slots)
+    await engine.dispose()
+
+    attempts = [a for w in worker_results for a in w["attempts"]]
+    outcomes = Counter(a["outcome"] for a in attempts)
+    by_op = {
+        op: {**summarize([a["ms"] for a in attempts if a["op"] == op]),
+             **Counter(a["outcome"] for a in attempts if a["op"] == op)}
+        for op in ("book", "reschedule")
+    }
+    total_double = sum(r["double_booked"] for r in rounds)
+    report = {
+        "attempts": len(attempts),
+        "outcomes": dict(outcomes),
+        "attempts_per_s": round(len(attempts) / round_seconds, 1) if round_seconds else 0,
+        "commits_per_s": round(outcomes["committed"] / round_seconds, 1) if round_seconds else 0,
+        "latency": by_op,
+        "for_update": summarize([ms for w in worker_results for ms in w["for_update_ms"]]),
+        "peak_lock_waiters": max(waiters, default=0),
+        "deadlocks": deadlocks,
+        "double_booked_rows": total_double,
+        "rounds_with_double_booking": sum(1 for r in rounds if r["double_booked"]),
+    }
+    print(f"\n{len(attempts)} attempts: {dict(outcomes)}")
+    print(f"throughput {report['attempts_per_s']} attempts/s, {report['commits_per_s']} commits/s")
+    print(f"FOR UPDATE time p50 {report['for_update'].get('p50_ms', 0):.1f}ms "
+          f"p99 {report['for_update'].get('p99_ms', 0):.1f}ms, peak lock waiters {report['peak_lock_waiters']}, "
+          f"deadlocks {deadlocks}")
+    print(f"double-booked rows: {total_double} "
+          f"({report['rounds_with_double_booking']}/{len(rounds)} rounds)")
+
+    write_results(args.output, {
+        "config": vars(args),
+        "dataset": counts,
+        "hot_slots": [s.isoformat() for s in hot_slots],
+        "summary": report,
+        "rounds": rounds,
+    })
+    return 1 if total_double else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,320 @@
+"""
+Concurrent-call load generator for the tool layer.
+
+Simulates phone calls in one process, each running a scripted sequence of
+tool calls through ToolRouter.dispatch against a scratch database, the way
+the LLM drives them in a real call:
+
+- book:       [get_hours + check_availability] -> book_appointment
+- reschedule: [lookup_appointment + check_availability] -> reschedule_appointment
+- cancel:     get_upcoming_appointments -> cancel_appointment
+- info:       [get_hours + get_location + get_insurance_supported]
+
+Bracketed tools are emitted in one LLM turn and dispatched together with
+ToolRouter.dispatch_batch (--serial-turns runs them one after another for
+comparison). Each call gets its own CallContext, CallUnitOfWork and
+DispatchScope as in the entrypoint (reschedule/cancel callers are recognised
+by caller ID and prefetched).
+SMTP and Google Calendar are local stand-ins with blocking latency.
+
+For every concurrency level it reports call and tool throughput, p50/p99
+latency per tool, the booking conflict rate and DB pool saturation (peak
+connections in use, share of samples at pool capacity, checkout wait), so the
+level where tool latency starts to degrade is visible at a glance.
+
+Usage:
+    python -m benchmarks.load_test --database-url URL --reset [--concurrency 1,5,10,20,40]
+        [--calls-per-level 40] [--think-ms 300] [--smtp-ms 300] [--calendar-ms 250] [--serial-turns]
+        [--output FILE]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+
+from benchmarks import dataset
+from benchmarks.stats import summarize, write_results
+
+SCENARIO_WEIGHTS = {"book": 0.4, "reschedule": 0.2, "cancel": 0.15, "info": 0.25}
+# Callers pick among the earliest offered slots, which is where bookings collide
+SLOT_CHOICES = 3
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", required=True, help="Scratch database (postgresql+asyncpg://...)")
+    parser.add_argument("--reset", action="store_true", help="Wipe the database first")
+    parser.add_argument("--concurrency", default="1,5,10,20,40", help="Comma-separated concurrent call counts")
+    parser.add_argument("--calls-per-level", type=int, default=40)
+    parser.add_argument("--think-ms", type=float, default=300, help="Pause between a call's tool calls")
+    parser.add_argument("--smtp-ms", type=float, default=300, help="Blocking latency of the SMTP stand-in")
+    parser.add_argument("--calendar-ms", type=float, default=250, help="Blocking latency of the Calendar stand-in")
+    parser.add_argument("--patients", type=int, default=5000)
+    parser.add_argument("--appointments", type=int, default=100_000)
+    parser.add_argument("--no-uow", action="store_true", help="Fresh session per tool call instead of per call")
+    parser.add_argument("--serial-turns", action="store_true", help="Dispatch the tools of one turn one at a time")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", default="load_test.json")
+    return parser.parse_args()
+
+
+class LoadStats:
+    """Tool latencies and outcomes for one concurrency level."""
+
+    def __init__(self):
+        self.tool_ms: dict[str, list[float]] = defaultdict(list)
+        self.tool_errors: dict[str, int] = defaultdict(int)
+        self.call_ms: list[float] = []
+        self.book_attempts = 0
+        self.book_conflicts = 0
+
+    def on_dispatch(self, name: str, duration: float, error) -> None:
+        self.tool_ms[name].append(duration * 1000)
+        if error is not None:
+            self.tool_errors[name] += 1
+            if name == "book_appointment" and "no longer available" in str(error):
+                self.book_conflicts += 1
+
+
+class PoolSampler:
+    """Samples connections in use and records checkout waits while running."""
+
+    def __init__(self, engine, interval: float = 0.02):
+        self.pool = engine.sync_engine.pool
+        self.capacity = self.pool.size() + self.pool._max_overflow
+        self.interval = interval
+        self.in_use: list[int] = []
+        self.checkout_ms: list[float] = []
+        self._task = None
+
+    def _on_checkout(self, seconds: float) -> None:
+        self.checkout_ms.append(seconds * 1000)
+
+    async def _run(self):
+        while True:
+            self.in_use.append(self.pool.checkedout())
+            await asyncio.sleep(self.interval)
+
+    def __enter__(self):
+        import database
+        database.pool_checkout_observers.append(self._on_checkout)
+        self._task = asyncio.get_running_loop().create_task(self._run())
+        return self
+
+    def __exit__(self, *exc):
+        import database
+        database.pool_checkout_observers.remove(self._on_checkout)
+        self._task.cancel()
+
+    def summary(self) -> dict:
+        at_capacity = sum(1 for n in self.in_use if n >= self.capacity)
+        return {
+            "capacity": self.capacity,
+            "peak_in_use": max(self.in_use, default=0),
+            "mean_in_use": round(sum(self.in_use) / len(self.in_use), 1) if self.in_use else 0,
+            "at_capacity_pct": round(100 * at_capacity / len(self.in_use), 1) if self.in_use else 0,
+            "checkout_wait": summarize(self.checkout_ms),
+        }
+
+
+def iso(dt: datetime) -> str:
+    return dt.isoformat()
+
+
+async def run_call(index: int, scenario: str, router, args, rng: random.Random, existing: list) -> None:
+    """One simulated phone call."""
+    from database import AsyncSessionLocal, engine
+    from tools.call_context import CallContext, set_call_context
+    from tools.router import DispatchScope, set_dispatch_scope
+    from tools.unit_of_work import CallUnitOfWork
+
+    patient = existing.pop() if scenario in ("reschedule", "cancel") and existing else None
+    if scenario in ("reschedule", "cancel") and patient is None:
+        scenario = "book"
+    call_context = CallContext(
+        caller_number=patient["phone_e164"] if patient else None,
+        uow=None if args.no_uow else CallUnitOfWork(engine, AsyncSessionLocal),
+    )
+    set_call_context(call_context)
+    set_dispatch_scope(DispatchScope())
+    call_context.start_prefetch(AsyncSessionLocal)
+
+    async def turn(*calls: tuple[str, dict]) -> list:
+        """One LLM turn: think, then run its tool calls (None for a call that failed)."""
+        await asyncio.sleep(args.think_ms / 1000 * rng.uniform(0.5, 1.5))
+        if args.serial_turns:
+            outputs = []
+            for name, payload in calls:
+                try:
+                    outputs.append(await router.dispatch(name, payload))
+                except Exception as e:
+                    outputs.append(e)
+        else:
+            outputs = await router.dispatch_batch(list(calls))
+        return [None if isinstance(output, BaseException) else output for output in outputs]
+
+    async def tool(name: str, payload: dict):
+        return (await turn((name, payload)))[0]
+
+    tomorrow = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+    window = {"from": iso(tomorrow), "to": iso(tomorrow + timedelta(days=14))}
+
+    availability = ("check_availability", {"reason": "Checkup", "preferred_time_window": window})
+
+    def pick_slot(offered):
+        slots = (offered or {}).get("slots") or []
+        return rng.choice(slots[:SLOT_CHOICES]) if slots else None
+
+    try:
+        if scenario == "book":
+            _, offered = await turn(("get_hours", {}), availability)
+            slot = pick_slot(offered)
+            if slot:
+                await tool("book_appointment", {
+                    "name": f"Load Caller {index}", "reason": "Checkup", "insurance": None,
+                    "phone": f"555{index:07d}", "email": f"load.caller{index}@example.org",
+                    "slot_start": slot["start"], "slot_end": slot["end"],
+                })
+        elif scenario == "reschedule":
+            _, offered = await turn(("lookup_appointment", {"name": patient["name"]}), availability)
+            slot = pick_slot(offered)
+            if slot:
+                await tool("reschedule_appointment", {
+                    "name": patient["name"], "current_slot_start": iso(patient["start_time"]),
+                    "new_slot_start": slot["start"], "new_slot_end": slot["end"],
+                })
+        elif scenario == "cancel":
+            await tool("get_upcoming_appointments", {"name": patient["name"]})
+            await tool("cancel_appointment", {
+                "name": patient["name"], "slot_start": iso(patient["start_time"]), "reason": "Load test",
+            })
+        else:
+            await turn(("get_hours", {}), ("get_location", {}), ("get_insurance_supported", {"provider": "Aetna"}))
+    finally:
+        if call_context.uow is not None:
+            await call_context.uow.close()
+
+
+async def load_existing_patients(session_factory) -> list[dict]:
+    """Patients with exactly one upcoming confirmed appointment (so lookups are unambiguous)."""
+    from sqlalchemy import func, select
+    from models.appointment import Appointment, AppointmentStatus
+    from models.patient import Patient
+
+    async with session_factory() as session:
+        upcoming = (
+            select(Appointment.patient_id, func.min(Appointment.start_time).label("start_time"))
+            .where(Appointment.status == AppointmentStatus.CONFIRMED, Appointment.start_time > func.now())
+            .group_by(Appointment.patient_id)
+            .having(func.count() == 1)
+            .subquery()
+        )
+        rows = (await session.execute(
+            select(Patient.name, Patient.phone_e164, upcoming.c.start_time).join(upcoming, upcoming.c.patient_id == Patient.id)
+        )).all()
+    return [{"name": r.name, "phone_e164": r.phone_e164, "start_time": r.start_time} for r in rows]
+
+
+async def run_level(concurrency: int, args, router, existing: list, call_offset: int) -> dict:
+    from database import engine
+
+    stats = LoadStats()
+    router.add_observer(stats.on_dispatch)
+    rng = random.Random(args.seed + concurrency)
+    scenarios = rng.choices(list(SCENARIO_WEIGHTS), weights=list(SCENARIO_WEIGHTS.values()), k=args.calls_per_level)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int, scenario: str):
+        async with semaphore:
+            start = time.perf_counter()
+            await run_call(call_offset + i, scenario, router, args, rng, existing)
+            stats.call_ms.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    with PoolSampler(engine) as pool:
+        await asyncio.gather(*(one(i, s) for i, s in enumerate(scenarios)))
+    elapsed = time.perf_counter() - start
+    router.remove_observer(stats.on_dispatch)
+
+    dispatches = sum(len(v) for v in stats.tool_ms.values())
+    book_attempts = len(stats.tool_ms.get("book_appointment", []))
+    result = {
+        "concurrency": concurrency,
+        "calls": len(scenarios),
+        "elapsed_s": round(elapsed, 2),
+        "calls_per_s": round(len(scenarios) / elapsed, 2),
+        "tool_calls_per_s": round(dispatches / elapsed, 2),
+        "call_duration": summarize(stats.call_ms),
+        "tools": {
+            name: {**summarize(samples), "errors": stats.tool_errors.get(name, 0)}
+            for name, samples in sorted(stats.tool_ms.items())
+        },
+        "booking": {
+            "attempts": book_attempts,
+            "conflicts": stats.book_conflicts,
+            "conflict_rate_pct": round(100 * stats.book_conflicts / book_attempts, 1) if book_attempts else 0,
+        },
+        "db_pool": pool.summary(),
+    }
+    all_tools = [ms for samples in stats.tool_ms.values() for ms in samples]
+    overall = summarize(all_tools)
+    print(
+        f"{concurrency:>5} calls | {result['calls_per_s']:6.2f} calls/s {result['tool_calls_per_s']:7.2f} tools/s | "
+        f"tool p50 {overall.get('p50_ms', 0):7.1f}ms p99 {overall.get('p99_ms', 0):7.1f}ms | "
+        f"conflicts {result['booking']['conflict_rate_pct']:5.1f}% | "
+        f"pool peak {result['db_pool']['peak_in_use']}/{result['db_pool']['capacity']} "
+        f"at cap {result['db_pool']['at_capacity_pct']:5.1f}% "
+        f"wait p99 {result['db_pool']['checkout_wait'].get('p99_ms', 0):.1f}ms"
+    )
+    return result
+
+
+async def main() -> int:
+    args = parse_args()
+    os.environ["DATABASE_URL"] = args.database_url
+    os.environ.setdefault("SLOW_QUERY_MS", "600000")
+    from database import AsyncSessionLocal, engine
+    from benchmarks.fake_services import install
+    from tools.handlers import register_handlers
+    from tools.journal import ToolJournal
+    from tools.router import ToolRouter
+
+    try:
+        await dataset.prepare(engine, args.database_url, schema="models", reset=args.reset)
+    except RuntimeError as e:
+        print(e, file=sys.stderr)
+        return 2
+    counts = await dataset.seed(engine, patients=args.patients, appointments=args.appointments)
+    email, calendar = install(args.smtp_ms / 1000, args.calendar_ms / 1000)
+    router = ToolRouter(journal=ToolJournal.from_env())
+    register_handlers(router, session_factory=AsyncSessionLocal)
+    existing = await load_existing_patients(AsyncSessionLocal)
+    random.Random(args.seed).shuffle(existing)
+    # Conflicts and validation errors are expected under load; keep the table readable
+    logging.getLogger().setLevel(logging.ERROR)
+
+    print(f"{counts['appointments']:,} appointments, {len(existing):,} reschedulable patients, "
+          f"SMTP {args.smtp_ms:.0f}ms, Calendar {args.calendar_ms:.0f}ms, think {args.think_ms:.0f}ms\n")
+    levels = []
+    for index, concurrency in enumerate(int(c) for c in args.concurrency.split(",")):
+        levels.append(await run_level(concurrency, args, router, existing, index * args.calls_per_level))
+
+    await engine.dispose()
+    write_results(args.output, {
+        "config": vars(args),
+        "dataset": counts,
+        "stand_ins": {"emails_sent": email.sent, "calendar_requests": calendar.requests},
+        "levels": levels,
+        "tool_cache": router.cache.stats(),
+        "coalesced": dict(router.coalesced),
+    })
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
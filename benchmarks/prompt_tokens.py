@@ -0,0 +1,84 @@
+"""
+Report system prompt token counts per section.
+
+Shows how much of the prompt is the static (cacheable) prefix versus the
+per-call dynamic suffix, and which sections dominate. OpenAI only caches
+prompt prefixes of 1024+ tokens, in 128-token increments.
+
+Uses tiktoken when installed (o200k_base, the gpt-4o family encoding);
+otherwise falls back to a ~4 characters/token estimate.
+
+Usage:
+    python -m benchmarks.prompt_tokens [--hours "Mon: 9am-5pm; ..."] [--caller-context-file FILE]
+"""
+import argparse
+import re
+
+from system_prompt import STATIC_PROMPT, render_dynamic_suffix
+
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    TIKTOKEN_AVAILABLE = False
+
+CACHE_MIN_TOKENS = 1024
+CACHE_INCREMENT = 128
+
+
+def make_counter():
+    if TIKTOKEN_AVAILABLE:
+        encoding = tiktoken.get_encoding("o200k_base")
+        return lambda text: len(encoding.encode(text)), "tiktoken o200k_base"
+    return lambda text: max(1, round(len(text) / 4)), "estimate (~4 chars/token, install tiktoken for exact counts)"
+
+
+def split_sections(text: str) -> list[tuple[str, str]]:
+    """Split on top-level '## ' headings; text before the first heading is the preamble."""
+    parts = re.split(r"(?m)^(?=## )", text)
+    sections = []
+    for part in parts:
+        if not part:
+            continue
+        title = part.splitlines()[0].lstrip("# ").strip() if part.startswith("## ") else "(preamble)"
+        sections.append((title, part))
+    return sections
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hours", default="Mon: 9:00am-5:00pm; Tue: 9:00am-5:00pm; Wed: 9:00am-5:00pm; "
+                        "Thu: 9:00am-5:00pm; Fri: 9:00am-5:00pm; Sat: closed; Sun: closed")
+    parser.add_argument("--caller-context-file", help="Sample caller context section to include")
+    args = parser.parse_args()
+
+    caller_context = ""
+    if args.caller_context_file:
+        with open(args.caller_context_file) as f:
+            caller_context = f.read()
+
+    count, method = make_counter()
+    dynamic = render_dynamic_suffix(clinic_hours=args.hours, caller_context=caller_context)
+
+    print(f"Token counts ({method})\n")
+    print(f"{'section':<58} {'tokens':>7} {'share':>6}")
+    total_static = count(STATIC_PROMPT)
+    total = total_static + count(dynamic)
+    for part_name, text in (("STATIC PREFIX", STATIC_PROMPT), ("DYNAMIC SUFFIX", dynamic)):
+        print(f"\n[{part_name}]")
+        for title, section in split_sections(text):
+            tokens = count(section)
+            print(f"  {title[:56]:<56} {tokens:>7} {tokens / total:>6.1%}")
+
+    cacheable = 0
+    if total_static >= CACHE_MIN_TOKENS:
+        cacheable = total_static - total_static % CACHE_INCREMENT
+    print(f"\nStatic prefix:  {total_static:>6} tokens")
+    print(f"Dynamic suffix: {total - total_static:>6} tokens")
+    print(f"Total:          {total:>6} tokens")
+    print(f"Cacheable prefix (>= {CACHE_MIN_TOKENS}, {CACHE_INCREMENT}-token steps): ~{cacheable} tokens "
+          f"({cacheable / total:.0%} of the system prompt)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""
+Query-plan regression check for the hot appointment and patient queries.
+
+Builds the schema with the real Alembic migrations in a scratch Postgres
+database, seeds a large synthetic dataset, then runs the hot statements
+through AppointmentService / PatientService, captures the exact SQL they
+emit and EXPLAINs it. Fails (exit status 1) when an expected index is not
+used or a hot table is sequentially scanned - so an index lost or changed by
+a migration shows up here instead of in production.
+
+The database is wiped. Point it at a throwaway database only:
+
+    python -m benchmarks.query_plans --database-url postgresql+asyncpg://localhost/plan_check --reset
+
+Usage:
+    python -m benchmarks.query_plans --database-url URL [--reset] [--patients N] [--appointments N]
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+
+from benchmarks import dataset
+
+
+@dataclass
+class PlanCheck:
+    """A hot statement and what its plan must look like."""
+    name: str
+    # At least one of these indexes must appear in the plan
+    indexes: set[str]
+    # These tables must not be sequentially scanned
+    no_seq_scan: set[str] = field(default_factory=lambda: {"appointments", "patients"})
+
+
+CHECKS = [
+    PlanCheck("booked_slots_range", {"idx_appointments_start_status", "idx_appointments_start_time"}),
+    PlanCheck("overlap_conflict", {"idx_appointments_end_status"}),
+    PlanCheck("find_appointment", {"idx_appointments_start_status", "idx_appointments_start_time"}),
+    PlanCheck("patient_by_email", {"patients_email_key", "idx_patients_email"}),
+]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", required=True, help="Scratch database (postgresql+asyncpg://...)")
+    parser.add_argument("--reset", action="store_true", help="Drop and recreate the public schema first")
+    parser.add_argument("--patients", type=int, default=50_000)
+    parser.add_argument("--appointments", type=int, default=500_000)
+    return parser.parse_args()
+
+
+class StatementCapture:
+    """Records the SQL and parameters sent to the driver while active."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.statements: list[tuple[str, object]] = []
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append((statement, parameters))
+
+    def __enter__(self):
+        from sqlalchemy import event
+        event.listen(self.engine.sync_engine, "before_cursor_execute", self._record)
+        return self
+
+    def __exit__(self, *exc):
+        from sqlalchemy import event
+        event.remove(self.engine.sync_engine, "before_cursor_execute", self._record)
+
+
+async def capture_hot_statements(engine, session_factory) -> dict[str, tuple[str, object]]:
+    """Run the service methods and keep the first statement each one sends."""
+    from services.appointment_service import AppointmentService
+    from services.patient_service import PatientService
+
+    # A weekday-morning slot inside the seeded booking window
+    today = datetime.now(timezone.utc).replace(hour=9, minute=0, second=0, microsecond=0)
+    slot = today + timedelta(days=3)
+    captured = {}
+
+    async def run(name, fn, setup=None):
+        async with session_factory() as session:
+            arg = await setup(session) if setup else None
+            with StatementCapture(engine) as capture:
+                try:
+                    await fn(session, arg)
+                except Exception:
+                    pass  # only the first statement matters (e.g. a booking conflict after the select)
+            await session.rollback()
+        captured[name] = capture.statements[0]
+
+    await run(
+        "booked_slots_range",
+        lambda s, _: AppointmentService(s)._get_booked_slots_range(slot, slot + timedelta(days=7)),
+    )
+    await run(
+        "overlap_conflict",
+        lambda s, patient: AppointmentService(s).book_appointment(patient, slot, slot + timedelta(minutes=30), "Checkup"),
+        setup=lambda s: PatientService(s).get_patient_by_email("patient1@example.com"),
+    )
+    await run("find_appointment", lambda s, _: AppointmentService(s).find_appointment("Patient 42", slot))
+    await run("patient_by_email", lambda s, _: PatientService(s).get_patient_by_email("patient4242@example.com"))
+    return captured
+
+
+def walk_plan(node: dict, out: list[dict]) -> list[dict]:
+    out.append(node)
+    for child in node.get("Plans", []):
+        walk_plan(child, out)
+    return out
+
+
+async def explain(engine, statement: str, parameters) -> list[dict]:
+    async with engine.connect() as conn:
+        result = await conn.exec_driver_sql("EXPLAIN (FORMAT JSON) " + statement, parameters)
+        plan = result.scalar()
+        await conn.rollback()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return walk_plan(plan[0]["Plan"], [])
+
+
+def evaluate(check: PlanCheck, nodes: list[dict]) -> list[str]:
+    problems = []
+    used = {n["Index Name"] for n in nodes if "Index Name" in n}
+    if not used & check.indexes:
+        problems.append(f"expected one of {sorted(check.indexes)}, plan used {sorted(used) or 'no index'}")
+    for n in nodes:
+        if n["Node Type"] == "Seq Scan" and n.get("Relation Name") in check.no_seq_scan:
+            problems.append(f"sequential scan on {n['Relation Name']}")
+    return problems
+
+
+def describe(nodes: list[dict]) -> str:
+    parts = []
+    for n in nodes:
+        label = n["Node Type"]
+        if "Index Name" in n:
+            label += f" {n['Index Name']}"
+        elif "Relation Name" in n:
+            label += f" {n['Relation Name']}"
+        parts.append(label)
+    return " > ".join(parts)
+
+
+async def main() -> int:
+    args = parse_args()
+    os.environ["DATABASE_URL"] = args.database_url
+    # Seeding is slow by design; keep the slow-query log out of the report
+    os.environ.setdefault("SLOW_QUERY_MS", "600000")
+    from database import AsyncSessionLocal, engine
+
+    try:
+        await dataset.prepare(engine, args.database_url, schema="migrations", reset=args.reset)
+    except RuntimeError as e:
+        print(e, file=sys.stderr)
+        return 2
+    print(f"Seeding {args.patients:,} patients and {args.appointments:,} appointments...")
+    await dataset.seed(engine, patients=args.patients, appointments=args.appointments)
+
+    statements = await capture_hot_statements(engine, AsyncSessionLocal)
+    failed = 0
+    for check in CHECKS:
+        statement, parameters = statements[check.name]
+        nodes = await explain(engine, statement, parameters)
+        problems = evaluate(check, nodes)
+        status = "FAIL" if problems else "ok"
+        failed += bool(problems)
+        print(f"[{status:>4}] {check.name}: {describe(nodes)}")
+        for problem in problems:
+            print(f"       - {problem}")
+
+    await engine.dispose()
+    print(f"\n{len(CHECKS) - failed}/{len(CHECKS)} plans as expected")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
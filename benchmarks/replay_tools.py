@@ -0,0 +1,223 @@
+"""
+Replay recorded tool traces (TOOL_JOURNAL files, see tools/journal.py)
+against a seeded scratch database.
+
+Every recorded call is replayed as its own task with its own CallContext and
+CallUnitOfWork, dispatching the same tools with the same payloads through a
+ToolRouter. Pacing follows the recording: calls start and tools fire at their
+original offsets, divided by --speed (--speed 0 fires everything as fast as
+possible, keeping only the order within each call).
+
+Payloads are adapted so they still make sense against the seeded data:
+- dates and slot times are moved forward by whole weeks so they land in the
+  future on the same weekday and time of day;
+- (pseudonymised) patient names, emails and phones of a call are mapped onto
+  one seeded patient, so lookups hit rows with real appointment history.
+Cancels and reschedules of appointments that only existed in production
+will report "not found"; the error counts show how much of a trace that is.
+
+Reports recorded vs replayed p50/p99 and errors per tool, plus how far
+dispatches fell behind schedule (a saturated replay shows growing lag).
+
+Usage:
+    python -m benchmarks.replay_tools JOURNAL [JOURNAL ...] --database-url URL --reset
+        [--speed 1] [--no-uow] [--smtp-ms 300] [--calendar-ms 250] [--output FILE]
+"""
+import argparse
+import asyncio
+import hashlib
+import logging
+import math
+import os
+import sys
+import time
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+
+from benchmarks import dataset
+from benchmarks.stats import summarize, write_results
+
+DATETIME_KEYS = {"slot_start", "slot_end", "current_slot_start", "new_slot_start", "new_slot_end", "from", "to"}
+IDENTITY_KEYS = {"name", "email", "phone", "callback_number"}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("journals", nargs="+", help="TOOL_JOURNAL files to replay (merged by time)")
+    parser.add_argument("--database-url", required=True, help="Scratch database (postgresql+asyncpg://...)")
+    parser.add_argument("--reset", action="store_true", help="Wipe the database first")
+    parser.add_argument("--speed", type=float, default=1.0, help="Pacing multiplier (0 = no pacing)")
+    parser.add_argument("--no-uow", action="store_true", help="Fresh session per tool call instead of per call")
+    parser.add_argument("--keep-identities", action="store_true",
+                        help="Replay names/emails/phones as recorded instead of mapping them to seeded patients")
+    parser.add_argument("--smtp-ms", type=float, default=300)
+    parser.add_argument("--calendar-ms", type=float, default=250)
+    parser.add_argument("--patients", type=int, default=5000)
+    parser.add_argument("--appointments", type=int, default=100_000)
+    parser.add_argument("--output", default="replay_tools.json")
+    return parser.parse_args()
+
+
+class PayloadAdapter:
+    """Moves recorded times into the future and maps callers onto seeded patients."""
+
+    def __init__(self, first_recorded: float, patients: int, keep_identities: bool):
+        weeks = max(0, math.ceil((time.time() - first_recorded) / timedelta(weeks=1).total_seconds()))
+        self.shift = timedelta(weeks=weeks)
+        self.patients = patients
+        self.keep_identities = keep_identities
+
+    def _patient(self, call_key: str) -> int:
+        return 1 + int(hashlib.sha1(call_key.encode()).hexdigest()[:8], 16) % self.patients
+
+    def _identity(self, key: str, patient: int) -> str:
+        if key == "email":
+            return f"patient{patient}@example.com"
+        if key in ("phone", "callback_number"):
+            return f"555{patient:07d}"
+        return f"Patient {patient}"
+
+    def adapt(self, value, call_key: str, key: str = ""):
+        if isinstance(value, dict):
+            return {k: self.adapt(v, call_key, k) for k, v in value.items()}
+        if isinstance(value, list):
+            return [self.adapt(v, call_key, key) for v in value]
+        if not isinstance(value, str):
+            return value
+        try:
+            if key in DATETIME_KEYS:
+                return (datetime.fromisoformat(value.replace("Z", "+00:00")) + self.shift).isoformat()
+            if key == "date":
+                return (date.fromisoformat(value[:10]) + self.shift).isoformat()
+        except ValueError:
+            return value
+        if key in IDENTITY_KEYS and not self.keep_identities:
+            return self._identity(key, self._patient(call_key))
+        return value
+
+
+def load_calls(paths: list[str]) -> tuple[list[list[dict]], int]:
+    """Entries grouped by call (in order of first dispatch), and how many could not be replayed."""
+    from tools.journal import read_journal
+
+    entries = sorted((e for path in paths for e in read_journal(path)), key=lambda e: e["t"])
+    calls: dict[str, list[dict]] = defaultdict(list)
+    skipped = 0
+    for i, entry in enumerate(entries):
+        if entry.get("payload") is None:
+            # Failed input validation when recorded; the input itself was not kept
+            skipped += 1
+            continue
+        calls[entry.get("call") or f"no-call-{i}"].append(entry)
+    return list(calls.values()), skipped
+
+
+async def replay_call(entries: list[dict], router, adapter: PayloadAdapter, t0: float, replay_start: float,
+                      speed: float, use_uow: bool, results: dict) -> None:
+    from database import AsyncSessionLocal, engine
+    from tools.call_context import CallContext, set_call_context
+    from tools.unit_of_work import CallUnitOfWork
+
+    call_context = CallContext(uow=CallUnitOfWork(engine, AsyncSessionLocal) if use_uow else None)
+    set_call_context(call_context)
+    call_key = entries[0].get("call") or str(entries[0]["t"])
+    try:
+        for entry in entries:
+            if speed > 0:
+                due = replay_start + (entry["t"] - t0) / speed
+                await asyncio.sleep(max(0.0, due - time.perf_counter()))
+                results["lag_ms"].append(max(0.0, time.perf_counter() - due) * 1000)
+            tool = entry["tool"]
+            start = time.perf_counter()
+            try:
+                await router.dispatch(tool, adapter.adapt(entry["payload"], call_key))
+                ok = True
+            except Exception as e:
+                ok = False
+                results["error_types"][tool][type(e).__name__] += 1
+            results["replayed_ms"][tool].append((time.perf_counter() - start) * 1000)
+            results["recorded_ms"][tool].append(entry["ms"])
+            results["replayed_errors"][tool] += 0 if ok else 1
+            results["recorded_errors"][tool] += 0 if entry.get("ok", True) else 1
+    finally:
+        if call_context.uow is not None:
+            await call_context.uow.close()
+
+
+async def main() -> int:
+    args = parse_args()
+    os.environ["DATABASE_URL"] = args.database_url
+    os.environ.setdefault("SLOW_QUERY_MS", "600000")
+    from database import AsyncSessionLocal, engine
+    from benchmarks.fake_services import install
+    from tools.handlers import register_handlers
+    from tools.router import ToolRouter
+
+    calls, skipped = load_calls(args.journals)
+    if not calls:
+        print("No replayable entries in the journal(s)", file=sys.stderr)
+        return 2
+    try:
+        await dataset.prepare(engine, args.database_url, schema="models", reset=args.reset)
+    except RuntimeError as e:
+        print(e, file=sys.stderr)
+        return 2
+    counts = await dataset.seed(engine, patients=args.patients, appointments=args.appointments)
+    install(args.smtp_ms / 1000, args.calendar_ms / 1000)
+    router = ToolRouter()
+    register_handlers(router, session_factory=AsyncSessionLocal)
+    # Conflicts and "not found" errors are expected on replayed traces; keep the report readable
+    logging.getLogger().setLevel(logging.ERROR)
+
+    t0 = calls[0][0]["t"]
+    span = max(e["t"] for call in calls for e in call) - t0
+    adapter = PayloadAdapter(t0, args.patients, args.keep_identities)
+    dispatches = sum(len(call) for call in calls)
+    pacing = f"{args.speed:g}x" if args.speed > 0 else "unpaced"
+    print(f"Replaying {dispatches} dispatches from {len(calls)} calls recorded over {span:.0f}s "
+          f"({pacing}, {skipped} unreplayable), times shifted {adapter.shift.days} days\n")
+
+    results = {
+        "replayed_ms": defaultdict(list), "recorded_ms": defaultdict(list),
+        "replayed_errors": defaultdict(int), "recorded_errors": defaultdict(int),
+        "error_types": defaultdict(lambda: defaultdict(int)), "lag_ms": [],
+    }
+    replay_start = time.perf_counter()
+    await asyncio.gather(*(
+        replay_call(call, router, adapter, t0, replay_start, args.speed, not args.no_uow, results)
+        for call in calls
+    ))
+    elapsed = time.perf_counter() - replay_start
+    await engine.dispose()
+
+    tools = {}
+    print(f"{'tool':<28}{'n':>6}{'rec p50':>10}{'rep p50':>10}{'rec p99':>10}{'rep p99':>10}{'rec err':>9}{'rep err':>9}")
+    for tool in sorted(results["replayed_ms"]):
+        recorded, replayed = summarize(results["recorded_ms"][tool]), summarize(results["replayed_ms"][tool])
+        tools[tool] = {
+            "recorded": {**recorded, "errors": results["recorded_errors"][tool]},
+            "replayed": {**replayed, "errors": results["replayed_errors"][tool],
+                         "error_types": dict(results["error_types"][tool])},
+        }
+        print(f"{tool:<28}{replayed['n']:>6}{recorded['p50_ms']:>10.1f}{replayed['p50_ms']:>10.1f}"
+              f"{recorded['p99_ms']:>10.1f}{replayed['p99_ms']:>10.1f}"
+              f"{results['recorded_errors'][tool]:>9}{results['replayed_errors'][tool]:>9}")
+    lag = summarize(results["lag_ms"])
+    print(f"\n{dispatches / elapsed:.1f} dispatches/s over {elapsed:.1f}s"
+          + (f", schedule lag p50 {lag['p50_ms']:.1f}ms p99 {lag['p99_ms']:.1f}ms" if lag["n"] else ""))
+
+    write_results(args.output, {
+        "config": vars(args),
+        "dataset": counts,
+        "trace": {"calls": len(calls), "dispatches": dispatches, "unreplayable": skipped, "span_s": round(span, 1)},
+        "elapsed_s": round(elapsed, 2),
+        "schedule_lag": lag,
+        "tools": tools,
+        "tool_cache": router.cache.stats(),
+        "coalesced": dict(router.coalesced),
+    })
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
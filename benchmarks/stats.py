@@ -0,0 +1,58 @@
+"""Timing helpers shared by the benchmarks."""
+import json
+import os
+import platform
+import subprocess
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from telemetry.stats import percentile
+
+
+def summarize(samples_ms: list[float]) -> dict:
+    """Count, mean and percentiles (ms) of a list of samples."""
+    if not samples_ms:
+        return {"n": 0}
+    return {
+        "n": len(samples_ms),
+        "mean_ms": round(sum(samples_ms) / len(samples_ms), 2),
+        "min_ms": round(min(samples_ms), 2),
+        "p50_ms": round(percentile(samples_ms, 50), 2),
+        "p95_ms": round(percentile(samples_ms, 95), 2),
+        "p99_ms": round(percentile(samples_ms, 99), 2),
+        "max_ms": round(max(samples_ms), 2),
+    }
+
+
+@contextmanager
+def timed(samples_ms: list[float]):
+    """Append the block's wall time (ms) to samples_ms."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        samples_ms.append((time.perf_counter() - start) * 1000)
+
+
+def run_metadata() -> dict:
+    """Where and on what code a result was produced, so runs can be compared."""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        ).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "git_commit": commit,
+        "python": platform.python_version(),
+        "host": platform.node(),
+    }
+
+
+def write_results(path: str, results: dict) -> None:
+    with open(path, "w") as f:
+        json.dump({"meta": run_metadata(), **results}, f, indent=2, default=str)
+    print(f"\nResults written to {path}")
@@ -0,0 +1,418 @@
+"""
+End-to-end synthetic calls through agent.entrypoint, with no LiveKit server
+or network.
+
+Each call runs the real entrypoint (caller prefetch, unit of work, prompt
+build, AgentSession, tool router, greeting) with fake STT/LLM/TTS plugins from
+benchmarks.fake_plugins and a silent audio input / discarding audio output in
+place of the room. The LLM follows a per-call script of caller turns and tool
+calls; tools run against a scratch database with local SMTP and Calendar
+stand-ins. Several calls share one process and one set of prewarmed
+components, as jobs would if a process served more than one call.
+
+Measured per concurrency level:
+- time to greeting: job start -> first greeting audio frame
+- turn latency: end of the caller's utterance -> first reply audio frame
+  (STT finalisation + endpointing delay + LLM + tools + TTS first audio)
+- memory: peak RSS growth per concurrent call, and RSS retained per finished
+  call after the level (a leak shows up as steady growth here)
+
+--max-greeting-ms / --max-turn-p95-ms make it a regression gate (exit 1 when
+exceeded).
+
+Usage:
+    python -m benchmarks.synthetic_call --database-url URL --reset [--jobs 1,5,10] [--calls-per-level 10]
+        [--stt-ms 300] [--llm-ttft-ms 400] [--tts-ttfb-ms 250] [--max-turn-p95-ms 2500] [--output FILE]
+"""
+import argparse
+import asyncio
+import gc
+import logging
+import os
+import resource
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+# Must precede the livekit imports: sets up Prometheus multiprocess mode
+from telemetry import setup_multiprocess_dir
+setup_multiprocess_dir()
+from livekit import rtc
+from livekit.agents.voice import io
+
+from benchmarks import dataset
+from benchmarks.fake_plugins import CallScript, FakeLLM, FakeSTT, FakeTTS, ScriptedTurn, current_script
+from benchmarks.stats import summarize, write_results
+
+FRAME_SECONDS = 0.05
+SAMPLE_RATE = 24000
+
+logger = logging.getLogger("synthetic_call")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", required=True, help="Scratch database (postgresql+asyncpg://...)")
+    parser.add_argument("--reset", action="store_true", help="Wipe the database first")
+    parser.add_argument("--jobs", default="1,5,10", help="Comma-separated concurrent calls per process")
+    parser.add_argument("--calls-per-level", type=int, default=10)
+    parser.add_argument("--stt-ms", type=float, default=300, help="End of utterance -> final transcript")
+    parser.add_argument("--llm-ttft-ms", type=float, default=400, help="LLM time to first token / tool call")
+    parser.add_argument("--llm-tps", type=float, default=50, help="LLM reply words per second")
+    parser.add_argument("--tts-ttfb-ms", type=float, default=250, help="TTS time to first audio")
+    parser.add_argument("--tts-audio-s", type=float, default=0.5, help="Audio produced per TTS request")
+    parser.add_argument("--speech-ms", type=float, default=1200, help="How long the caller talks each turn")
+    parser.add_argument("--playout-speed", type=float, default=4.0,
+                        help="Play agent audio this many times faster than real time")
+    parser.add_argument("--smtp-ms", type=float, default=300)
+    parser.add_argument("--calendar-ms", type=float, default=250)
+    parser.add_argument("--turn-timeout", type=float, default=30)
+    parser.add_argument("--patients", type=int, default=1000)
+    parser.add_argument("--appointments", type=int, default=10_000)
+    parser.add_argument("--max-greeting-ms", type=float, help="Fail if greeting p95 exceeds this")
+    parser.add_argument("--max-turn-p95-ms", type=float, help="Fail if turn latency p95 exceeds this")
+    parser.add_argument("--verbose", action="store_true", help="Keep the agent's INFO logs")
+    parser.add_argument("--output", default="synthetic_call.json")
+    return parser.parse_args()
+
+
+def rss_bytes() -> int:
+    """Current resident set size (peak RSS where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        scale = 1 if sys.platform == "darwin" else 1024
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+
+# --- scripted callers -------------------------------------------------------
+
+
+def _week_window() -> dict:
+    start = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+    return {"from_": start.isoformat(), "to": (start + timedelta(days=7)).isoformat()}
+
+
+def build_script(index: int, patients: int) -> tuple[CallScript, str]:
+    """A call script and the caller's number, rotating through booking, returning-patient and info calls."""
+    kind = index % 3
+    if kind == 0:
+        name, email = f"Synthetic Caller {index}", f"synthetic.caller{index}@example.org"
+
+        def pick_slot(outputs: dict) -> dict:
+            slots = outputs["check_availability"]["slots"]
+            slot = slots[index % min(len(slots), 20)]
+            return {
+                "name": name, "reason": "Checkup", "slot_start": slot["start"], "slot_end": slot["end"],
+                "phone": f"555{index:07d}", "email": email, "insurance": None,
+            }
+
+        turns = [
+            ScriptedTurn("Hi, I'd like to book a checkup sometime next week.",
+                         "I have a few openings next week. The earliest works for you?",
+                         [("check_availability", {"reason": "Checkup", "preferred_time_window": _week_window()})]),
+            ScriptedTurn(f"Yes please. It's {name}, email {email}.",
+                         "You're all set, I've booked that and sent a confirmation email.",
+                         [("check_availability", {"reason": "Checkup", "preferred_time_window": _week_window()}),
+                          ("book_appointment", pick_slot)]),
+            ScriptedTurn("Great, thank you. Bye.", "Thanks for calling, goodbye!"),
+        ]
+        return CallScript(greeting="Hi, thanks for calling Hexaa Clinic, how can I help?", turns=turns), f"+1555{index:07d}"
+    if kind == 1:
+        patient = 1 + index % patients
+        name = f"Patient {patient}"
+        turns = [
+            ScriptedTurn("When is my next appointment?", "Your next appointment is coming up soon.",
+                         [("get_upcoming_appointments", {"name": name})]),
+            ScriptedTurn("And what are your opening hours?", "We're open Monday to Friday, nine to five.",
+                         [("get_hours", {})]),
+            ScriptedTurn("Thanks, that's all.", "You're welcome, goodbye!"),
+        ]
+        greeting = f"Hi, is this {name.split()[0]}? How can I help today?"
+        return CallScript(greeting=greeting, turns=turns), f"+1555{patient:07d}"
+    turns = [
+        ScriptedTurn("Where is the clinic?", "We're at the address on our website.", [("get_location", {})]),
+        ScriptedTurn("Do you take Aetna?", "Yes, we accept Aetna.",
+                     [("get_insurance_supported", {"provider": "Aetna"})]),
+        ScriptedTurn("Okay, bye.", "Goodbye!"),
+    ]
+    return CallScript(greeting="Hello, Hexaa Clinic, how can I help?", turns=turns), "anonymous"
+
+
+# --- room stand-ins -----------------------------------------------------------
+
+
+class SilentAudioInput(io.AudioInput):
+    """Real-time silence, so the STT stream is fed like a live track."""
+
+    def __init__(self):
+        super().__init__(label="synthetic-input")
+        self._samples = int(SAMPLE_RATE * FRAME_SECONDS)
+
+    async def __anext__(self) -> rtc.AudioFrame:
+        await asyncio.sleep(FRAME_SECONDS)
+        return rtc.AudioFrame(b"\x00\x00" * self._samples, SAMPLE_RATE, 1, self._samples)
+
+
+class DiscardingAudioOutput(io.AudioOutput):
+    """Records when each reply's first frame arrives and 'plays' it at playout_speed."""
+
+    def __init__(self, playout_speed: float):
+        super().__init__(label="synthetic-output", capabilities=io.AudioOutputCapabilities(pause=False))
+        self.playout_speed = playout_speed
+        self.segment_starts: list[float] = []
+        self._segment_seconds = 0.0
+        self._capturing = False
+        self._playout: asyncio.Task | None = None
+
+    async def capture_frame(self, frame: rtc.AudioFrame) -> None:
+        await super().capture_frame(frame)
+        if not self._capturing:
+            self._capturing = True
+            self._segment_seconds = 0.0
+            self.segment_starts.append(time.perf_counter())
+        self._segment_seconds += frame.duration
+
+    def flush(self) -> None:
+        super().flush()
+        if not self._capturing:
+            return
+        self._capturing = False
+        self._playout = asyncio.create_task(self._finish(self._segment_seconds))
+
+    async def _finish(self, seconds: float) -> None:
+        await asyncio.sleep(seconds / self.playout_speed)
+        self.on_playback_finished(playback_position=seconds, interrupted=False)
+
+    def clear_buffer(self) -> None:
+        if self._playout is not None and not self._playout.done():
+            self._playout.cancel()
+            self.on_playback_finished(playback_position=0, interrupted=True)
+        elif self._capturing:
+            self._capturing = False
+            self.on_playback_finished(playback_position=0, interrupted=True)
+
+
+class SyntheticJobContext:
+    """The parts of JobContext the entrypoint uses: room, proc.userdata and shutdown callbacks."""
+
+    def __init__(self, index: int, caller: str, proc):
+        # SIP calls always have the caller in the room; withheld numbers just don't parse
+        self.room = SimpleNamespace(
+            name=f"call-synthetic-{index}", remote_participants={caller: SimpleNamespace(identity=caller)}
+        )
+        self.proc = proc
+        self._shutdown_callbacks = []
+
+    def add_shutdown_callback(self, callback) -> None:
+        self._shutdown_callbacks.append(callback)
+
+    async def shutdown(self) -> None:
+        for callback in self._shutdown_callbacks:
+            try:
+                await callback()
+            except Exception as e:
+                logger.warning(f"Shutdown callback failed: {e}")
+
+
+class SyntheticCall:
+    """Per-call state shared between the driver and the patched AgentSession."""
+
+    def __init__(self, playout_speed: float):
+        self.playout_speed = playout_speed
+        self.session = None
+        self.output = None
+        self.reply_done = asyncio.Event()
+
+
+def patch_agent_session(agent_module, current_call) -> None:
+    """Swap agent.AgentSession for one wired to the synthetic IO instead of a room."""
+    base = agent_module.AgentSession
+
+    class SyntheticAgentSession(base):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            call = current_call.get()
+            call.session = self
+            call.output = DiscardingAudioOutput(call.playout_speed)
+            self.input.audio = SilentAudioInput()
+            self.output.audio = call.output
+
+            @self.on("agent_state_changed")
+            def _on_state(ev):
+                if ev.old_state == "speaking" and ev.new_state == "listening":
+                    call.reply_done.set()
+
+        async def start(self, agent, *, room=None, room_input_options=None, **kwargs):
+            return await super().start(agent, **kwargs)
+
+    agent_module.AgentSession = SyntheticAgentSession
+
+
+# --- driver -----------------------------------------------------------------
+
+
+async def run_call(index: int, args, agent_module, proc, current_call) -> dict:
+    script, caller = build_script(index, args.patients)
+    current_script.set(script)
+    call = SyntheticCall(args.playout_speed)
+    current_call.set(call)
+    ctx = SyntheticJobContext(index, caller, proc)
+
+    start = time.perf_counter()
+    result = {"greeting_ms": None, "turn_ms": [], "failed_turns": 0}
+    try:
+        await asyncio.wait_for(agent_module.entrypoint(ctx), args.turn_timeout)
+        if call.output.segment_starts:
+            result["greeting_ms"] = (call.output.segment_starts[0] - start) * 1000
+        for turn in script.turns:
+            await asyncio.sleep(args.speech_ms / 1000)
+            replies_before = len(call.output.segment_starts)
+            call.reply_done.clear()
+            spoke_at = time.perf_counter()
+            script.utterances.put_nowait(turn.user)
+            try:
+                await asyncio.wait_for(call.reply_done.wait(), args.turn_timeout)
+            except asyncio.TimeoutError:
+                result["failed_turns"] += 1
+                continue
+            if len(call.output.segment_starts) > replies_before:
+                result["turn_ms"].append((call.output.segment_starts[replies_before] - spoke_at) * 1000)
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+        print(f"call {index}: {result['error']}", file=sys.stderr)
+    finally:
+        if call.session is not None:
+            await call.session.aclose()
+        await ctx.shutdown()
+    result["call_s"] = time.perf_counter() - start
+    return result
+
+
+async def run_level(jobs: int, args, agent_module, proc, current_call, offset: int) -> dict:
+    gc.collect()
+    baseline = rss_bytes()
+    peak = [baseline]
+
+    async def sample_rss():
+        while True:
+            peak[0] = max(peak[0], rss_bytes())
+            await asyncio.sleep(0.1)
+
+    semaphore = asyncio.Semaphore(jobs)
+
+    async def one(i: int):
+        async with semaphore:
+            return await run_call(offset + i, args, agent_module, proc, current_call)
+
+    sampler = asyncio.create_task(sample_rss())
+    start = time.perf_counter()
+    calls = await asyncio.gather(*(one(i) for i in range(args.calls_per_level)))
+    elapsed = time.perf_counter() - start
+    sampler.cancel()
+    gc.collect()
+    retained = rss_bytes() - baseline
+
+    greetings = [c["greeting_ms"] for c in calls if c["greeting_ms"] is not None]
+    turns = [ms for c in calls for ms in c["turn_ms"]]
+    result = {
+        "jobs": jobs,
+        "calls": len(calls),
+        "elapsed_s": round(elapsed, 2),
+        "errors": sum(1 for c in calls if "error" in c),
+        "failed_turns": sum(c["failed_turns"] for c in calls),
+        "time_to_greeting": summarize(greetings),
+        "turn_latency": summarize(turns),
+        "memory": {
+            "baseline_mb": round(baseline / 2**20, 1),
+            "peak_growth_per_concurrent_call_mb": round((peak[0] - baseline) / 2**20 / jobs, 2),
+            "retained_per_call_mb": round(retained / 2**20 / len(calls), 3),
+        },
+    }
+    print(
+        f"{jobs:>4} jobs | greeting p50 {result['time_to_greeting'].get('p50_ms', 0):6.0f}ms "
+        f"p95 {result['time_to_greeting'].get('p95_ms', 0):6.0f}ms | turn p50 "
+        f"{result['turn_latency'].get('p50_ms', 0):6.0f}ms p95 {result['turn_latency'].get('p95_ms', 0):6.0f}ms | "
+        f"mem {result['memory']['peak_growth_per_concurrent_call_mb']:.2f}MB/call "
+        f"(retained {result['memory']['retained_per_call_mb'] * 1000:.0f}KB/call) | "
+        f"errors {result['errors']} failed turns {result['failed_turns']}"
+    )
+    return result
+
+
+def build_components(args) -> dict:
+    """What agent.prewarm stores in proc.userdata, with fake plugins."""
+    from telemetry.metrics import record_tool_dispatch
+    from database import AsyncSessionLocal
+    from tools.handlers import register_handlers
+    from tools.journal import ToolJournal
+    from tools.livekit_tools import create_livekit_tools
+    from tools.router import ToolRouter
+
+    router = ToolRouter(journal=ToolJournal.from_env())
+    register_handlers(router, session_factory=AsyncSessionLocal)
+    router.add_observer(record_tool_dispatch)
+    return {
+        "router": router,
+        "livekit_tools": create_livekit_tools(router),
+        "stt": FakeSTT(latency=args.stt_ms / 1000),
+        "llm": FakeLLM(ttft=args.llm_ttft_ms / 1000, tokens_per_second=args.llm_tps),
+        "tts_provider": "fake",
+        "tts": FakeTTS("fake", ttfb=args.tts_ttfb_ms / 1000, audio_seconds=args.tts_audio_s),
+    }
+
+
+async def main() -> int:
+    import contextvars
+
+    args = parse_args()
+    os.environ["DATABASE_URL"] = args.database_url
+    os.environ.setdefault("SLOW_QUERY_MS", "600000")
+    import agent as agent_module
+    from benchmarks.fake_services import install
+    from database import engine
+
+    if not args.verbose:
+        logging.getLogger().setLevel(logging.WARNING)
+        # No VAD / no pausable output are expected with the synthetic IO
+        logging.getLogger("livekit.agents").setLevel(logging.ERROR)
+    try:
+        await dataset.prepare(engine, args.database_url, schema="models", reset=args.reset)
+    except RuntimeError as e:
+        print(e, file=sys.stderr)
+        return 2
+    counts = await dataset.seed(engine, patients=args.patients, appointments=args.appointments)
+    install(args.smtp_ms / 1000, args.calendar_ms / 1000)
+
+    current_call = contextvars.ContextVar("current_call")
+    patch_agent_session(agent_module, current_call)
+    proc = SimpleNamespace(userdata={"components": build_components(args)})
+
+    print(f"STT {args.stt_ms:.0f}ms, LLM TTFT {args.llm_ttft_ms:.0f}ms, TTS TTFB {args.tts_ttfb_ms:.0f}ms, "
+          f"caller speech {args.speech_ms:.0f}ms\n")
+    levels = []
+    for index, jobs in enumerate(int(j) for j in args.jobs.split(",")):
+        levels.append(await run_level(jobs, args, agent_module, proc, current_call, index * args.calls_per_level))
+
+    await engine.dispose()
+    write_results(args.output, {"config": vars(args), "dataset": counts, "levels": levels})
+
+    failures = []
+    for level in levels:
+        greeting_p95 = level["time_to_greeting"].get("p95_ms", 0)
+        turn_p95 = level["turn_latency"].get("p95_ms", 0)
+        if args.max_greeting_ms and greeting_p95 > args.max_greeting_ms:
+            failures.append(f"{level['jobs']} jobs: greeting p95 {greeting_p95:.0f}ms > {args.max_greeting_ms:.0f}ms")
+        if args.max_turn_p95_ms and turn_p95 > args.max_turn_p95_ms:
+            failures.append(f"{level['jobs']} jobs: turn p95 {turn_p95:.0f}ms > {args.max_turn_p95_ms:.0f}ms")
+        if level["errors"] or level["failed_turns"]:
+            failures.append(f"{level['jobs']} jobs: {level['errors']} call errors, {level['failed_turns']} failed turns")
+    for failure in failures:
+        print(f"FAIL {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
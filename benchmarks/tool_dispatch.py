@@ -0,0 +1,78 @@
+"""
+Micro-benchmark of ToolRouter.dispatch overhead by output size.
+
+A stub check_availability handler returns a prebuilt CheckAvailabilityOutput
+with N slots, so the timing is the router's own work: input validation,
+output validation and serialization. Compares the strict output mode
+(dump -> re-validate -> dump, the previous behaviour) with the default
+trusted mode (one dump of the handler's typed output).
+
+Usage:
+    python -m benchmarks.tool_dispatch [--slots 10,100,1000] [--iterations 2000]
+"""
+import argparse
+import asyncio
+import logging
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+
+from tools.router import ToolRouter
+from tools.schemas import CheckAvailabilityInput, CheckAvailabilityOutput, Slot
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--slots", default="10,100,1000", help="Comma-separated slot counts")
+    parser.add_argument("--iterations", type=int, default=2000)
+    return parser.parse_args()
+
+
+def build_output(slots: int) -> CheckAvailabilityOutput:
+    start = datetime.now(timezone.utc).replace(hour=9, minute=0, second=0, microsecond=0) + timedelta(days=1)
+    return CheckAvailabilityOutput(slots=[
+        Slot(start=(start + timedelta(minutes=30 * i)).isoformat(),
+             end=(start + timedelta(minutes=30 * (i + 1))).isoformat())
+        for i in range(slots)
+    ])
+
+
+async def bench(router: ToolRouter, payload: dict, iterations: int) -> float:
+    """Median dispatch time in microseconds."""
+    for _ in range(min(100, iterations)):
+        await router.dispatch("check_availability", payload)
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        await router.dispatch("check_availability", payload)
+        samples.append((time.perf_counter() - start) * 1e6)
+    return statistics.median(samples)
+
+
+async def main() -> None:
+    args = parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+    now = datetime.now(timezone.utc)
+    payload = {"reason": "Checkup", "preferred_time_window": {
+        "from": now.isoformat(), "to": (now + timedelta(days=14)).isoformat(),
+    }}
+
+    print(f"{'slots':>6}{'strict p50':>13}{'trusted p50':>13}{'saved':>9}")
+    for slots in (int(s) for s in args.slots.split(",")):
+        output = build_output(slots)
+
+        async def handler(_: CheckAvailabilityInput) -> CheckAvailabilityOutput:
+            return output
+
+        results = {}
+        for mode, strict in (("strict", True), ("trusted", False)):
+            router = ToolRouter(strict_outputs=strict)
+            router.register("check_availability", CheckAvailabilityInput, CheckAvailabilityOutput, handler)
+            results[mode] = await bench(router, payload, args.iterations)
+        strict_p50, trusted_p50 = results["strict"], results["trusted"]
+        print(f"{slots:>6}{strict_p50:>11.0f}us{trusted_p50:>11.0f}us"
+              f"{100 * (1 - trusted_p50 / strict_p50):>8.0f}%")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
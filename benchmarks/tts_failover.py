@@ -0,0 +1,69 @@
+"""
+Exercise LatencyAwareTTS with fake providers.
+
+The primary provider degrades after a number of utterances; the adapter should
+switch to the fallback mid-"call" and report per-provider latency stats.
+
+Usage:
+    python -m benchmarks.tts_failover [--utterances 30] [--degrade-after 8] [--slow-ms 1500]
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks.fake_plugins import FakeTTS
+from services.tts_failover import LatencyAwareTTS
+
+
+async def run(args) -> None:
+    primary_calls = [0]
+
+    def primary_ttfb() -> float:
+        primary_calls[0] += 1
+        return (args.slow_ms if primary_calls[0] > args.degrade_after else args.fast_ms) / 1000
+
+    primary = FakeTTS("elevenlabs", ttfb=primary_ttfb)
+    fallback = FakeTTS("deepgram", ttfb=args.fast_ms / 1000)
+    adapter = LatencyAwareTTS(
+        {"elevenlabs": primary, "deepgram": fallback},
+        p95_threshold_ms=args.threshold_ms,
+        min_samples=args.min_samples,
+        cooldown=args.cooldown,
+    )
+
+    for n in range(1, args.utterances + 1):
+        provider = adapter.active_provider
+        start = time.perf_counter()
+        async with adapter.synthesize(f"utterance {n}") as stream:
+            first = None
+            async for _ in stream:
+                if first is None:
+                    first = time.perf_counter() - start
+        print(f"#{n:3d} {provider:<11} first audio {first*1000:7.0f}ms")
+
+    print("\nPer-provider time-to-first-audio:")
+    for name, stats in adapter.latency_stats().items():
+        p50 = f"{stats['p50_ms']:.0f}ms" if stats["p50_ms"] is not None else "-"
+        p95 = f"{stats['p95_ms']:.0f}ms" if stats["p95_ms"] is not None else "-"
+        print(
+            f"  {name:<11} samples={stats['samples']:3d} p50={p50:>7} p95={p95:>7} "
+            f"available={stats['available']} demotions={stats['demotions']}"
+        )
+    print(f"Requests served: elevenlabs={primary.requests} deepgram={fallback.requests}")
+    await adapter.aclose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--utterances", type=int, default=30)
+    parser.add_argument("--degrade-after", type=int, default=8, help="Primary requests before it turns slow")
+    parser.add_argument("--fast-ms", type=float, default=150)
+    parser.add_argument("--slow-ms", type=float, default=1500)
+    parser.add_argument("--threshold-ms", type=float, default=1000)
+    parser.add_argument("--min-samples", type=int, default=5)
+    parser.add_argument("--cooldown", type=float, default=60)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
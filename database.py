@@ -1,10 +1,20 @@
 from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.orm import declarative_base
+from sqlalchemy import event, text
+from sqlalchemy.exc import ProgrammingError
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+import asyncio
 import logging
 import os
+import re
+import time
+from dataclasses import dataclass
+from typing import Optional
 from urllib.parse import urlparse
 from dotenv import load_dotenv
 
+from utils.deadline import bounded_timeout
+
 # Load environment variables from .env.local
 load_dotenv(dotenv_path=".env.local")
 
@@ -15,9 +25,40 @@ DATABASE_URL = os.getenv("DATABASE_URL")
 if not DATABASE_URL:
     raise ValueError("DATABASE_URL environment variable is required for deployment")
 
+# Called with the seconds each pool checkout waited (includes opening a new connection)
+pool_checkout_observers: list = []
+
+
+class TimedAsyncAdaptedQueuePool(AsyncAdaptedQueuePool):
+    """
+    AsyncAdaptedQueuePool that reports how long each checkout waited.
+
+    A checkout made during a tool dispatch waits at most until the dispatch's
+    deadline rather than the full pool_timeout.
+    """
+
+    @property
+    def _timeout(self) -> float:
+        return bounded_timeout(self._pool_timeout)
+
+    @_timeout.setter
+    def _timeout(self, value: float) -> None:
+        self._pool_timeout = value
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            elapsed = time.perf_counter() - start
+            for observer in pool_checkout_observers:
+                observer(elapsed)
+
+
 # Create async engine with Neon-optimized settings
 engine: AsyncEngine = create_async_engine(
     DATABASE_URL,
+    poolclass=TimedAsyncAdaptedQueuePool,
     echo=False,  # Set to True for SQL query logging
     pool_size=10,
     max_overflow=20,
@@ -26,6 +67,132 @@ engine: AsyncEngine = create_async_engine(
     pool_timeout=30,
 )
 
+# ---- Slow-query log ----
+# Statements slower than this are logged with their normalized text
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "100"))
+# Capture an EXPLAIN for slow statements (SELECTs get ANALYZE, BUFFERS)
+SLOW_QUERY_EXPLAIN = os.getenv("SLOW_QUERY_EXPLAIN", "1") != "0"
+# Minimum seconds between EXPLAIN samples of the same normalized statement
+SLOW_QUERY_EXPLAIN_INTERVAL = float(os.getenv("SLOW_QUERY_EXPLAIN_INTERVAL", "600"))
+
+
+@dataclass
+class StatementStats:
+    """Timings for one normalized statement in this process."""
+    statement: str
+    count: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    slow: int = 0
+    last_explain: float = 0.0
+    plan: Optional[str] = None
+
+
+# normalized statement -> stats
+query_stats: dict[str, StatementStats] = {}
+_explain_in_flight = False
+# Running EXPLAIN captures (the loop only keeps weak references to tasks)
+_explain_tasks: set[asyncio.Task] = set()
+# Cap on an EXPLAIN capture; it runs on its own connection and must never wait long
+SLOW_QUERY_EXPLAIN_TIMEOUT_MS = int(os.getenv("SLOW_QUERY_EXPLAIN_TIMEOUT_MS", "2000"))
+
+_NORMALIZE = [
+    (re.compile(r"'(?:[^']|'')*'"), "?"),
+    (re.compile(r"\$\d+(?:::(?:TIMESTAMP WITH(?:OUT)? TIME ZONE|\w+(?:\[\])?))?"), "?"),
+    (re.compile(r"\b\d+(?:\.\d+)?\b"), "?"),
+    (re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)"), "(?, ...)"),
+    (re.compile(r"\s+"), " "),
+]
+_LOCKING_CLAUSE = re.compile(r"\bFOR\s+(?:NO\s+KEY\s+)?(?:UPDATE|SHARE|KEY\s+SHARE)\b", re.IGNORECASE)
+
+
+def normalize_statement(statement: str) -> str:
+    """Statement text with literals and bind placeholders replaced, so executions group together."""
+    for pattern, replacement in _NORMALIZE:
+        statement = pattern.sub(replacement, statement)
+    return statement.strip()
+
+
+async def _capture_explain(stats: StatementStats, statement: str, parameters) -> None:
+    """EXPLAIN a slow statement on its own pooled connection, off the caller's path."""
+    # ANALYZE runs the statement again: only for plain reads. A locking SELECT
+    # would wait on the row locks its own transaction still holds.
+    analyze = statement.lstrip().upper().startswith(("SELECT", "WITH")) and not _LOCKING_CLAUSE.search(statement)
+    prefix = "EXPLAIN (ANALYZE, BUFFERS) " if analyze else "EXPLAIN "
+    try:
+        async with engine.connect() as conn:
+            await conn.exec_driver_sql(f"SET LOCAL statement_timeout = {SLOW_QUERY_EXPLAIN_TIMEOUT_MS}")
+            result = await conn.exec_driver_sql(prefix + statement, parameters)
+            stats.plan = "\n".join(row[0] for row in result)
+            # EXPLAIN ANALYZE really runs the statement; never keep its effects
+            await conn.rollback()
+        logger.warning("🐌 Plan for slow statement %s\n%s", stats.statement, stats.plan)
+    except Exception as e:
+        logger.debug("EXPLAIN capture failed for %s: %s", stats.statement, e)
+
+
+def _explain_done(task: asyncio.Task) -> None:
+    # A callback rather than a finally: also runs if the task is cancelled before it starts
+    global _explain_in_flight
+    _explain_tasks.discard(task)
+    _explain_in_flight = False
+
+
+def _maybe_explain(stats: StatementStats, statement: str, parameters) -> None:
+    global _explain_in_flight
+    now = time.monotonic()
+    if _explain_in_flight or (stats.last_explain and now - stats.last_explain < SLOW_QUERY_EXPLAIN_INTERVAL):
+        return
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return
+    stats.last_explain = now
+    _explain_in_flight = True
+    task = loop.create_task(_capture_explain(stats, statement, parameters), name="slow-query-explain")
+    _explain_tasks.add(task)
+    task.add_done_callback(_explain_done)
+
+
+@event.listens_for(engine.sync_engine, "before_cursor_execute")
+def _start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    context._query_start = time.perf_counter()
+
+
+@event.listens_for(engine.sync_engine, "after_cursor_execute")
+def _record_query_time(conn, cursor, statement, parameters, context, executemany):
+    start = getattr(context, "_query_start", None)
+    if start is None or statement.lstrip().upper().startswith(("EXPLAIN", "SET LOCAL STATEMENT_TIMEOUT")):
+        return
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    normalized = normalize_statement(statement)
+    stats = query_stats.get(normalized)
+    if stats is None:
+        stats = query_stats[normalized] = StatementStats(normalized)
+    stats.count += 1
+    stats.total_ms += elapsed_ms
+    stats.max_ms = max(stats.max_ms, elapsed_ms)
+    if elapsed_ms < SLOW_QUERY_MS:
+        return
+    stats.slow += 1
+    logger.warning("🐌 Slow query %.0fms (%d of %d slow): %s", elapsed_ms, stats.slow, stats.count, normalized)
+    if SLOW_QUERY_EXPLAIN and not executemany:
+        _maybe_explain(stats, statement, parameters)
+
+
+async def log_query_stats(top: int = 10) -> None:
+    """Log the statements with the most total time in this process (job shutdown callback)."""
+    if not query_stats:
+        return
+    lines = [f"🗄️  Top statements by total time ({len(query_stats)} distinct):"]
+    for stats in sorted(query_stats.values(), key=lambda s: s.total_ms, reverse=True)[:top]:
+        lines.append(
+            f"   {stats.total_ms:7.0f}ms total  {stats.count:4d}x  max {stats.max_ms:5.0f}ms  "
+            f"slow {stats.slow:3d}  {stats.statement[:160]}"
+        )
+    logger.info("\n".join(lines))
+
+
 # Session factory for creating async sessions
 AsyncSessionLocal = async_sessionmaker(
     engine,
@@ -53,3 +220,55 @@ logger.info(
     "Database engine created for host=%s pool_size=10 max_overflow=20",
     parsed.hostname,
 )
+
+
+# Schema is managed by Alembic (`alembic upgrade head` runs once per deploy).
+# Workers only verify the database is at the migration head, once per process.
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.abspath(__file__)), "alembic.ini")
+_schema_version_ok = False
+
+
+class SchemaVersionError(RuntimeError):
+    """Database schema is not at the Alembic migration head."""
+
+
+def get_migration_heads() -> set[str]:
+    """Head revision(s) of the Alembic scripts shipped with this build (no DB access)."""
+    from alembic.config import Config
+    from alembic.script import ScriptDirectory
+
+    config = Config(ALEMBIC_INI)
+    config.set_main_option("script_location", os.path.join(os.path.dirname(ALEMBIC_INI), "alembic"))
+    return set(ScriptDirectory.from_config(config).get_heads())
+
+
+async def verify_schema_version() -> None:
+    """
+    Fail fast if migrations are behind (one SELECT; cached after the first success).
+
+    Raises:
+        SchemaVersionError: alembic_version is missing or not at the script head(s)
+    """
+    global _schema_version_ok
+    if _schema_version_ok:
+        return
+
+    expected = get_migration_heads()
+    try:
+        async with engine.connect() as conn:
+            result = await conn.execute(text("SELECT version_num FROM alembic_version"))
+            current = {row[0] for row in result}
+    except ProgrammingError as e:
+        raise SchemaVersionError(
+            "Database has no alembic_version table - run `alembic upgrade head` "
+            "(or `alembic stamp head` for a schema created outside Alembic)"
+        ) from e
+
+    if current != expected:
+        raise SchemaVersionError(
+            f"Database schema is at {sorted(current) or 'no revision'}, expected {sorted(expected)} - "
+            "run `alembic upgrade head`"
+        )
+
+    _schema_version_ok = True
+    logger.info("Database schema at migration head %s", ", ".join(sorted(current)))
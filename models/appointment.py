@@ -30,6 +30,8 @@ class Appointment(Base, TimestampMixin):
     # Composite index for availability queries
     __table_args__ = (
         Index('idx_appointments_start_status', 'start_time', 'status'),
+        # Overlap checks: end_time > new start only matches upcoming appointments
+        Index('idx_appointments_end_status', 'end_time', 'status'),
     )
 
     def __repr__(self):
@@ -9,6 +9,8 @@ class Patient(Base, TimestampMixin):
     name = Column(String(255), nullable=False)
     email = Column(String(255), unique=True, nullable=False, index=True)
     phone = Column(String(20), nullable=False)
+    # E.164 form of phone (utils.phone.normalize_phone); all phone lookups use this column
+    phone_e164 = Column(String(16), nullable=True, index=True)
     insurance_provider = Column(String(255), nullable=True)
 
     def __repr__(self):
@@ -1,5 +1,5 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_,func
+from sqlalchemy import select, update, and_,func
 from sqlalchemy.orm import selectinload
 from models.appointment import Appointment, AppointmentStatus
 from models.clinic_hours import ClinicHours, ClinicHoliday
@@ -7,13 +7,7 @@ from models.patient import Patient
 from datetime import datetime, timedelta, time, date as date_type
 import logging
 
-# Import Google Calendar service
-try:
-    from services.google_calendar_service import get_calendar_service
-    CALENDAR_AVAILABLE = True
-except ImportError:
-    CALENDAR_AVAILABLE = False
-    get_calendar_service = None
+from telemetry.metrics import record_cache
 
 logger = logging.getLogger(__name__)
 
@@ -42,17 +36,34 @@ class AppointmentService:
         result = await self.session.execute(stmt)
         return result.scalar_one_or_none()
 
+    def _read_cache(self) -> dict:
+        """
+        Per-session cache for reference data (clinic hours, holidays).
+
+        Lives in session.info, so it lasts as long as the session: one tool call
+        for a throwaway session, the whole call for a call-scoped unit of work.
+        """
+        return self.session.info.setdefault("read_cache", {})
+
     async def get_all_holidays(self) -> list[ClinicHoliday]:
         """Get all clinic holidays."""
-        stmt = select(ClinicHoliday).order_by(ClinicHoliday.date)
-        result = await self.session.execute(stmt)
-        return result.scalars().all()
+        cache = self._read_cache()
+        record_cache("read_cache", "holidays" in cache)
+        if "holidays" not in cache:
+            stmt = select(ClinicHoliday).order_by(ClinicHoliday.date)
+            result = await self.session.execute(stmt)
+            cache["holidays"] = result.scalars().all()
+        return cache["holidays"]
 
     async def get_all_clinic_hours(self) -> list[ClinicHours]:
         """Get clinic hours for all days."""
-        stmt = select(ClinicHours).order_by(ClinicHours.day_of_week)
-        result = await self.session.execute(stmt)
-        return result.scalars().all()
+        cache = self._read_cache()
+        record_cache("read_cache", "clinic_hours" in cache)
+        if "clinic_hours" not in cache:
+            stmt = select(ClinicHours).order_by(ClinicHours.day_of_week)
+            result = await self.session.execute(stmt)
+            cache["clinic_hours"] = result.scalars().all()
+        return cache["clinic_hours"]
 
     async def check_availability(
         self,
@@ -339,7 +350,7 @@ class AppointmentService:
                 Appointment.end_time > start_time,
                 Appointment.status == AppointmentStatus.CONFIRMED
             )
-        ).with_for_update()
+        ).with_for_update().execution_options(populate_existing=True)
 
         result = await self.session.execute(stmt)
         conflicting = result.scalars().all()
@@ -358,28 +369,8 @@ class AppointmentService:
         )
         self.session.add(appointment)
         await self.session.flush()  # Get appointment.id
-        
-        # Create Google Calendar event
-        if CALENDAR_AVAILABLE:
-            try:
-                calendar_service = get_calendar_service()
-                event_id = calendar_service.create_event(
-                    patient_name=patient.name,
-                    patient_email=patient.email,
-                    patient_phone=patient.phone,
-                    reason=reason,
-                    start_time=start_time,
-                    end_time=end_time,
-                    appointment_id=appointment.id
-                )
-                if event_id:
-                    appointment.google_calendar_event_id = event_id
-                    await self.session.flush()
-                    logger.info(f"Created calendar event {event_id} for appointment {appointment.id}")
-            except Exception as e:
-                logger.error(f"Failed to create calendar event: {e}")
-                # Continue without calendar - appointment is still valid
-        
+
+        # The Google Calendar event is created by the caller once this is committed
         logger.info(f"Booked appointment ID {appointment.id} for patient {patient.email}")
         return appointment
 
@@ -389,7 +380,12 @@ class AppointmentService:
         cancellation_reason: str | None = None
     ) -> Appointment:
         """Cancel appointment by ID."""
-        stmt = select(Appointment).where(Appointment.id == appointment_id).with_for_update()
+        stmt = (
+            select(Appointment)
+            .where(Appointment.id == appointment_id)
+            .with_for_update()
+            .execution_options(populate_existing=True)
+        )
         result = await self.session.execute(stmt)
         appointment = result.scalar_one_or_none()
 
@@ -399,22 +395,11 @@ class AppointmentService:
         if appointment.status == AppointmentStatus.CANCELLED:
             raise ValueError(f"Appointment {appointment_id} is already cancelled")
 
-        # Store calendar event ID before cancelling
-        calendar_event_id = appointment.google_calendar_event_id
-
         appointment.status = AppointmentStatus.CANCELLED
         appointment.cancellation_reason = cancellation_reason
         await self.session.flush()
-        
-        # Delete from Google Calendar
-        if calendar_event_id and CALENDAR_AVAILABLE:
-            try:
-                calendar_service = get_calendar_service()
-                calendar_service.delete_event(calendar_event_id)
-                logger.info(f"Deleted calendar event {calendar_event_id}")
-            except Exception as e:
-                logger.error(f"Failed to delete calendar event: {e}")
-        
+
+        # The Google Calendar event is deleted by the caller once this is committed
         logger.info(f"Cancelled appointment ID {appointment_id}")
         return appointment
 
@@ -424,12 +409,13 @@ class AppointmentService:
         new_start_time: datetime,
         new_end_time: datetime
     ) -> Appointment:
-       
         stmt = (
             select(Appointment)
             .options(selectinload(Appointment.patient))
             .where(Appointment.id == appointment_id)
             .with_for_update()
+            # The call's session may hold this row from an earlier tool call; use the locked version
+            .execution_options(populate_existing=True)
         )
         result = await self.session.execute(stmt)
         old_appointment = result.scalar_one_or_none()
@@ -450,7 +436,7 @@ class AppointmentService:
                 Appointment.end_time > new_start_time,
                 Appointment.status == AppointmentStatus.CONFIRMED
             )
-        ).with_for_update()
+        ).with_for_update().execution_options(populate_existing=True)
 
         result = await self.session.execute(stmt)
         conflicting = result.scalars().all()
@@ -458,15 +444,9 @@ class AppointmentService:
         if conflicting:
             raise ValueError("New time slot is not available")
 
-        # Store old calendar event ID
-        old_calendar_event_id = old_appointment.google_calendar_event_id
-
         # Mark old as rescheduled (even if it was cancelled)
         old_appointment.status = AppointmentStatus.RESCHEDULED
 
-        # Get patient (already loaded via selectinload above)
-        patient = old_appointment.patient
-
         # Create new appointment (always with CONFIRMED status - this reactivates cancelled ones)
         new_appointment = Appointment(
             patient_id=old_appointment.patient_id,
@@ -477,41 +457,20 @@ class AppointmentService:
         )
         self.session.add(new_appointment)
         await self.session.flush()
-        
-        # Handle Google Calendar
-        if CALENDAR_AVAILABLE and patient:
-            try:
-                calendar_service = get_calendar_service()
-                
-                # Delete old event if it exists (may not exist for cancelled appointments)
-                if old_calendar_event_id:
-                    deleted = calendar_service.delete_event(old_calendar_event_id)
-                    if deleted:
-                        logger.info(f"Deleted old calendar event {old_calendar_event_id}")
-                    else:
-                        logger.warning(f"Could not delete old calendar event {old_calendar_event_id}")
-                
-                # Always create new calendar event for rescheduled appointment
-                event_id = calendar_service.create_event(
-                    patient_name=patient.name,
-                    patient_email=patient.email,
-                    patient_phone=patient.phone,
-                    reason=old_appointment.reason,
-                    start_time=new_start_time,
-                    end_time=new_end_time,
-                    appointment_id=new_appointment.id
-                )
-                if event_id:
-                    new_appointment.google_calendar_event_id = event_id
-                    await self.session.flush()
-                    logger.info(f"Created calendar event {event_id} for {'reactivated' if was_cancelled else 'rescheduled'} appointment {new_appointment.id}")
-            except Exception as e:
-                logger.error(f"Failed to update calendar for reschedule: {e}")
-        
+
+        # The caller moves the Google Calendar event once this is committed
         action = "Reactivated and rescheduled" if was_cancelled else "Rescheduled"
         logger.info(f"{action} appointment {appointment_id} to new appointment {new_appointment.id}")
         return new_appointment
 
+    async def link_calendar_event(self, appointment_id: int, event_id: str) -> None:
+        """Record the Google Calendar event created for an appointment."""
+        await self.session.execute(
+            update(Appointment)
+            .where(Appointment.id == appointment_id)
+            .values(google_calendar_event_id=event_id)
+        )
+
     async def find_appointment(
         self,
         patient_name: str,
@@ -522,7 +481,7 @@ class AppointmentService:
         Find appointment by patient name and start time.
         
         Args:
-            patient_name: Name of the patient
+            patient_name: Name of the patient (case-insensitive, like the other name lookups)
             start_time: Start time of the appointment
             include_cancelled: If True, includes cancelled and rescheduled appointments in search
         
@@ -530,7 +489,7 @@ class AppointmentService:
             Appointment if found, None otherwise
         """
         conditions = [
-            Patient.name == patient_name,
+            func.lower(Patient.name) == patient_name.strip().lower(),
             Appointment.start_time == start_time,
         ]
         
@@ -585,6 +544,47 @@ class AppointmentService:
         result = await self.session.execute(stmt)
         return result.scalars().all()
 
+    async def get_appointments_for_patient_ids(
+        self,
+        patient_ids: list[int],
+        from_time: datetime,
+        include_cancelled: bool = False
+    ) -> list[Appointment]:
+        """
+        Get appointments for a set of patients by ID, with patients loaded.
+
+        Used by the caller-ID prefetch, which already knows the patient IDs
+        and so avoids the name join.
+
+        Args:
+            patient_ids: IDs of the patients
+            from_time: Only return appointments starting from this time
+            include_cancelled: If True, includes cancelled and rescheduled appointments
+
+        Returns:
+            List of appointments sorted by start time
+        """
+        if not patient_ids:
+            return []
+
+        conditions = [
+            Appointment.patient_id.in_(patient_ids),
+            Appointment.start_time >= from_time,
+        ]
+
+        if not include_cancelled:
+            conditions.append(Appointment.status == AppointmentStatus.CONFIRMED)
+
+        stmt = (
+            select(Appointment)
+            .options(selectinload(Appointment.patient))
+            .where(and_(*conditions))
+            .order_by(Appointment.start_time.asc())
+        )
+
+        result = await self.session.execute(stmt)
+        return list(result.scalars().all())
+
     async def get_upcoming_appointments_for_patient(
         self,
         patient_name: str,
@@ -5,9 +5,13 @@ import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from typing import Optional
+from telemetry.metrics import observe_external_call
 
 logger = logging.getLogger(__name__)
 
+# Socket timeout for the SMTP session (emails are sent after the write commits, outside any tool deadline)
+SMTP_TIMEOUT = float(os.getenv("SMTP_TIMEOUT", "10"))
+
 class EmailService:
     """Service for sending appointment-related emails."""
     
@@ -53,10 +57,11 @@ class EmailService:
             # Send via SMTP
             logger.info(f"📧 Sending email to {to_email}: {subject}")
             
-            with smtplib.SMTP(self.smtp_host, self.smtp_port, timeout=10) as server:
-                server.starttls()
-                server.login(self.smtp_user, self.smtp_password)
-                server.send_message(msg)
+            with observe_external_call("smtp", "send"):
+                with smtplib.SMTP(self.smtp_host, self.smtp_port, timeout=SMTP_TIMEOUT) as server:
+                    server.starttls()
+                    server.login(self.smtp_user, self.smtp_password)
+                    server.send_message(msg)
             
             logger.info(f"✅ Email sent successfully to {to_email}")
             return True
@@ -13,14 +13,19 @@ Features:
 import os
 import json
 import logging
+import threading
 from datetime import datetime, timedelta, timezone
 from typing import Optional, Dict, Any
 
 from google.oauth2 import service_account
+from google_auth_httplib2 import AuthorizedHttp
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
+import httplib2
 import pytz
 
+from telemetry.metrics import observe_external_call
+
 logger = logging.getLogger(__name__)
 
 # Timezone for Pakistan Standard Time
@@ -30,6 +35,9 @@ KARACHI_TZ = pytz.timezone(CLINIC_TIMEZONE)
 # Doctor's calendar (organizer with full access)
 DOCTOR_CALENDAR_ID = os.getenv("GOOGLE_CALENDAR_ID", "abdul.dev010@gmail.com")
 
+# Socket timeout for Calendar API requests (they run after the booking commits, outside any tool deadline)
+CALENDAR_HTTP_TIMEOUT = float(os.getenv("CALENDAR_HTTP_TIMEOUT", "10"))
+
 # Scopes needed for calendar operations
 SCOPES = [
     'https://www.googleapis.com/auth/calendar',
@@ -51,6 +59,9 @@ class GoogleCalendarService:
     
     def __init__(self):
         self.service = None
+        self._http: Optional[httplib2.Http] = None
+        # Requests run in worker threads; httplib2 connections are not thread-safe
+        self._lock = threading.Lock()
         self.calendar_id = DOCTOR_CALENDAR_ID
         self._initialized = False
         
@@ -90,6 +101,12 @@ class GoogleCalendarService:
         
         return credentials
     
+    def _execute(self, request, operation: str):
+        """Execute a Calendar API request, recording its latency."""
+        with self._lock:
+            with observe_external_call("calendar", operation):
+                return request.execute()
+
     def initialize(self) -> bool:
         """
         Initialize the Google Calendar service.
@@ -107,7 +124,8 @@ class GoogleCalendarService:
                 logger.warning("Google Calendar integration disabled - no credentials")
                 return False
             
-            self.service = build('calendar', 'v3', credentials=credentials)
+            self._http = httplib2.Http(timeout=CALENDAR_HTTP_TIMEOUT)
+            self.service = build('calendar', 'v3', http=AuthorizedHttp(credentials, http=self._http))
             self._initialized = True
             logger.info("Google Calendar service initialized successfully")
             return True
@@ -204,11 +222,11 @@ class GoogleCalendarService:
             }
             
             # Insert event (without sending updates since no attendees)
-            created_event = self.service.events().insert(
+            created_event = self._execute(self.service.events().insert(
                 calendarId=self.calendar_id,
                 body=event,
                 sendUpdates='none'  # No attendees to notify
-            ).execute()
+            ), "insert")
             
             event_id = created_event.get('id')
             event_link = created_event.get('htmlLink')
@@ -267,10 +285,10 @@ class GoogleCalendarService:
             
         try:
             # Get existing event first
-            existing_event = self.service.events().get(
+            existing_event = self._execute(self.service.events().get(
                 calendarId=self.calendar_id,
                 eventId=event_id
-            ).execute()
+            ), "get")
             
             # Update event details
             description = (
@@ -293,12 +311,12 @@ class GoogleCalendarService:
             existing_event['colorId'] = '5'  # Yellow for rescheduled
             
             # Update the event
-            updated_event = self.service.events().update(
+            updated_event = self._execute(self.service.events().update(
                 calendarId=self.calendar_id,
                 eventId=event_id,
                 body=existing_event,
                 sendUpdates='none'  # No attendees to notify
-            ).execute()
+            ), "update")
             
             logger.info(f"Updated calendar event {event_id} for appointment {appointment_id}")
             return True
@@ -333,11 +351,11 @@ class GoogleCalendarService:
             return False
             
         try:
-            self.service.events().delete(
+            self._execute(self.service.events().delete(
                 calendarId=self.calendar_id,
                 eventId=event_id,
                 sendUpdates='none'  # No attendees to notify
-            ).execute()
+            ), "delete")
             
             logger.info(f"Deleted calendar event {event_id}")
             return True
@@ -370,10 +388,10 @@ class GoogleCalendarService:
             return None
             
         try:
-            event = self.service.events().get(
+            event = self._execute(self.service.events().get(
                 calendarId=self.calendar_id,
                 eventId=event_id
-            ).execute()
+            ), "get")
             
             return event
             
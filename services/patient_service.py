@@ -1,7 +1,9 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, func, literal_column
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from models.patient import Patient
 from tools.schemas import BookAppointmentInput
+from utils.phone import normalize_phone
 import logging
 
 logger = logging.getLogger(__name__)
@@ -12,48 +14,89 @@ class PatientService:
     def __init__(self, session: AsyncSession):
         self.session = session
 
-    async def find_or_create_patient(self, input_data: BookAppointmentInput) -> Patient:
+    async def find_or_create_patient(
+        self,
+        input_data: BookAppointmentInput,
+        fuzzy_fallback: bool = False
+    ) -> Patient:
         """
         Find existing patient by email or create new one.
         Implements deduplication to prevent duplicate patient records.
-        Uses fuzzy matching as fallback for voice transcription errors.
+
+        The upsert runs first, so a known email - the common booking - is a
+        single statement. With fuzzy_fallback, an email it had to insert is
+        then checked against existing patients for voice transcription errors;
+        on a match the new row (not yet committed, so no one else has seen it)
+        is removed again and the existing patient is updated instead.
 
         Args:
             input_data: Booking input with patient details
+            fuzzy_fallback: Try fuzzy email matching when the email is new
 
         Returns:
             Patient: Existing or newly created patient
         """
-        # Try exact email match first
-        stmt = select(Patient).where(Patient.email == input_data.email.lower())
-        result = await self.session.execute(stmt)
-        patient = result.scalar_one_or_none()
-
-        # Try fuzzy email match if exact fails (handles voice transcription errors)
-        if not patient:
-            patient = await self.find_patient_by_email_fuzzy(input_data.email)
-
-        if patient:
+        patient, created = await self.upsert_patient(input_data)
+        if not created:
             logger.info(f"Found existing patient: {patient.email}")
-            # Update patient info if changed
-            patient.name = input_data.name
-            patient.phone = input_data.phone
-            if input_data.insurance:
-                patient.insurance_provider = input_data.insurance
-            await self.session.flush()
             return patient
 
-        # Create new patient
-        patient = Patient(
+        if fuzzy_fallback:
+            match = await self.find_patient_by_email_fuzzy(
+                patient.email, exact_first=False, exclude_id=patient.id
+            )
+            if match:
+                await self.session.delete(patient)
+                match.name = input_data.name
+                match.phone = input_data.phone
+                match.phone_e164 = normalize_phone(input_data.phone)
+                if input_data.insurance:
+                    match.insurance_provider = input_data.insurance
+                await self.session.flush()
+                logger.info(f"Found existing patient: {match.email}")
+                return match
+
+        logger.info(f"Created new patient: {patient.email} (ID: {patient.id})")
+        return patient
+
+    async def upsert_patient(self, input_data: BookAppointmentInput) -> tuple[Patient, bool]:
+        """
+        Insert or update a patient by email in one round trip.
+
+        Uses INSERT ... ON CONFLICT (email) DO UPDATE ... RETURNING. An existing
+        patient gets the new name/phone; insurance is only overwritten when
+        one was given.
+
+        Args:
+            input_data: Booking input with patient details
+
+        Returns:
+            (patient, created) where created is True if a new row was inserted
+        """
+        stmt = pg_insert(Patient).values(
             name=input_data.name,
             email=input_data.email.lower(),
             phone=input_data.phone,
+            phone_e164=normalize_phone(input_data.phone),
             insurance_provider=input_data.insurance if input_data.insurance else None
         )
-        self.session.add(patient)
-        await self.session.flush()  # Get patient.id before commit
-        logger.info(f"Created new patient: {patient.email} (ID: {patient.id})")
-        return patient
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Patient.email],
+            set_={
+                "name": stmt.excluded.name,
+                "phone": stmt.excluded.phone,
+                "phone_e164": stmt.excluded.phone_e164,
+                "insurance_provider": func.coalesce(stmt.excluded.insurance_provider, Patient.insurance_provider),
+                "updated_at": func.now(),
+            },
+        ).returning(
+            Patient,
+            # xmax is 0 only for a freshly inserted row version
+            literal_column("(xmax = 0)").label("created"),
+        )
+        result = await self.session.execute(stmt, execution_options={"populate_existing": True})
+        patient, created = result.one()
+        return patient, bool(created)
 
     async def get_patient_by_email(self, email: str) -> Patient | None:
         """Get patient by email address."""
@@ -61,16 +104,25 @@ class PatientService:
         result = await self.session.execute(stmt)
         return result.scalar_one_or_none()
 
-    async def find_patient_by_email_fuzzy(self, email: str, threshold: float = 0.85) -> Patient | None:
+    async def find_patient_by_email_fuzzy(
+        self,
+        email: str,
+        threshold: float = 0.85,
+        exact_first: bool = True,
+        exclude_id: int | None = None
+    ) -> Patient | None:
         """
         Find patient with fuzzy email matching for voice transcription errors.
 
         Uses Levenshtein distance to find similar emails when exact match fails.
         This helps prevent duplicate patient creation due to voice transcription errors.
+        The scan reads only (id, email) and loads the full row for the best match.
 
         Args:
             email: Email address to search for
             threshold: Minimum similarity score (0-1) to consider a match (default 0.85 = 85%)
+            exact_first: Try an exact match before scanning (skip if the caller already did)
+            exclude_id: Patient ID to ignore (e.g. a row just inserted for this email)
 
         Returns:
             Patient if fuzzy match found, None otherwise
@@ -78,23 +130,27 @@ class PatientService:
         from difflib import SequenceMatcher
 
         # Try exact match first
-        exact_patient = await self.get_patient_by_email(email)
-        if exact_patient:
-            return exact_patient
+        if exact_first:
+            exact_patient = await self.get_patient_by_email(email)
+            if exact_patient:
+                return exact_patient
 
         # Fuzzy match if exact fails
-        stmt = select(Patient)
+        stmt = select(Patient.id, Patient.email)
+        if exclude_id is not None:
+            stmt = stmt.where(Patient.id != exclude_id)
         result = await self.session.execute(stmt)
-        all_patients = result.scalars().all()
 
-        best_match = None
+        best_id = None
         best_score = 0
 
-        for patient in all_patients:
-            score = SequenceMatcher(None, email.lower(), patient.email.lower()).ratio()
+        for patient_id, patient_email in result.all():
+            score = SequenceMatcher(None, email.lower(), patient_email.lower()).ratio()
             if score > best_score and score >= threshold:
                 best_score = score
-                best_match = patient
+                best_id = patient_id
+
+        best_match = await self.session.get(Patient, best_id) if best_id is not None else None
 
         if best_match:
             logger.warning(
@@ -109,7 +165,29 @@ class PatientService:
         return best_match
 
     async def get_patient_by_phone(self, phone: str) -> Patient | None:
-        """Get patient by phone number."""
-        stmt = select(Patient).where(Patient.phone == phone)
+        """
+        Get patient by phone number in any spoken or written format.
+
+        The number is normalized to E.164 and matched against the indexed
+        phone_e164 column. If several patients share the number, the
+        earliest-created one is returned.
+        """
+        normalized = normalize_phone(phone)
+        if not normalized:
+            return None
+        stmt = select(Patient).where(Patient.phone_e164 == normalized).order_by(Patient.id).limit(1)
         result = await self.session.execute(stmt)
         return result.scalar_one_or_none()
+
+    async def get_patients_by_phone(self, phone: str) -> list[Patient]:
+        """
+        Get all patients sharing a phone number (e.g. family members).
+
+        Single index probe on phone_e164 regardless of how the number was spoken.
+        """
+        normalized = normalize_phone(phone)
+        if not normalized:
+            return []
+        stmt = select(Patient).where(Patient.phone_e164 == normalized).order_by(Patient.id)
+        result = await self.session.execute(stmt)
+        return list(result.scalars().all())
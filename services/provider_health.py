@@ -0,0 +1,187 @@
+"""
+TTS provider health, probed off the call path.
+
+The worker's main process runs ProviderHealthMonitor on a background thread.
+Every PROVIDER_HEALTH_INTERVAL seconds it makes one cheap authenticated
+request per configured provider (voice or project metadata - no audio is
+synthesized) and writes the results to PROVIDER_HEALTH_FILE, replacing the
+file atomically.
+
+Job processes never probe. TTS selection in agent.py (prewarm and call start) asks
+is_provider_healthy(), which reads the shared file (re-parsed only when its
+mtime changes) and so costs no network I/O. A result older than three probe
+intervals means the monitor is not running; it is ignored and the provider
+is treated as healthy, as are providers that were never probed.
+"""
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, asdict
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Seconds between probe rounds
+PROVIDER_HEALTH_INTERVAL = float(os.getenv("PROVIDER_HEALTH_INTERVAL", "60"))
+# Status file shared between the worker process (writer) and job processes (readers)
+PROVIDER_HEALTH_FILE = os.getenv(
+    "PROVIDER_HEALTH_FILE", os.path.join(tempfile.gettempdir(), "hexaa_provider_health.json")
+)
+PROBE_TIMEOUT = 5.0
+
+
+@dataclass
+class ProviderStatus:
+    """Last probe result for one TTS provider."""
+    healthy: bool
+    detail: str
+    latency_ms: float
+    checked_at: float
+
+
+def _probe_elevenlabs(client) -> Optional[str]:
+    """Voice metadata lookup: validates key and voice without synthesizing audio."""
+    key = os.getenv("ELEVEN_LABS")
+    voice_id = os.getenv("ELEVEN_VOICE_ID", "O4cGUVdAocn0z4EpQ9yF")
+    resp = client.get(f"https://api.elevenlabs.io/v1/voices/{voice_id}", headers={"xi-api-key": key})
+    return None if resp.status_code == 200 else f"status-{resp.status_code}"
+
+
+def _probe_deepgram(client) -> Optional[str]:
+    key = os.getenv("DEEPGRAM_API_KEY")
+    resp = client.get("https://api.deepgram.com/v1/projects", headers={"Authorization": f"Token {key}"})
+    return None if resp.status_code == 200 else f"status-{resp.status_code}"
+
+
+def _probe_cartesia(client) -> Optional[str]:
+    key = os.getenv("CARTESIA_API_KEY")
+    resp = client.get(
+        "https://api.cartesia.ai/voices",
+        headers={"X-API-Key": key, "Cartesia-Version": "2024-06-10"},
+    )
+    return None if resp.status_code == 200 else f"status-{resp.status_code}"
+
+
+# provider -> (env var holding the API key, probe)
+PROBES: dict[str, tuple[str, Callable]] = {
+    "elevenlabs": ("ELEVEN_LABS", _probe_elevenlabs),
+    "deepgram": ("DEEPGRAM_API_KEY", _probe_deepgram),
+    "cartesia": ("CARTESIA_API_KEY", _probe_cartesia),
+}
+
+
+class ProviderHealthMonitor:
+    """
+    Probes TTS providers on a background thread and publishes the results.
+
+    Runs in the worker's main process. Results are written atomically to
+    PROVIDER_HEALTH_FILE so job processes can read them without any network I/O.
+    """
+
+    def __init__(self, interval: float = PROVIDER_HEALTH_INTERVAL, status_file: str = PROVIDER_HEALTH_FILE):
+        self.interval = interval
+        self.status_file = status_file
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, daemon=True, name="provider-health")
+        self._thread.start()
+        logger.info(f"🩺 Provider health monitor started (every {self.interval:.0f}s -> {self.status_file})")
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.probe_all()
+            except Exception as e:
+                logger.error(f"❌ Provider health probe round failed: {e}")
+            self._stop.wait(self.interval)
+
+    def probe_all(self) -> dict[str, ProviderStatus]:
+        """Probe every configured provider once and publish the results."""
+        import httpx
+
+        statuses = {}
+        with httpx.Client(timeout=PROBE_TIMEOUT) as client:
+            for name, (key_env, probe) in PROBES.items():
+                if not os.getenv(key_env):
+                    continue
+                if name == "elevenlabs" and os.getenv("ELEVEN_HEALTHCHECK", "1") == "0":
+                    continue
+                start = time.time()
+                try:
+                    error = probe(client)
+                except Exception as e:
+                    error = f"request-error:{type(e).__name__}"
+                latency_ms = (time.time() - start) * 1000
+                statuses[name] = ProviderStatus(
+                    healthy=error is None,
+                    detail=error or "ok",
+                    latency_ms=latency_ms,
+                    checked_at=time.time(),
+                )
+                if error:
+                    logger.warning(f"🩺 {name} probe failed: {error} ({latency_ms:.0f}ms)")
+
+        self._publish(statuses)
+        return statuses
+
+    def _publish(self, statuses: dict[str, ProviderStatus]) -> None:
+        payload = {name: asdict(status) for name, status in statuses.items()}
+        directory = os.path.dirname(self.status_file) or "."
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".provider_health")
+        with os.fdopen(fd, "w") as f:
+            json.dump(payload, f)
+        os.replace(tmp_path, self.status_file)
+
+
+_monitor: Optional[ProviderHealthMonitor] = None
+_cache: tuple[float, dict[str, ProviderStatus]] = (0.0, {})
+
+
+def start_provider_health_monitor() -> ProviderHealthMonitor:
+    """Start the background monitor (worker main process only)."""
+    global _monitor
+    if _monitor is None:
+        _monitor = ProviderHealthMonitor()
+        _monitor.start()
+    return _monitor
+
+
+def get_provider_statuses() -> dict[str, ProviderStatus]:
+    """Published statuses, re-read only when the status file changes."""
+    global _cache
+    try:
+        mtime = os.stat(PROVIDER_HEALTH_FILE).st_mtime
+    except OSError:
+        return {}
+    if mtime != _cache[0]:
+        try:
+            with open(PROVIDER_HEALTH_FILE) as f:
+                data = json.load(f)
+            _cache = (mtime, {name: ProviderStatus(**s) for name, s in data.items()})
+        except (OSError, ValueError, TypeError) as e:
+            logger.debug(f"Could not read provider health file: {e}")
+            return _cache[1]
+    return _cache[1]
+
+
+def is_provider_healthy(name: str) -> bool:
+    """
+    Cached health of a provider; never does network I/O.
+
+    Providers that have not been probed, or whose last probe is stale
+    (monitor not running), are assumed healthy.
+    """
+    status = get_provider_statuses().get(name)
+    if status is None or time.time() - status.checked_at > 3 * PROVIDER_HEALTH_INTERVAL:
+        return True
+    return status.healthy
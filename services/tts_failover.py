@@ -0,0 +1,157 @@
+import asyncio
+import logging
+import os
+from collections import deque
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Optional
+
+from livekit.agents import tts as lk_tts
+from livekit.agents.metrics import TTSMetrics
+from livekit.agents.tts.fallback_adapter import AvailabilityChangedEvent
+
+from telemetry.stats import percentile
+
+logger = logging.getLogger(__name__)
+
+# Demote a provider when its p95 time-to-first-audio crosses this
+TTS_P95_THRESHOLD_MS = float(os.getenv("TTS_P95_THRESHOLD_MS", "1000"))
+# Rolling window of time-to-first-audio samples kept per provider
+TTS_LATENCY_WINDOW = int(os.getenv("TTS_LATENCY_WINDOW", "20"))
+# Samples needed before a provider can be judged
+TTS_LATENCY_MIN_SAMPLES = int(os.getenv("TTS_LATENCY_MIN_SAMPLES", "5"))
+# Seconds a demoted provider sits out before it gets another chance
+TTS_DEMOTION_COOLDOWN = float(os.getenv("TTS_DEMOTION_COOLDOWN", "60"))
+
+
+@dataclass
+class ProviderLatency:
+    """Rolling time-to-first-audio samples (ms) for one provider."""
+    name: str
+    samples: deque = field(default_factory=deque)
+    demotions: int = 0
+    # Set when re-enabled after a cool-down; one slow sample demotes it again
+    on_probation: bool = False
+
+    def p95_ms(self) -> Optional[float]:
+        return percentile(list(self.samples), 95)
+
+    def p50_ms(self) -> Optional[float]:
+        return percentile(list(self.samples), 50)
+
+
+class LatencyAwareTTS(lk_tts.FallbackAdapter):
+    """
+    TTS FallbackAdapter that also fails over on latency, not only on errors.
+
+    Every wrapped provider reports time-to-first-audio (TTSMetrics.ttfb). When
+    a provider's p95 over the rolling window crosses the threshold, it is marked
+    unavailable and the adapter moves to the next provider for the following
+    utterances of the same call. After a cool-down the provider is re-enabled
+    on probation: its window is cleared and a single slow sample demotes it again.
+    The last available provider is never demoted for latency.
+    """
+
+    def __init__(
+        self,
+        providers: dict[str, lk_tts.TTS],
+        *,
+        p95_threshold_ms: float = TTS_P95_THRESHOLD_MS,
+        window: int = TTS_LATENCY_WINDOW,
+        min_samples: int = TTS_LATENCY_MIN_SAMPLES,
+        cooldown: float = TTS_DEMOTION_COOLDOWN,
+        **kwargs,
+    ) -> None:
+        """
+        Args:
+            providers: TTS instances by provider name, in preference order
+            p95_threshold_ms: p95 time-to-first-audio that triggers a switch
+            window: Samples kept per provider
+            min_samples: Samples required before judging a provider
+            cooldown: Seconds before a demoted provider is tried again
+            **kwargs: Passed to FallbackAdapter (max_retry_per_tts, sample_rate)
+        """
+        super().__init__(list(providers.values()), **kwargs)
+        self.p95_threshold_ms = p95_threshold_ms
+        self.min_samples = min_samples
+        self.cooldown = cooldown
+        self._latency = [ProviderLatency(name, deque(maxlen=window)) for name in providers]
+        for index, instance in enumerate(self._tts_instances):
+            instance.on("metrics_collected", partial(self._record_latency, index))
+
+    @property
+    def model(self) -> str:
+        return "LatencyAwareTTS"
+
+    def prewarm(self) -> None:
+        # Any provider may take over mid-call; keep all of their connections warm
+        for instance in self._tts_instances:
+            instance.prewarm()
+
+    @property
+    def active_provider(self) -> str:
+        """Provider that will serve the next utterance."""
+        for latency, status in zip(self._latency, self._status):
+            if status.available:
+                return latency.name
+        return self._latency[0].name
+
+    def latency_stats(self) -> dict[str, dict]:
+        """Per-provider time-to-first-audio stats over the rolling window."""
+        return {
+            latency.name: {
+                "samples": len(latency.samples),
+                "p50_ms": latency.p50_ms(),
+                "p95_ms": latency.p95_ms(),
+                "available": status.available,
+                "demotions": latency.demotions,
+            }
+            for latency, status in zip(self._latency, self._status)
+        }
+
+    def _record_latency(self, index: int, metrics) -> None:
+        if not isinstance(metrics, TTSMetrics) or metrics.ttfb < 0:
+            return
+        latency = self._latency[index]
+        latency.samples.append(metrics.ttfb * 1000)
+        if len(latency.samples) < (1 if latency.on_probation else self.min_samples):
+            return
+
+        p95 = latency.p95_ms()
+        status = self._status[index]
+        if p95 <= self.p95_threshold_ms or not status.available:
+            if len(latency.samples) >= self.min_samples:
+                latency.on_probation = False
+            return
+        if not any(s.available for i, s in enumerate(self._status) if i != index):
+            logger.warning(f"🐢 {latency.name} TTS p95 {p95:.0f}ms over threshold but no other provider is available")
+            return
+        self._demote(index, p95)
+
+    def _demote(self, index: int, p95: float) -> None:
+        latency = self._latency[index]
+        status = self._status[index]
+        instance = self._tts_instances[index]
+
+        status.available = False
+        latency.demotions += 1
+        self.emit("tts_availability_changed", AvailabilityChangedEvent(tts=instance, available=False))
+        logger.warning(
+            f"🐢 {latency.name} TTS p95 time-to-first-audio {p95:.0f}ms > {self.p95_threshold_ms:.0f}ms - "
+            f"switching to {self.active_provider} for {self.cooldown:.0f}s"
+        )
+        # Occupying recovering_task also keeps the adapter from running its
+        # error-recovery synthesis against a provider that is merely slow.
+        status.recovering_task = asyncio.create_task(self._probation_after_cooldown(index))
+
+    async def _probation_after_cooldown(self, index: int) -> None:
+        await asyncio.sleep(self.cooldown)
+        latency = self._latency[index]
+        latency.samples.clear()
+        latency.on_probation = True
+        self._status[index].available = True
+        self.emit(
+            "tts_availability_changed",
+            AvailabilityChangedEvent(tts=self._tts_instances[index], available=True),
+        )
+        logger.info(f"🔁 {latency.name} TTS back on probation after {self.cooldown:.0f}s cool-down")
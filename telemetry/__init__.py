@@ -0,0 +1,24 @@
+"""
+Latency and performance instrumentation for the voice agent.
+
+Importing the package (or telemetry.metrics, which services and tools use)
+has no side effects and does not pull in livekit; entrypoints that serve
+/metrics call setup_multiprocess_dir() first.
+"""
+import os
+import tempfile
+
+
+def setup_multiprocess_dir() -> str:
+    """
+    Put prometheus_client in multiprocess mode and return PROMETHEUS_MULTIPROC_DIR.
+
+    prometheus_client picks single- vs multi-process mode when it is first
+    imported, and livekit imports it too - so this must run before livekit or
+    telemetry.metrics is imported. Uses a new temp dir unless the variable is
+    already set; job processes inherit it, so they reuse the worker's.
+    """
+    if not os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        os.environ["PROMETHEUS_MULTIPROC_DIR"] = tempfile.mkdtemp(prefix="hexaa_prometheus_")
+    os.makedirs(os.environ["PROMETHEUS_MULTIPROC_DIR"], exist_ok=True)
+    return os.environ["PROMETHEUS_MULTIPROC_DIR"]
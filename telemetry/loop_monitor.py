@@ -0,0 +1,144 @@
+"""
+Event-loop blocking detector (opt-in with LOOP_MONITOR=1).
+
+A heartbeat task sleeps for a short interval and measures how late it wakes
+up; that scheduling delay is the time the loop spent running something else
+without yielding. A watchdog thread checks the heartbeat and, once the loop
+has been stuck past the threshold, captures the loop thread's stack while it
+is still blocked - so the report names the synchronous call (smtplib,
+googleapiclient .execute(), file I/O) rather than whatever ran afterwards.
+
+Offenders are keyed by the innermost frame in this repository and reported
+per call in the logs and in the agent_loop_blocks_total metric.
+"""
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from dataclasses import dataclass
+from typing import Optional
+
+from .metrics import record_loop_block, record_loop_lag
+
+logger = logging.getLogger(__name__)
+
+LOOP_MONITOR = os.getenv("LOOP_MONITOR", "0") == "1"
+# Scheduling delay that counts as a block
+LOOP_LAG_THRESHOLD_MS = float(os.getenv("LOOP_LAG_THRESHOLD_MS", "100"))
+# Heartbeat period; also how often the watchdog looks at the loop
+LOOP_MONITOR_INTERVAL = float(os.getenv("LOOP_MONITOR_INTERVAL", "0.05"))
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STACK_LIMIT = 12
+
+
+@dataclass
+class BlockSite:
+    """Blocking calls attributed to one source location."""
+    site: str
+    count: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    stack: str = ""
+
+
+def _site_of(stack: traceback.StackSummary) -> str:
+    """Innermost frame in this repository (skipping the venv); falls back to the innermost frame."""
+    for frame in reversed(stack):
+        path = os.path.abspath(frame.filename)
+        if path.startswith(PROJECT_ROOT) and "site-packages" not in path:
+            return f"{os.path.relpath(path, PROJECT_ROOT)}:{frame.lineno} in {frame.name}"
+    if stack:
+        frame = stack[-1]
+        return f"{os.path.basename(frame.filename)}:{frame.lineno} in {frame.name}"
+    return "unknown"
+
+
+class LoopLagMonitor:
+    """Measures event-loop lag for one call and records what blocked the loop."""
+
+    def __init__(self, threshold_ms: float = LOOP_LAG_THRESHOLD_MS, interval: float = LOOP_MONITOR_INTERVAL):
+        self.threshold = threshold_ms / 1000
+        self.interval = interval
+        self.sites: dict[str, BlockSite] = {}
+        self.max_lag_ms = 0.0
+        self.samples = 0
+        self._last_tick = 0.0
+        self._loop_thread_id: Optional[int] = None
+        self._captured: Optional[traceback.StackSummary] = None
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def start(self) -> None:
+        """Start monitoring the running loop (call from the loop thread)."""
+        if self._task is not None:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._last_tick = time.perf_counter()
+        self._task = asyncio.get_running_loop().create_task(self._heartbeat(), name="loop-lag-heartbeat")
+        self._thread = threading.Thread(target=self._watch, daemon=True, name="loop-lag-watchdog")
+        self._thread.start()
+        logger.info(f"🩻 Loop lag monitor on (threshold {self.threshold*1000:.0f}ms)")
+
+    async def _heartbeat(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            now = time.perf_counter()
+            lag = max(0.0, now - self._last_tick - self.interval)
+            self._last_tick = now
+            self.samples += 1
+            self.max_lag_ms = max(self.max_lag_ms, lag * 1000)
+            record_loop_lag(lag)
+            if lag >= self.threshold:
+                self._record_block(lag)
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.interval):
+            stalled = time.perf_counter() - self._last_tick - self.interval
+            if stalled < self.threshold or self._captured is not None:
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is not None:
+                self._captured = traceback.extract_stack(frame)
+
+    def _record_block(self, lag: float) -> None:
+        stack, self._captured = self._captured, None
+        site = _site_of(stack) if stack else "unknown (block ended before capture)"
+        lag_ms = lag * 1000
+        entry = self.sites.get(site)
+        first = entry is None
+        if first:
+            entry = self.sites[site] = BlockSite(site)
+        entry.count += 1
+        entry.total_ms += lag_ms
+        if lag_ms >= entry.max_ms:
+            entry.max_ms = lag_ms
+            if stack:
+                entry.stack = "".join(traceback.format_list(stack[-STACK_LIMIT:]))
+        record_loop_block(site, lag)
+        if first and entry.stack:
+            logger.warning(f"🧊 Event loop blocked {lag_ms:.0f}ms at {site}\n{entry.stack}")
+        else:
+            logger.warning(f"🧊 Event loop blocked {lag_ms:.0f}ms at {site}")
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+
+    async def log_summary(self) -> None:
+        """Job shutdown callback: stop and log the call's blocking offenders, worst first."""
+        self.stop()
+        if not self.sites:
+            logger.info(f"🩻 Loop lag: no blocks over {self.threshold*1000:.0f}ms (max {self.max_lag_ms:.0f}ms)")
+            return
+        lines = [f"🩻 Loop blocking offenders this call (max lag {self.max_lag_ms:.0f}ms):"]
+        for entry in sorted(self.sites.values(), key=lambda e: e.total_ms, reverse=True):
+            lines.append(
+                f"   {entry.site}: {entry.count}x, total {entry.total_ms:.0f}ms, max {entry.max_ms:.0f}ms"
+            )
+        logger.warning("\n".join(lines))
@@ -0,0 +1,206 @@
+"""
+Prometheus metrics for the voice agent.
+
+LiveKit runs every call in its own job process, so metrics use
+prometheus_client's multiprocess mode: each process writes samples to
+PROMETHEUS_MULTIPROC_DIR and the health server's /metrics endpoint (in the
+worker's main process) aggregates them. The agent sets PROMETHEUS_MULTIPROC_DIR
+(telemetry.setup_multiprocess_dir) before prometheus_client is imported; job
+processes inherit it. Anywhere else (scripts, migrations) metrics stay in
+process memory.
+"""
+import logging
+import os
+import re
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+from .tracing import set_span_attribute, traced
+
+try:
+    from prometheus_client import (
+        CONTENT_TYPE_LATEST,
+        CollectorRegistry,
+        Counter,
+        Gauge,
+        Histogram,
+        generate_latest,
+        multiprocess,
+    )
+    PROMETHEUS_AVAILABLE = True
+except ImportError:
+    PROMETHEUS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+if PROMETHEUS_AVAILABLE:
+    TOOL_DISPATCH_SECONDS = Histogram(
+        "agent_tool_dispatch_seconds",
+        "ToolRouter.dispatch latency",
+        ["tool", "outcome"],
+        buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+    )
+    DB_POOL_CHECKOUT_SECONDS = Histogram(
+        "agent_db_pool_checkout_seconds",
+        "Time waiting for a pooled DB connection (includes opening a new one)",
+        buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5, 30),
+    )
+    DB_POOL_IN_USE = Gauge(
+        "agent_db_pool_connections_in_use",
+        "DB connections checked out of the pool",
+        multiprocess_mode="livesum",
+    )
+    CACHE_REQUESTS = Counter(
+        "agent_cache_requests_total",
+        "Cache lookups by cache and result (hit/miss)",
+        ["cache", "result"],
+    )
+    TOOL_COALESCED = Counter(
+        "agent_tool_coalesced_total",
+        "Tool dispatches that joined an identical in-flight dispatch instead of running the handler",
+        ["tool"],
+    )
+    EXTERNAL_CALL_SECONDS = Histogram(
+        "agent_external_call_seconds",
+        "Latency of blocking external calls (SMTP, Google Calendar)",
+        ["service", "operation", "outcome"],
+        buckets=(0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 30),
+    )
+    ACTIVE_CALLS = Gauge(
+        "agent_active_calls",
+        "Calls in progress on this worker",
+        multiprocess_mode="livesum",
+    )
+    TURN_STAGE_SECONDS = Histogram(
+        "agent_turn_stage_seconds",
+        "Per-turn latency by stage (first_audio is end of speech to agent audio)",
+        ["stage"],
+        buckets=(0.05, 0.1, 0.2, 0.3, 0.4, 0.5, 0.75, 1, 1.5, 2, 3, 5, 10),
+    )
+    LOOP_LAG_SECONDS = Histogram(
+        "agent_event_loop_lag_seconds",
+        "Event-loop scheduling delay measured by the loop monitor",
+        buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+    )
+    LOOP_BLOCKS = Counter(
+        "agent_loop_blocks_total",
+        "Event-loop blocks over the threshold by blocking source location",
+        ["site"],
+    )
+
+
+def record_tool_dispatch(name: str, duration: float, error: Optional[BaseException]) -> None:
+    """ToolRouter dispatch observer."""
+    if PROMETHEUS_AVAILABLE:
+        TOOL_DISPATCH_SECONDS.labels(tool=name, outcome="ok" if error is None else "error").observe(duration)
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    set_span_attribute(f"cache.{cache}", "hit" if hit else "miss")
+    if PROMETHEUS_AVAILABLE:
+        CACHE_REQUESTS.labels(cache=cache, result="hit" if hit else "miss").inc()
+
+
+def record_coalesced(tool: str) -> None:
+    set_span_attribute("tool.coalesced", True)
+    if PROMETHEUS_AVAILABLE:
+        TOOL_COALESCED.labels(tool=tool).inc()
+
+
+@contextmanager
+def observe_external_call(service: str, operation: str):
+    """
+    Time a blocking external call and trace it as a child span.
+
+    Exceptions are recorded as outcome=error and re-raised.
+    """
+    start = time.perf_counter()
+    outcome = "ok"
+    try:
+        with traced(f"{service}.{operation}", {"peer.service": service}):
+            yield
+    except BaseException:
+        outcome = "error"
+        raise
+    finally:
+        if PROMETHEUS_AVAILABLE:
+            EXTERNAL_CALL_SECONDS.labels(service=service, operation=operation, outcome=outcome).observe(
+                time.perf_counter() - start
+            )
+
+
+def record_turn(turn) -> None:
+    """TurnTimelineRecorder listener: export stage durations of a completed turn."""
+    if not PROMETHEUS_AVAILABLE or turn.interrupted:
+        return
+    for stage, ms in turn.stages().items():
+        TURN_STAGE_SECONDS.labels(stage=stage).observe(ms / 1000)
+
+
+def record_loop_lag(lag: float) -> None:
+    if PROMETHEUS_AVAILABLE:
+        LOOP_LAG_SECONDS.observe(lag)
+
+
+def record_loop_block(site: str, lag: float) -> None:
+    if PROMETHEUS_AVAILABLE:
+        LOOP_BLOCKS.labels(site=site).inc()
+
+
+def call_started() -> None:
+    if PROMETHEUS_AVAILABLE:
+        ACTIVE_CALLS.inc()
+
+
+async def call_ended() -> None:
+    """Job shutdown callback."""
+    if PROMETHEUS_AVAILABLE:
+        ACTIVE_CALLS.dec()
+
+
+def instrument_engine(engine) -> None:
+    """Export pool checkout wait and in-use connections for a SQLAlchemy engine."""
+    if not PROMETHEUS_AVAILABLE:
+        return
+    from sqlalchemy import event
+    import database
+
+    pool = engine.sync_engine.pool
+    # checkin fires before the connection is back in the pool, so count
+    # events instead of reading pool.checkedout()
+    event.listen(pool, "checkout", lambda *_: DB_POOL_IN_USE.inc())
+    event.listen(pool, "checkin", lambda *_: DB_POOL_IN_USE.dec())
+    database.pool_checkout_observers.append(DB_POOL_CHECKOUT_SECONDS.observe)
+
+
+_LIVE_GAUGE_FILE = re.compile(r"^gauge_live\w*_(\d+)\.db$")
+
+
+def _mark_dead_processes(path: str) -> None:
+    """Drop live gauges (active calls, pool in use) left behind by finished job processes."""
+    for filename in os.listdir(path):
+        match = _LIVE_GAUGE_FILE.match(filename)
+        if not match:
+            continue
+        pid = int(match.group(1))
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            multiprocess.mark_process_dead(pid, path)
+        except PermissionError:
+            pass
+
+
+def metrics_response() -> tuple[bytes, str]:
+    """Aggregated metrics from all worker processes, as (body, content_type)."""
+    if not PROMETHEUS_AVAILABLE:
+        return b"# prometheus_client not installed\n", "text/plain"
+    path = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if not path:
+        # Single process: this process's own registry
+        return generate_latest(), CONTENT_TYPE_LATEST
+    _mark_dead_processes(path)
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry, path=path)
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,12 @@
+"""Small statistics helpers shared by the telemetry, TTS failover and benchmarks (no livekit imports)."""
+import math
+from typing import Optional
+
+
+def percentile(values: list[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile (None for no values)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
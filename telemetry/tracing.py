@@ -0,0 +1,189 @@
+"""
+OpenTelemetry tracing for calls.
+
+Each call is a root span ("call"). ToolRouter dispatches are child spans, and
+the SQL statements, Google Calendar requests and SMTP sends made while a tool
+runs nest under its dispatch span. livekit-agents' own spans (agent turns,
+LLM and TTS requests) go to the same provider, so a slow turn can be followed
+down to the query or API call that caused it.
+
+The exporter is chosen with OTEL_TRACES_EXPORTER (comma-separated to combine):
+- none: tracing off (default)
+- console: spans printed to stdout
+- file: one JSON span per line appended to OTEL_TRACES_FILE, for offline analysis
+- otlp: OTLP exporter configured by the standard OTEL_EXPORTER_OTLP_* variables
+  (OTEL_EXPORTER_OTLP_PROTOCOL=grpc for gRPC, HTTP otherwise)
+"""
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from typing import Optional
+
+from opentelemetry import context as otel_context
+from opentelemetry import trace
+from opentelemetry.trace import Status, StatusCode
+
+try:
+    from opentelemetry.sdk.resources import SERVICE_NAME, Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import (
+        BatchSpanProcessor,
+        ConsoleSpanExporter,
+        SpanExporter,
+        SpanExportResult,
+    )
+    OTEL_SDK_AVAILABLE = True
+except ImportError:
+    OTEL_SDK_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+OTEL_TRACES_EXPORTER = os.getenv("OTEL_TRACES_EXPORTER", "none")
+OTEL_TRACES_FILE = os.getenv("OTEL_TRACES_FILE", "traces.jsonl")
+OTEL_SERVICE_NAME = os.getenv("OTEL_SERVICE_NAME", "hexaa-voice-agent")
+# SQL text is cut to this many characters on db spans
+MAX_STATEMENT_LENGTH = 2000
+
+tracer = trace.get_tracer("hexaa.agent")
+
+_provider = None
+
+
+if OTEL_SDK_AVAILABLE:
+    class JsonLinesSpanExporter(SpanExporter):
+        """Append finished spans to a file, one JSON object per line."""
+
+        def __init__(self, path: str):
+            self.path = path
+            self._lock = threading.Lock()
+
+        def export(self, spans) -> "SpanExportResult":
+            lines = [span.to_json(indent=None) for span in spans]
+            with self._lock, open(self.path, "a") as f:
+                for line in lines:
+                    f.write(line + "\n")
+            return SpanExportResult.SUCCESS
+
+
+def _build_exporter(name: str):
+    if name == "console":
+        return ConsoleSpanExporter()
+    if name == "file":
+        return JsonLinesSpanExporter(OTEL_TRACES_FILE)
+    if name == "otlp":
+        if os.getenv("OTEL_EXPORTER_OTLP_PROTOCOL", "http/protobuf") == "grpc":
+            from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
+        else:
+            from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        return OTLPSpanExporter()
+    raise ValueError(f"Unknown OTEL_TRACES_EXPORTER: {name}")
+
+
+def setup_tracing() -> bool:
+    """
+    Install the tracer provider for this process (idempotent).
+
+    Called in every job process; livekit-agents flushes and shuts the provider
+    down when the job ends. Returns True if tracing is enabled.
+    """
+    global _provider
+    if _provider is not None:
+        return True
+    exporters = [e.strip() for e in OTEL_TRACES_EXPORTER.split(",") if e.strip() and e.strip() != "none"]
+    if not exporters:
+        return False
+    if not OTEL_SDK_AVAILABLE:
+        logger.warning("⚠️  OTEL_TRACES_EXPORTER is set but opentelemetry-sdk is not installed - tracing disabled")
+        return False
+
+    provider = TracerProvider(resource=Resource.create({SERVICE_NAME: OTEL_SERVICE_NAME}))
+    for name in exporters:
+        try:
+            provider.add_span_processor(BatchSpanProcessor(_build_exporter(name)))
+        except Exception as e:
+            logger.error(f"❌ Trace exporter '{name}' not configured: {e}")
+    trace.set_tracer_provider(provider)
+
+    from livekit.agents.telemetry import set_tracer_provider
+    set_tracer_provider(provider)
+
+    _provider = provider
+    logger.info(f"🔭 Tracing enabled ({', '.join(exporters)})")
+    return True
+
+
+def start_call_span(**attributes) -> trace.Span:
+    """
+    Start the root span for a call and make it current.
+
+    Must be called from the job entrypoint before any call tasks are created,
+    so tool calls, the prefetch and the agent session inherit it.
+    """
+    span = tracer.start_span("call", context=otel_context.Context(), attributes=attributes)
+    otel_context.attach(trace.set_span_in_context(span))
+    return span
+
+
+async def end_call_span(span: trace.Span) -> None:
+    """Job shutdown callback: close the call span."""
+    span.end()
+
+
+@contextmanager
+def traced(name: str, attributes: Optional[dict] = None):
+    """Child span of the current span; exceptions are recorded and re-raised."""
+    with tracer.start_as_current_span(name, attributes=attributes) as span:
+        yield span
+
+
+def set_span_attribute(key: str, value) -> None:
+    """Annotate the current span (no-op when tracing is off)."""
+    span = trace.get_current_span()
+    if span.is_recording():
+        span.set_attribute(key, value)
+
+
+def trace_engine(engine) -> None:
+    """Emit a span per SQL statement executed on a SQLAlchemy engine."""
+    from sqlalchemy import event
+
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        if not trace.get_current_span().is_recording():
+            return
+        operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ""
+        span = tracer.start_span(
+            f"db.{operation.lower() or 'query'}",
+            kind=trace.SpanKind.CLIENT,
+            attributes={
+                "db.system": sync_engine.dialect.name,
+                "db.operation": operation,
+                "db.statement": statement[:MAX_STATEMENT_LENGTH],
+                "db.executemany": executemany,
+            },
+        )
+        context._otel_span = span
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        span: Optional[trace.Span] = getattr(context, "_otel_span", None)
+        if span is None:
+            return
+        if cursor.rowcount is not None and cursor.rowcount >= 0:
+            span.set_attribute("db.rowcount", cursor.rowcount)
+        span.end()
+        context._otel_span = None
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _error(exception_context):
+        span: Optional[trace.Span] = getattr(exception_context.execution_context, "_otel_span", None)
+        if span is None:
+            return
+        error = exception_context.original_exception
+        span.record_exception(error)
+        span.set_status(Status(StatusCode.ERROR, type(error).__name__))
+        span.end()
+        exception_context.execution_context._otel_span = None
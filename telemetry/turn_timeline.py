@@ -0,0 +1,198 @@
+"""
+Per-turn latency timeline.
+
+A turn runs from the end of the caller's speech to the first agent audio
+frame. Along the way we record the stages that make up that gap:
+
+    eou_delay      end of speech (VAD) -> end-of-utterance decision
+    stt_final      end of speech -> final transcript
+    llm_ttft       LLM time-to-first-token (summed over LLM rounds in the turn)
+    tools          tool dispatch time from ToolRouter (summed; per tool kept too)
+    tts_ttfb       TTS time-to-first-byte for the first utterance
+    first_audio    end of speech -> agent starts speaking (the 500ms target)
+
+Completed turns go into a bounded ring buffer; aggregate() reports
+p50/p95/p99 per stage so it is obvious which one blows the budget.
+"""
+import logging
+import os
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+from livekit.agents.metrics import EOUMetrics, LLMMetrics, TTSMetrics
+
+from .stats import percentile
+
+logger = logging.getLogger(__name__)
+
+TURN_TARGET_MS = float(os.getenv("TURN_TARGET_MS", "500"))
+TURN_TIMELINE_SIZE = int(os.getenv("TURN_TIMELINE_SIZE", "200"))
+
+STAGES = ("eou_delay", "stt_final", "llm_ttft", "tools", "tts_ttfb", "first_audio")
+
+
+@dataclass
+class TurnTimeline:
+    """Timestamps (time.time()) and stage durations (ms) for one caller turn."""
+    turn: int
+    speech_end: float
+    stt_final_at: Optional[float] = None
+    first_audio_at: Optional[float] = None
+    eou_delay_ms: Optional[float] = None
+    llm_ttft_ms: list[float] = field(default_factory=list)
+    tts_ttfb_ms: Optional[float] = None
+    tool_calls: list[tuple[str, float, bool]] = field(default_factory=list)  # (name, ms, ok)
+    interrupted: bool = False
+
+    def stages(self) -> dict[str, float]:
+        """Stage durations in ms; stages that did not happen are omitted."""
+        out = {}
+        if self.eou_delay_ms is not None:
+            out["eou_delay"] = self.eou_delay_ms
+        if self.stt_final_at is not None:
+            out["stt_final"] = max(0.0, (self.stt_final_at - self.speech_end) * 1000)
+        if self.llm_ttft_ms:
+            out["llm_ttft"] = sum(self.llm_ttft_ms)
+        if self.tool_calls:
+            out["tools"] = sum(ms for _, ms, _ in self.tool_calls)
+        if self.tts_ttfb_ms is not None:
+            out["tts_ttfb"] = self.tts_ttfb_ms
+        if self.first_audio_at is not None:
+            out["first_audio"] = max(0.0, (self.first_audio_at - self.speech_end) * 1000)
+        return out
+
+    def summary(self) -> str:
+        stages = self.stages()
+        parts = [f"{name}={stages[name]:.0f}ms" for name in STAGES if name in stages]
+        if self.tool_calls:
+            parts.append("[" + ", ".join(f"{n}:{ms:.0f}ms" for n, ms, _ in self.tool_calls) + "]")
+        if len(self.llm_ttft_ms) > 1:
+            parts.append(f"llm_rounds={len(self.llm_ttft_ms)}")
+        return " ".join(parts)
+
+
+class TurnTimelineRecorder:
+    """
+    Builds TurnTimelines from AgentSession events and ToolRouter dispatches.
+
+    Wire it with attach(session) and router.add_observer(recorder.on_tool_dispatch).
+    The router is shared by every call in the process, so owns_dispatch tells
+    the recorder which dispatches are its call's (checked in the dispatching
+    task); without it every dispatch is recorded.
+    """
+
+    def __init__(
+        self,
+        size: int = TURN_TIMELINE_SIZE,
+        target_ms: float = TURN_TARGET_MS,
+        owns_dispatch: Optional[Callable[[], bool]] = None,
+    ):
+        self.turns: deque[TurnTimeline] = deque(maxlen=size)
+        self.target_ms = target_ms
+        self._owns_dispatch = owns_dispatch
+        self._current: Optional[TurnTimeline] = None
+        self._turn_count = 0
+        self._listeners = []
+
+    def attach(self, session) -> None:
+        session.on("user_state_changed", self.on_user_state_changed)
+        session.on("user_input_transcribed", self.on_user_input_transcribed)
+        session.on("metrics_collected", self.on_metrics_collected)
+        session.on("agent_state_changed", self.on_agent_state_changed)
+
+    def add_listener(self, listener) -> None:
+        """Call listener(turn) for every completed turn (used by exporters)."""
+        self._listeners.append(listener)
+
+    # ----- event handlers -----
+
+    def on_user_state_changed(self, ev) -> None:
+        if ev.old_state == "speaking" and ev.new_state != "speaking":
+            if self._current is not None and self._current.first_audio_at is None:
+                # Caller spoke again before the agent answered
+                self._current.interrupted = True
+                self._finish(self._current)
+            self._turn_count += 1
+            self._current = TurnTimeline(turn=self._turn_count, speech_end=ev.created_at)
+
+    def on_user_input_transcribed(self, ev) -> None:
+        if ev.is_final and self._current is not None and self._current.stt_final_at is None:
+            self._current.stt_final_at = ev.created_at
+
+    def on_metrics_collected(self, ev) -> None:
+        turn = self._current
+        if turn is None or turn.first_audio_at is not None:
+            return
+        metrics = ev.metrics
+        if isinstance(metrics, EOUMetrics) and metrics.end_of_utterance_delay > 0:
+            turn.eou_delay_ms = metrics.end_of_utterance_delay * 1000
+            # VAD end of speech precedes the user_state_changed event by the silence window
+            turn.speech_end = min(turn.speech_end, metrics.timestamp - metrics.end_of_utterance_delay)
+        elif isinstance(metrics, LLMMetrics) and metrics.ttft >= 0:
+            turn.llm_ttft_ms.append(metrics.ttft * 1000)
+        elif isinstance(metrics, TTSMetrics) and metrics.ttfb >= 0 and turn.tts_ttfb_ms is None:
+            turn.tts_ttfb_ms = metrics.ttfb * 1000
+
+    def on_tool_dispatch(self, name: str, duration: float, error: Optional[BaseException]) -> None:
+        if self._owns_dispatch is not None and not self._owns_dispatch():
+            # Another call's tool on the shared router
+            return
+        if self._current is not None and self._current.first_audio_at is None:
+            self._current.tool_calls.append((name, duration * 1000, error is None))
+
+    def on_agent_state_changed(self, ev) -> None:
+        turn = self._current
+        if ev.new_state == "speaking" and turn is not None and turn.first_audio_at is None:
+            turn.first_audio_at = ev.created_at
+            self._finish(turn)
+
+    # ----- aggregation -----
+
+    def _finish(self, turn: TurnTimeline) -> None:
+        self.turns.append(turn)
+        first_audio = turn.stages().get("first_audio")
+        if turn.interrupted:
+            logger.info(f"⏱️  TURN {turn.turn} (interrupted): {turn.summary()}")
+        elif first_audio is not None:
+            mark = "✓" if first_audio <= self.target_ms else "✗"
+            logger.info(f"⏱️  TURN {turn.turn} {mark} {turn.summary()}")
+        for listener in self._listeners:
+            try:
+                listener(turn)
+            except Exception as e:
+                logger.debug(f"Turn listener failed: {e}")
+
+    def aggregate(self) -> dict[str, dict]:
+        """p50/p95/p99 (ms) per stage and per tool over the ring buffer."""
+        samples: dict[str, list[float]] = {}
+        for turn in self.turns:
+            for stage, ms in turn.stages().items():
+                samples.setdefault(stage, []).append(ms)
+            for name, ms, _ in turn.tool_calls:
+                samples.setdefault(f"tool:{name}", []).append(ms)
+        return {
+            stage: {
+                "count": len(values),
+                "p50": percentile(values, 50),
+                "p95": percentile(values, 95),
+                "p99": percentile(values, 99),
+            }
+            for stage, values in samples.items()
+        }
+
+    async def log_summary(self) -> None:
+        """Log the per-stage breakdown (registered as a job shutdown callback)."""
+        stats = self.aggregate()
+        if not stats:
+            return
+        completed = [t for t in self.turns if t.first_audio_at is not None and not t.interrupted]
+        over = sum(1 for t in completed if t.stages()["first_audio"] > self.target_ms)
+        logger.info(f"\n{'='*60}")
+        logger.info(f"📊 TURN LATENCY BREAKDOWN ({len(completed)} turns, {over} over {self.target_ms:.0f}ms)")
+        logger.info(f"   {'stage':<34} {'n':>4} {'p50':>7} {'p95':>7} {'p99':>7}")
+        for stage in list(STAGES) + sorted(k for k in stats if k.startswith("tool:")):
+            if stage in stats:
+                s = stats[stage]
+                logger.info(f"   {stage:<34} {s['count']:>4} {s['p50']:>5.0f}ms {s['p95']:>5.0f}ms {s['p99']:>5.0f}ms")
+        logger.info(f"{'='*60}\n")
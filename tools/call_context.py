@@ -0,0 +1,213 @@
+"""
+Per-call context shared by the tool handlers.
+
+At call start the entrypoint creates a CallContext from the SIP caller ID
+(normalized to E.164) and kicks off a prefetch of the matching patient
+profile(s) and their upcoming appointments. The prefetch runs concurrently with TTS/LLM setup, and the
+results let lookup/cancel/reschedule answer from memory instead of paying a
+database round trip on the caller's first request.
+"""
+import asyncio
+import contextvars
+import logging
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Optional
+
+from models.appointment import AppointmentStatus
+from services.appointment_service import AppointmentService
+from services.patient_service import PatientService
+from .unit_of_work import CallUnitOfWork
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PatientSnapshot:
+  """Detached copy of a patient row loaded during prefetch."""
+  id: int
+  name: str
+  email: str
+  phone: str
+
+
+@dataclass
+class AppointmentSnapshot:
+  """
+  Detached copy of an appointment row loaded during prefetch.
+
+  Mirrors the attributes handlers read from Appointment (including
+  `.patient`), so either can be used interchangeably.
+  """
+  id: int
+  patient_id: int
+  patient: PatientSnapshot
+  start_time: datetime
+  end_time: datetime
+  reason: str
+  status: AppointmentStatus
+  google_calendar_event_id: Optional[str]
+
+
+def _as_utc(value: datetime) -> datetime:
+  return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+
+def _same_name(stored: str, requested: str) -> bool:
+  # Same comparison as AppointmentService's name lookups: lower(patients.name) = lower(trimmed request)
+  return stored.lower() == requested.strip().lower()
+
+
+@dataclass
+class CallContext:
+  """State cached for the lifetime of a single call."""
+  caller_number: Optional[str] = None
+  patients: list[PatientSnapshot] = field(default_factory=list)
+  appointments: list[AppointmentSnapshot] = field(default_factory=list)
+  prefetched: bool = False
+  uow: Optional[CallUnitOfWork] = field(default=None, repr=False)
+  # Groups a call's entries in the tool journal
+  call_id: str = field(default_factory=lambda: uuid.uuid4().hex[:12])
+  _prefetch_task: Optional[asyncio.Task] = field(default=None, repr=False)
+
+  def start_prefetch(self, session_factory=None) -> None:
+    """
+    Start loading the caller's profile and upcoming appointments in the background.
+
+    Uses the call's unit of work when one is attached, so the prefetched rows
+    land in the same session the tools will use.
+    """
+    if not self.caller_number or self._prefetch_task is not None:
+      return
+    if self.uow is not None:
+      session_factory = self.uow.session
+    self._prefetch_task = asyncio.create_task(self._prefetch(session_factory), name="caller-prefetch")
+
+  async def wait_prefetch(self, timeout: float) -> bool:
+    """Wait up to `timeout` seconds for the prefetch. Returns True if it completed."""
+    if self._prefetch_task is None:
+      return self.prefetched
+    try:
+      await asyncio.wait_for(asyncio.shield(self._prefetch_task), timeout)
+    except asyncio.TimeoutError:
+      logger.warning(f"⏳ Caller prefetch still running after {timeout*1000:.0f}ms - continuing without it")
+    except Exception:
+      pass
+    return self.prefetched
+
+  async def _prefetch(self, session_factory) -> None:
+    import time as time_module
+    start = time_module.time()
+    try:
+      async with session_factory() as session:
+        patients = await PatientService(session).get_patients_by_phone(self.caller_number)
+        appointments = []
+        if patients:
+          appointments = await AppointmentService(session).get_appointments_for_patient_ids(
+            [p.id for p in patients],
+            datetime.now(timezone.utc),
+            include_cancelled=True,
+          )
+    except Exception as e:
+      logger.error(f"❌ Caller prefetch failed for {self.caller_number}: {e}")
+      return
+
+    self.patients = [PatientSnapshot(id=p.id, name=p.name, email=p.email, phone=p.phone) for p in patients]
+    by_id = {p.id: p for p in self.patients}
+    self.appointments = [
+      AppointmentSnapshot(
+        id=a.id,
+        patient_id=a.patient_id,
+        patient=by_id[a.patient_id],
+        start_time=a.start_time,
+        end_time=a.end_time,
+        reason=a.reason,
+        status=a.status,
+        google_calendar_event_id=a.google_calendar_event_id,
+      )
+      for a in appointments
+    ]
+    self.prefetched = True
+    elapsed = time_module.time() - start
+    logger.info(
+      f"📇 Caller prefetch for {self.caller_number}: {len(self.patients)} patient(s), "
+      f"{len(self.appointments)} upcoming appointment(s) in {elapsed*1000:.0f}ms"
+    )
+
+  def knows_patient(self, name: str) -> bool:
+    return any(_same_name(p.name, name) for p in self.patients)
+
+  def find_appointments(
+    self,
+    name: str,
+    start_time: datetime | None = None,
+    include_cancelled: bool = False,
+    from_time: datetime | None = None,
+  ) -> list[AppointmentSnapshot]:
+    """
+    Answer an appointment lookup from prefetched data.
+
+    Returns an empty list when memory cannot answer (unknown patient, nothing
+    prefetched, or data invalidated by a write); callers then query the database.
+    """
+    if not self.prefetched or not self.knows_patient(name):
+      return []
+    matches = [a for a in self.appointments if _same_name(a.patient.name, name)]
+    if start_time is not None:
+      target = _as_utc(start_time)
+      matches = [a for a in matches if a.start_time == target]
+    if from_time is not None:
+      floor = _as_utc(from_time)
+      matches = [a for a in matches if a.start_time >= floor]
+    if not include_cancelled:
+      matches = [a for a in matches if a.status == AppointmentStatus.CONFIRMED]
+    return sorted(matches, key=lambda a: a.start_time)
+
+  def find_upcoming(self, name: str) -> list[AppointmentSnapshot]:
+    """Confirmed prefetched appointments for `name` starting from now."""
+    return self.find_appointments(name, from_time=datetime.now(timezone.utc))
+
+  def invalidate_appointments(self) -> None:
+    """Drop cached appointments after a write so later reads go to the database."""
+    if self.appointments:
+      logger.info("🧹 Call context appointments invalidated after write")
+    self.appointments = []
+    self.prefetched = False
+
+  def prompt_section(self) -> str:
+    """Caller context appended to the system prompt so returning callers can be greeted by name."""
+    if not self.patients:
+      return ""
+    names = ", ".join(p.name for p in self.patients)
+    lines = [
+      "## CALLER CONTEXT (from caller ID)\n",
+      f"The caller's phone number matches our records for: {names}.\n",
+      "- Greet them by first name, then confirm identity before discussing appointments "
+      "(e.g., 'Am I speaking with John?'). Someone else may be calling from this phone.\n",
+    ]
+    upcoming = [a for a in self.appointments if a.status == AppointmentStatus.CONFIRMED]
+    if upcoming:
+      lines.append("- Their upcoming appointments on file:\n")
+      for a in upcoming[:5]:
+        when = a.start_time.strftime("%A, %B %d at %H:%M")
+        lines.append(f"  * {a.patient.name}: {when} ({a.reason}) - start_time {a.start_time.isoformat()}\n")
+    else:
+      lines.append("- They have no upcoming appointments on file.\n")
+    lines.append(
+      "- Still call lookup_appointment before canceling or rescheduling; it answers instantly for this caller.\n\n"
+    )
+    return "".join(lines)
+
+
+_current_call: contextvars.ContextVar[Optional[CallContext]] = contextvars.ContextVar("current_call", default=None)
+
+
+def get_call_context() -> Optional[CallContext]:
+  """Return the CallContext for the call running in this task, if any."""
+  return _current_call.get()
+
+
+def set_call_context(ctx: Optional[CallContext]) -> contextvars.Token:
+  """Bind a CallContext to the current task (inherited by tasks it spawns)."""
+  return _current_call.set(ctx)
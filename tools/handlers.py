@@ -1,4 +1,6 @@
+import asyncio
 import logging
+import os
 from .schemas import (
   CheckAvailabilityInput, CheckAvailabilityOutput,
   Slot,
@@ -14,15 +16,31 @@ from .schemas import (
   LookupAppointmentInput, LookupAppointmentOutput, AppointmentInfo,
 )
 from .router import ToolRouter
-from datetime import datetime, timedelta
+from .result_cache import CachePolicy
+from .call_context import get_call_context
+from datetime import datetime, timedelta, timezone
 from services.appointment_service import AppointmentService
+from models.appointment import Appointment
 from services.patient_service import PatientService
 from services.google_calendar_service import get_calendar_service
 from services.email_service import get_email_service  # ADD THIS IMPORT
 from utils.sanitize import sanitize_name, sanitize_email
+from telemetry.metrics import record_cache
+from utils.deadline import no_deadline
 
 logger = logging.getLogger(__name__)
 
+# Result cache TTLs in seconds (see tools/result_cache.py). Availability is kept
+# briefly: other calls book slots too, and book_appointment re-checks the slot anyway.
+HOURS_CACHE_TTL = float(os.getenv("HOURS_CACHE_TTL", "300"))
+AVAILABILITY_CACHE_TTL = float(os.getenv("AVAILABILITY_CACHE_TTL", "30"))
+# Longer windows are rare and produce large outputs; they are not cached
+AVAILABILITY_CACHE_MAX_WINDOW = timedelta(days=7)
+STATIC_CACHE_TTL = 3600
+
+# Deadline for tools that write and then call Google Calendar and SMTP (reads use TOOL_TIMEOUT)
+WRITE_TOOL_TIMEOUT = float(os.getenv("WRITE_TOOL_TIMEOUT", "12"))
+
 # Session factory will be passed from agent.py
 _session_factory = None
 
@@ -32,13 +50,59 @@ def set_session_factory(factory):
     _session_factory = factory
 
 
+# Post-commit Calendar/email work still running (kept referenced until it finishes)
+_side_effects: set[asyncio.Task] = set()
+
+
+async def _after_commit(name: str, work):
+  """
+  Run the side effects of a committed write (Calendar, email) to completion.
+
+  They run as their own task without the dispatch deadline, with the blocking
+  Calendar and SMTP calls in worker threads. If the dispatch hits its
+  deadline, only its wait is cancelled: the write is already committed, and
+  dropping the rest would orphan a Calendar event or skip the patient's email.
+  """
+  with no_deadline():
+    task = asyncio.create_task(work(), name=name)
+  _side_effects.add(task)
+  task.add_done_callback(_side_effects.discard)
+  return await asyncio.shield(task)
+
+
+async def _link_calendar_event(appointment_id: int, event_id: str) -> None:
+  """
+  Store the Calendar event id of a committed appointment (from _after_commit work).
+
+  Uses a session of its own rather than the call's unit of work: the work can
+  outlive the dispatch and the call, and the unit of work would check out a
+  new connection after the job closed it that nothing ever returns.
+  """
+  async with _session_factory() as session:
+    await AppointmentService(session).link_calendar_event(appointment_id, event_id)
+    await session.commit()
+
+
+def _db_session(read_only: bool = False):
+  """
+  Session for a tool call: the call's unit of work when one is bound, else a fresh session.
+
+  read_only tools may get a separate session when the call's is busy, so they
+  run alongside the call's other tools (CallUnitOfWork.read_session).
+  """
+  call_context = get_call_context()
+  if call_context and call_context.uow:
+    return call_context.uow.read_session() if read_only else call_context.uow.session()
+  return _session_factory()
+
+
 async def check_availability(i: CheckAvailabilityInput) -> CheckAvailabilityOutput:
   """Check available appointment slots within time window."""
   logger.info("="*60)
   logger.info("🔍 EXECUTING check_availability handler")
   logger.info(f"📅 Reason: {i.reason}")
   
-  async with _session_factory() as session:
+  async with _db_session(read_only=True) as session:
     service = AppointmentService(session)
 
     # Parse preferred time window
@@ -79,20 +143,20 @@ async def book_appointment(i: BookAppointmentInput) -> BookAppointmentOutput:
   logger.info("Executing book_appointment handler")
   logger.info(f"Booking details - Name: {safe_name}, Email: {safe_email}, Slot: {i.slot_start[11:16]}-{i.slot_end[11:16]}")
 
-  async with _session_factory() as session:
+  start_time = datetime.fromisoformat(i.slot_start.replace("Z", "+00:00"))
+  end_time = datetime.fromisoformat(i.slot_end.replace("Z", "+00:00"))
+  async with _db_session() as session:
     try:
       # Find or create patient
       patient_service = PatientService(session)
       # Pass sanitized name/email into patient creation
       i.name = safe_name
       i.email = safe_email
-      patient = await patient_service.find_or_create_patient(i)
+      patient = await patient_service.find_or_create_patient(i, fuzzy_fallback=True)
       logger.info(f"Patient resolved - ID: {patient.id}, Email: {patient.email}")
 
       # Book appointment with locking
       appointment_service = AppointmentService(session)
-      start_time = datetime.fromisoformat(i.slot_start.replace("Z", "+00:00"))
-      end_time = datetime.fromisoformat(i.slot_end.replace("Z", "+00:00"))
       appointment = await appointment_service.book_appointment(
         patient=patient,
         start_time=start_time,
@@ -103,53 +167,6 @@ async def book_appointment(i: BookAppointmentInput) -> BookAppointmentOutput:
       # Commit transaction to get appointment ID
       await session.commit()
 
-      # Create Google Calendar event (after DB commit to ensure consistency)
-      calendar_service = get_calendar_service()
-      event_id = calendar_service.create_event(
-        patient_name=patient.name,
-        patient_email=patient.email,
-        patient_phone=patient.phone,
-        reason=i.reason,
-        start_time=start_time,
-        end_time=end_time,
-        appointment_id=appointment.id
-      )
-
-      # Update appointment with calendar event ID if created
-      if event_id:
-        appointment.google_calendar_event_id = event_id
-        await session.commit()
-        logger.info(f"Linked appointment {appointment.id} to calendar event {event_id}")
-      else:
-        logger.warning(f"Calendar event not created for appointment {appointment.id} - calendar may be disabled")
-
-      confirmation_id = f"cnf_{appointment.id}_{int(datetime.now().timestamp())}"
-      
-      # ========================================
-      # 📧 SEND CONFIRMATION EMAIL
-      # ========================================
-      logger.info(f"📧 Attempting to send confirmation email to {patient.email}")
-      email_service = get_email_service()
-      
-      email_sent = email_service.send_appointment_confirmation(
-        patient_name=patient.name,
-        patient_email=patient.email,
-        appointment_date=start_time,
-        appointment_time_start=i.slot_start,
-        appointment_time_end=i.slot_end,
-        reason=i.reason,
-        confirmation_id=confirmation_id,
-        phone=patient.phone
-      )
-      
-      if email_sent:
-        logger.info(f"✅ Confirmation email sent successfully to {patient.email}")
-      else:
-        logger.warning(f"⚠️  Confirmation email NOT sent (check email configuration)")
-      
-      logger.info(f"Successfully booked appointment {appointment.id}")
-      return BookAppointmentOutput(confirmation_id=confirmation_id)
-
     except ValueError as e:
       # Conflict detected or validation error
       logger.warning(f"Booking failed: {e}")
@@ -158,6 +175,59 @@ async def book_appointment(i: BookAppointmentInput) -> BookAppointmentOutput:
       logger.error(f"Unexpected error during booking: {e}")
       raise
 
+  call_context = get_call_context()
+  if call_context:
+    call_context.invalidate_appointments()
+
+  appointment_id = appointment.id
+  patient_name, patient_email, patient_phone = patient.name, patient.email, patient.phone
+  confirmation_id = f"cnf_{appointment_id}_{int(datetime.now().timestamp())}"
+
+  async def notify():
+    # Create Google Calendar event (after DB commit to ensure consistency)
+    event_id = await asyncio.to_thread(
+      get_calendar_service().create_event,
+      patient_name=patient_name,
+      patient_email=patient_email,
+      patient_phone=patient_phone,
+      reason=i.reason,
+      start_time=start_time,
+      end_time=end_time,
+      appointment_id=appointment_id
+    )
+
+    # Update appointment with calendar event ID if created
+    if event_id:
+      await _link_calendar_event(appointment_id, event_id)
+      logger.info(f"Linked appointment {appointment_id} to calendar event {event_id}")
+    else:
+      logger.warning(f"Calendar event not created for appointment {appointment_id} - calendar may be disabled")
+
+    # ========================================
+    # 📧 SEND CONFIRMATION EMAIL
+    # ========================================
+    logger.info(f"📧 Attempting to send confirmation email to {patient_email}")
+    email_sent = await asyncio.to_thread(
+      get_email_service().send_appointment_confirmation,
+      patient_name=patient_name,
+      patient_email=patient_email,
+      appointment_date=start_time,
+      appointment_time_start=i.slot_start,
+      appointment_time_end=i.slot_end,
+      reason=i.reason,
+      confirmation_id=confirmation_id,
+      phone=patient_phone
+    )
+
+    if email_sent:
+      logger.info(f"✅ Confirmation email sent successfully to {patient_email}")
+    else:
+      logger.warning(f"⚠️  Confirmation email NOT sent (check email configuration)")
+
+  await _after_commit(f"book-{appointment_id}-notify", notify)
+  logger.info(f"Successfully booked appointment {appointment_id}")
+  return BookAppointmentOutput(confirmation_id=confirmation_id)
+
 async def lookup_appointment(i: LookupAppointmentInput) -> LookupAppointmentOutput:
   """Lookup appointments by patient name and optional date for verification before cancel/reschedule.
   
@@ -165,55 +235,73 @@ async def lookup_appointment(i: LookupAppointmentInput) -> LookupAppointmentOutp
   """
   i.name = sanitize_name(i.name)
   logger.info(f"Executing lookup_appointment handler for patient: {i.name}")
-  async with _session_factory() as session:
-    appointment_service = AppointmentService(session)
-    
-    # Parse date if provided
-    target_date = None
-    if i.date:
-      try:
-        target_date = datetime.fromisoformat(i.date.replace("Z", "+00:00"))
-      except ValueError:
-        logger.warning(f"Invalid date format: {i.date}")
-    
-    # Find appointments (including cancelled ones)
+
+  # Parse date if provided
+  target_date = None
+  if i.date:
+    try:
+      target_date = datetime.fromisoformat(i.date.replace("Z", "+00:00"))
+    except ValueError:
+      logger.warning(f"Invalid date format: {i.date}")
+
+  # Answer from the caller-ID prefetch when it covers this patient
+  call_context = get_call_context()
+  appointments = []
+  if call_context:
     if target_date:
-      # Look for specific appointment on this date (any status)
-      appointment = await appointment_service.find_appointment(i.name, target_date, include_cancelled=True)
-      appointments = [appointment] if appointment else []
+      appointments = call_context.find_appointments(i.name, target_date, include_cancelled=True)
     else:
-      # Get all appointments for this patient (including cancelled)
-      now = datetime.now()
-      appointments = await appointment_service.get_appointments_for_patient(i.name, now, include_cancelled=True)
-    
-    # Convert to output format
-    appointment_infos = []
-    for appt in appointments:
-      appointment_infos.append(AppointmentInfo(
-        appointment_id=appt.id,
-        patient_name=appt.patient.name,
-        start_time=appt.start_time.isoformat(),
-        end_time=appt.end_time.isoformat(),
-        reason=appt.reason,
-        status=appt.status
-      ))
-    
-    logger.info(f"Found {len(appointment_infos)} appointments (all statuses) for {i.name}")
-    return LookupAppointmentOutput(
-      appointments=appointment_infos,
-      count=len(appointment_infos)
-    )
+      appointments = call_context.find_appointments(i.name, include_cancelled=True, from_time=datetime.now(timezone.utc))
+    record_cache("call_context", bool(appointments))
+    if appointments:
+      logger.info(f"📇 Answered lookup for {i.name} from call context (no DB query)")
+
+  if not appointments:
+    async with _db_session(read_only=True) as session:
+      appointment_service = AppointmentService(session)
+
+      # Find appointments (including cancelled ones)
+      if target_date:
+        # Look for specific appointment on this date (any status)
+        appointment = await appointment_service.find_appointment(i.name, target_date, include_cancelled=True)
+        appointments = [appointment] if appointment else []
+      else:
+        # Get all appointments for this patient (including cancelled)
+        now = datetime.now()
+        appointments = await appointment_service.get_appointments_for_patient(i.name, now, include_cancelled=True)
+
+  # Convert to output format
+  appointment_infos = []
+  for appt in appointments:
+    appointment_infos.append(AppointmentInfo(
+      appointment_id=appt.id,
+      patient_name=appt.patient.name,
+      start_time=appt.start_time.isoformat(),
+      end_time=appt.end_time.isoformat(),
+      reason=appt.reason,
+      status=appt.status
+    ))
+
+  logger.info(f"Found {len(appointment_infos)} appointments (all statuses) for {i.name}")
+  return LookupAppointmentOutput(
+    appointments=appointment_infos,
+    count=len(appointment_infos)
+  )
 
 async def cancel_appointment(i: CancelAppointmentInput) -> CancelAppointmentOutput:
   """Cancel appointment by patient name and time, remove from Google Calendar, and SEND cancellation email."""
   i.name = sanitize_name(i.name)
   logger.info("Executing cancel_appointment handler")
-  async with _session_factory() as session:
+  call_context = get_call_context()
+  async with _db_session() as session:
     appointment_service = AppointmentService(session)
 
-    # Find appointment
+    # Find appointment (prefetched call context first, then the database)
     start_time = datetime.fromisoformat(i.slot_start.replace("Z", "+00:00"))
-    appointment = await appointment_service.find_appointment(i.name, start_time)
+    cached = call_context.find_appointments(i.name, start_time) if call_context else []
+    if call_context:
+      record_cache("call_context", bool(cached))
+    appointment = cached[0] if cached else await appointment_service.find_appointment(i.name, start_time)
 
     if not appointment:
       # Provide helpful error message
@@ -232,7 +320,6 @@ async def cancel_appointment(i: CancelAppointmentInput) -> CancelAppointmentOutp
       raise ValueError(error_msg)
 
     # Store info BEFORE canceling (we need it for email)
-    calendar_event_id = appointment.google_calendar_event_id
     patient = appointment.patient
     appointment_start = appointment.start_time
     appointment_reason = appointment.reason
@@ -240,55 +327,64 @@ async def cancel_appointment(i: CancelAppointmentInput) -> CancelAppointmentOutp
     patient_name = patient.name
 
     # Cancel it
-    await appointment_service.cancel_appointment(
-      appointment_id=appointment.id,
+    appointment_id = appointment.id
+    cancelled = await appointment_service.cancel_appointment(
+      appointment_id=appointment_id,
       cancellation_reason=i.reason if i.reason else None
     )
+    # From the locked row, so it is current even when the appointment came from the call context
+    calendar_event_id = cancelled.google_calendar_event_id
     await session.commit()
+  if call_context:
+    call_context.invalidate_appointments()
 
+  async def notify():
     # Delete from Google Calendar
     if calendar_event_id:
-      calendar_service = get_calendar_service()
-      deleted = calendar_service.delete_event(calendar_event_id)
+      deleted = await asyncio.to_thread(get_calendar_service().delete_event, calendar_event_id)
       if deleted:
-        logger.info(f"Deleted calendar event {calendar_event_id} for cancelled appointment {appointment.id}")
+        logger.info(f"Deleted calendar event {calendar_event_id} for cancelled appointment {appointment_id}")
       else:
         logger.warning(f"Failed to delete calendar event {calendar_event_id}")
     else:
-      logger.info(f"No calendar event linked to appointment {appointment.id}")
+      logger.info(f"No calendar event linked to appointment {appointment_id}")
 
     # ========================================
     # 📧 SEND CANCELLATION EMAIL
     # ========================================
     logger.info(f"📧 Attempting to send cancellation email to {patient_email}")
-    email_service = get_email_service()
-    
-    email_sent = email_service.send_cancellation_email(
+    email_sent = await asyncio.to_thread(
+      get_email_service().send_cancellation_email,
       patient_name=patient_name,
       patient_email=patient_email,
       appointment_date=appointment_start,
       appointment_time=i.slot_start,
       reason=appointment_reason
     )
-    
+
     if email_sent:
       logger.info(f"✅ Cancellation email sent successfully to {patient_email}")
     else:
       logger.warning(f"⚠️  Cancellation email NOT sent (check email configuration)")
 
-    logger.info(f"Cancelled appointment {appointment.id}")
-    return CancelAppointmentOutput(status="cancelled")
+  await _after_commit(f"cancel-{appointment_id}-notify", notify)
+  logger.info(f"Cancelled appointment {appointment_id}")
+  return CancelAppointmentOutput(status="cancelled")
 
 async def reschedule_appointment(i: RescheduleAppointmentInput) -> RescheduleAppointmentOutput:
   """Reschedule appointment to new time, update Google Calendar, and SEND reschedule email."""
   i.name = sanitize_name(i.name)
   logger.info("Executing reschedule_appointment handler")
-  async with _session_factory() as session:
+  call_context = get_call_context()
+  async with _db_session() as session:
     appointment_service = AppointmentService(session)
 
-    # Find current appointment (including cancelled ones)
+    # Find current appointment (including cancelled ones), prefetched call context first
     current_start = datetime.fromisoformat(i.current_slot_start.replace("Z", "+00:00"))
-    appointment = await appointment_service.find_appointment(i.name, current_start, include_cancelled=True)
+    cached = call_context.find_appointments(i.name, current_start, include_cancelled=True) if call_context else []
+    if call_context:
+      record_cache("call_context", bool(cached))
+    appointment = cached[0] if cached else await appointment_service.find_appointment(i.name, current_start, include_cancelled=True)
 
     if not appointment:
       logger.warning(f"Exact appointment not found for {i.name} at {i.current_slot_start}. Searching for any appointments...")
@@ -318,30 +414,57 @@ async def reschedule_appointment(i: RescheduleAppointmentInput) -> RescheduleApp
     
     logger.info(f"Rescheduling appointment {appointment.id} from {appointment.start_time.isoformat()} to {new_start.isoformat()}")
     
-    # Call the service's reschedule method (it already handles calendar)
     new_appointment = await appointment_service.reschedule_appointment(
       appointment_id=appointment.id,
       new_start_time=new_start,
       new_end_time=new_end
     )
-    
-    await session.commit()
-    logger.info(f"Successfully rescheduled to new appointment {new_appointment.id} at {new_appointment.start_time.isoformat()}")
+    # The locked row, so the event id is current even when the appointment came from the call context
+    old_calendar_event_id = (await session.get(Appointment, appointment.id)).google_calendar_event_id
 
-    new_confirmation_id = f"cnf_{new_appointment.id}_{int(datetime.now().timestamp())}"
-    
-    status_message = "reactivated and rescheduled" if is_cancelled else "rescheduled"
-    logger.info(f"{status_message.capitalize()} appointment {appointment.id} to {new_appointment.id}")
+    await session.commit()
+  if call_context:
+    call_context.invalidate_appointments()
+  logger.info(f"Successfully rescheduled to new appointment {new_appointment.id} at {new_appointment.start_time.isoformat()}")
+
+  new_appointment_id = new_appointment.id
+  new_confirmation_id = f"cnf_{new_appointment_id}_{int(datetime.now().timestamp())}"
+  patient_name, patient_email, patient_phone = patient.name, patient.email, patient.phone
+
+  status_message = "reactivated and rescheduled" if is_cancelled else "rescheduled"
+  logger.info(f"{status_message.capitalize()} appointment {appointment.id} to {new_appointment_id}")
+
+  async def notify():
+    # Move the Google Calendar event: delete the old one (cancelled appointments may have none), create the new one
+    calendar_service = get_calendar_service()
+    if old_calendar_event_id:
+      deleted = await asyncio.to_thread(calendar_service.delete_event, old_calendar_event_id)
+      if deleted:
+        logger.info(f"Deleted old calendar event {old_calendar_event_id}")
+      else:
+        logger.warning(f"Could not delete old calendar event {old_calendar_event_id}")
+    event_id = await asyncio.to_thread(
+      calendar_service.create_event,
+      patient_name=patient_name,
+      patient_email=patient_email,
+      patient_phone=patient_phone,
+      reason=appointment_reason,
+      start_time=new_start,
+      end_time=new_end,
+      appointment_id=new_appointment_id
+    )
+    if event_id:
+      await _link_calendar_event(new_appointment_id, event_id)
+      logger.info(f"Created calendar event {event_id} for appointment {new_appointment_id}")
 
     # ========================================
     # 📧 SEND RESCHEDULE EMAIL
     # ========================================
-    logger.info(f"📧 Attempting to send reschedule email to {patient.email}")
-    email_service = get_email_service()
-    
-    email_sent = email_service.send_reschedule_email(
-      patient_name=patient.name,
-      patient_email=patient.email,
+    logger.info(f"📧 Attempting to send reschedule email to {patient_email}")
+    email_sent = await asyncio.to_thread(
+      get_email_service().send_reschedule_email,
+      patient_name=patient_name,
+      patient_email=patient_email,
       old_date=old_appointment_start,
       old_time=old_appointment_time,
       new_date=new_start,
@@ -349,43 +472,52 @@ async def reschedule_appointment(i: RescheduleAppointmentInput) -> RescheduleApp
       new_time_end=i.new_slot_end,
       reason=appointment_reason,
       confirmation_id=new_confirmation_id,
-      phone=patient.phone
+      phone=patient_phone
     )
-    
+
     if email_sent:
-      logger.info(f"✅ Reschedule email sent successfully to {patient.email}")
+      logger.info(f"✅ Reschedule email sent successfully to {patient_email}")
     else:
       logger.warning(f"⚠️  Reschedule email NOT sent (check email configuration)")
 
-    return RescheduleAppointmentOutput(
-      status=status_message,
-      new_confirmation_id=new_confirmation_id
-    )
+  await _after_commit(f"reschedule-{new_appointment_id}-notify", notify)
+  return RescheduleAppointmentOutput(
+    status=status_message,
+    new_confirmation_id=new_confirmation_id
+  )
 
 
 async def get_upcoming_appointments(i: GetUpcomingAppointmentsInput) -> GetUpcomingAppointmentsOutput:
   """Get all upcoming confirmed appointments for a patient from now onward."""
   i.name = sanitize_name(i.name)
   logger.info(f"Executing get_upcoming_appointments handler for {i.name}")
-  async with _session_factory() as session:
-    service = AppointmentService(session)
 
-    now = datetime.now()
-    appointments = await service.get_upcoming_appointments_for_patient(i.name, now)
+  call_context = get_call_context()
+  appointments = call_context.find_upcoming(i.name) if call_context else []
+  if call_context:
+    record_cache("call_context", bool(appointments))
+  if appointments:
+    logger.info(f"📇 Answered upcoming appointments for {i.name} from call context (no DB query)")
+  else:
+    async with _db_session(read_only=True) as session:
+      service = AppointmentService(session)
+
+      now = datetime.now()
+      appointments = await service.get_upcoming_appointments_for_patient(i.name, now)
 
-    slots: list[Slot] = []
-    for appt in appointments:
-      slots.append(Slot(start=appt.start_time.isoformat(), end=appt.end_time.isoformat()))
+  slots: list[Slot] = []
+  for appt in appointments:
+    slots.append(Slot(start=appt.start_time.isoformat(), end=appt.end_time.isoformat()))
 
-    logger.info(f"Found {len(slots)} upcoming appointments for {i.name}")
-    return GetUpcomingAppointmentsOutput(slots=slots)
+  logger.info(f"Found {len(slots)} upcoming appointments for {i.name}")
+  return GetUpcomingAppointmentsOutput(slots=slots)
 
 
 async def get_hours(i: GetHoursInput) -> GetHoursOutput:
   """Get clinic hours dynamically from database."""
   logger.info("Executing get_hours handler")
   
-  async with _session_factory() as session:
+  async with _db_session(read_only=True) as session:
     service = AppointmentService(session)
     
     # Get all clinic hours from database
@@ -455,20 +587,44 @@ async def send_confirmation(i: SendConfirmationInput) -> SendConfirmationOutput:
   return SendConfirmationOutput(status="sent")
 
 
+def _availability_key(i: CheckAvailabilityInput):
+  """Cache key for check_availability: the window (not the reason), if it is short enough."""
+  try:
+    start = datetime.fromisoformat(i.preferred_time_window.from_.replace("Z", "+00:00"))
+    end = datetime.fromisoformat(i.preferred_time_window.to.replace("Z", "+00:00"))
+    if end - start > AVAILABILITY_CACHE_MAX_WINDOW:
+      return None
+  except (ValueError, TypeError):
+    return None
+  return (start, end)
+
+
 def register_handlers(router: ToolRouter, session_factory=None) -> None:
   """Register all appointment handlers with database session."""
   if session_factory:
     set_session_factory(session_factory)
 
-  router.register("check_availability", CheckAvailabilityInput, CheckAvailabilityOutput, check_availability)
-  router.register("book_appointment", BookAppointmentInput, BookAppointmentOutput, book_appointment)
-  router.register("lookup_appointment", LookupAppointmentInput, LookupAppointmentOutput, lookup_appointment)
-  router.register("cancel_appointment", CancelAppointmentInput, CancelAppointmentOutput, cancel_appointment)
-  router.register("reschedule_appointment", RescheduleAppointmentInput, RescheduleAppointmentOutput, reschedule_appointment)
-  router.register("get_upcoming_appointments", GetUpcomingAppointmentsInput, GetUpcomingAppointmentsOutput, get_upcoming_appointments)
-  router.register("get_hours", GetHoursInput, GetHoursOutput, get_hours)
-  router.register("get_location", GetLocationInput, GetLocationOutput, get_location)
-  router.register("get_insurance_supported", GetInsuranceSupportedInput, GetInsuranceSupportedOutput, get_insurance_supported)
+  # Writes that change availability drop its cached results
+  writes_slots = ("check_availability",)
+
+  router.register("check_availability", CheckAvailabilityInput, CheckAvailabilityOutput, check_availability,
+                  cache=CachePolicy(ttl=AVAILABILITY_CACHE_TTL, key=_availability_key), coalesce=True)
+  router.register("book_appointment", BookAppointmentInput, BookAppointmentOutput, book_appointment,
+                  invalidates=writes_slots, timeout=WRITE_TOOL_TIMEOUT)
+  router.register("lookup_appointment", LookupAppointmentInput, LookupAppointmentOutput, lookup_appointment,
+                  read_only=True)
+  router.register("cancel_appointment", CancelAppointmentInput, CancelAppointmentOutput, cancel_appointment,
+                  invalidates=writes_slots, timeout=WRITE_TOOL_TIMEOUT)
+  router.register("reschedule_appointment", RescheduleAppointmentInput, RescheduleAppointmentOutput, reschedule_appointment,
+                  invalidates=writes_slots, timeout=WRITE_TOOL_TIMEOUT)
+  router.register("get_upcoming_appointments", GetUpcomingAppointmentsInput, GetUpcomingAppointmentsOutput, get_upcoming_appointments,
+                  read_only=True)
+  router.register("get_hours", GetHoursInput, GetHoursOutput, get_hours,
+                  cache=CachePolicy(ttl=HOURS_CACHE_TTL), coalesce=True)
+  router.register("get_location", GetLocationInput, GetLocationOutput, get_location,
+                  cache=CachePolicy(ttl=STATIC_CACHE_TTL), coalesce=True)
+  router.register("get_insurance_supported", GetInsuranceSupportedInput, GetInsuranceSupportedOutput, get_insurance_supported,
+                  cache=CachePolicy(ttl=STATIC_CACHE_TTL, key=lambda i: i.provider.strip().lower()), coalesce=True)
   router.register("escalate_to_human", EscalateToHumanInput, EscalateToHumanOutput, escalate_to_human)
   router.register("send_confirmation", SendConfirmationInput, SendConfirmationOutput, send_confirmation)
 
@@ -0,0 +1,165 @@
+"""
+Optional JSONL journal of tool dispatches, for replaying production-shaped
+workloads offline (see benchmarks/replay_tools.py).
+
+Set TOOL_JOURNAL to a file path to enable it; `{pid}` in the path is replaced
+by the process id so each job process writes its own file. One compact line
+per dispatch:
+
+  {"t":1760000000.123,"call":"3f2a9c41d0e2","tool":"check_availability",
+   "payload":{...},"ms":41.2,"ok":true,"out":512}
+
+t is the wall-clock start, call groups dispatches of one call, payload is
+the validated input, ms the dispatch time, out the output size in bytes (JSON)
+and err the exception type when ok is false.
+
+Payloads name real patients, so by default (TOOL_JOURNAL_REDACT=1) names,
+emails and phone numbers are replaced by pseudonyms that are stable within
+the file (a given patient maps to the same pseudonym every time), and
+free-text and health fields (reason, message, insurance, provider) are
+dropped. Slot times, dates and tool order are kept, which is what the
+replay needs.
+
+Entries are serialized on the dispatching task and written by a background
+thread, so the event loop never waits on the file.
+"""
+import atexit
+import hashlib
+import hmac
+import json
+import logging
+import os
+import queue
+import secrets
+import threading
+from typing import Any, Optional
+
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+TOOL_JOURNAL = os.getenv("TOOL_JOURNAL", "")
+TOOL_JOURNAL_REDACT = os.getenv("TOOL_JOURNAL_REDACT", "1") != "0"
+
+# Payload keys holding identities (pseudonymised) and free text or health data (dropped)
+_IDENTITY_KEYS = {"name", "email", "phone", "callback_number", "address"}
+_FREE_TEXT_KEYS = {"reason", "message", "insurance", "provider"}
+REDACTED = "[redacted]"
+
+
+class ToolJournal:
+  """Appends one JSON line per tool dispatch to a file."""
+
+  def __init__(self, path: str, redact: bool = True):
+    self.path = path.replace("{pid}", str(os.getpid()))
+    self.redact = redact
+    # Per-file key: pseudonyms are stable within a journal but can't be matched across files
+    self._key = secrets.token_bytes(16)
+    # Opened here so from_env can report a bad path; written only by the writer thread
+    self._file = open(self.path, "a")
+    self._queue: queue.SimpleQueue = queue.SimpleQueue()
+    self._writer = threading.Thread(target=self._write_loop, name="tool-journal", daemon=True)
+    self._writer.start()
+    atexit.register(self.close)
+    logger.info(f"📓 Journaling tool calls to {self.path} (redact={redact})")
+
+  @classmethod
+  def from_env(cls) -> Optional["ToolJournal"]:
+    """Journal configured by TOOL_JOURNAL, or None when journaling is off."""
+    if not TOOL_JOURNAL:
+      return None
+    try:
+      return cls(TOOL_JOURNAL, redact=TOOL_JOURNAL_REDACT)
+    except OSError as e:
+      logger.warning(f"⚠️  Tool journal disabled - cannot open {TOOL_JOURNAL}: {e}")
+      return None
+
+  def _pseudonym(self, key: str, value: str) -> str:
+    digest = hmac.new(self._key, value.strip().lower().encode(), hashlib.sha256).hexdigest()
+    if key == "email":
+      return f"caller.{digest[:10]}@example.org"
+    if key in ("phone", "callback_number"):
+      return f"+1555{int(digest[:12], 16) % 10**7:07d}"
+    return f"Caller {digest[:8]}"
+
+  def _scrub(self, value: Any, key: str = "") -> Any:
+    if isinstance(value, dict):
+      return {k: self._scrub(v, k) for k, v in value.items()}
+    if isinstance(value, list):
+      return [self._scrub(v, key) for v in value]
+    if not isinstance(value, str) or not value:
+      return value
+    if key in _FREE_TEXT_KEYS:
+      return REDACTED
+    if key in _IDENTITY_KEYS:
+      return self._pseudonym(key, value)
+    return value
+
+  def record(
+    self,
+    tool: str,
+    started_at: float,
+    duration: float,
+    payload: Optional[BaseModel],
+    output: Optional[dict],
+    error: Optional[BaseException],
+  ) -> None:
+    """Write one dispatch. payload is None when the input failed validation."""
+    # Imported here so the router (and this module) load without a database configured
+    from .call_context import get_call_context
+
+    call = get_call_context()
+    entry = {
+      "t": round(started_at, 3),
+      "call": call.call_id if call else None,
+      "tool": tool,
+      "payload": None,
+      "ms": round(duration * 1000, 2),
+      "ok": error is None,
+    }
+    if payload is not None:
+      dumped = payload.model_dump(mode="json", by_alias=True)
+      entry["payload"] = self._scrub(dumped) if self.redact else dumped
+    if output is not None:
+      entry["out"] = len(json.dumps(output, separators=(",", ":"), default=str))
+    if error is not None:
+      entry["err"] = type(error).__name__
+    self._queue.put(json.dumps(entry, separators=(",", ":"), default=str) + "\n")
+
+  def _write_loop(self) -> None:
+    """Write queued lines in batches until close() queues None."""
+    while True:
+      lines = [self._queue.get()]
+      try:
+        while True:
+          lines.append(self._queue.get_nowait())
+      except queue.Empty:
+        pass
+      done = None in lines
+      try:
+        self._file.write("".join(line for line in lines if line is not None))
+        self._file.flush()
+      except (OSError, ValueError) as e:
+        logger.debug(f"Tool journal write failed: {e}")
+      if done:
+        self._file.close()
+        return
+
+  def close(self) -> None:
+    """Flush queued entries and close the file."""
+    if self._writer.is_alive():
+      self._queue.put(None)
+      self._writer.join(timeout=5)
+
+
+def read_journal(path: str) -> list[dict]:
+  """Entries of a journal file, oldest first (blank or truncated lines are skipped)."""
+  entries = []
+  with open(path) as f:
+    for line in f:
+      try:
+        entries.append(json.loads(line))
+      except json.JSONDecodeError:
+        continue
+  entries.sort(key=lambda e: e["t"])
+  return entries
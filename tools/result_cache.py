@@ -0,0 +1,127 @@
+"""
+Result cache for read-only tools dispatched through ToolRouter.
+
+A tool opts in by registering with a CachePolicy: how long a result may be
+reused (ttl) and what it is keyed on (key, a function of the validated input
+model; returning None skips the cache for that input). Write tools register
+the cached tools they make stale (invalidates=...), and a successful write
+drops every entry of those tools.
+
+Entries are per process and shared by every call the process serves, so a
+TTL also bounds how stale a result can get from writes made elsewhere (other
+job processes, the admin dashboard).
+
+Set TOOL_RESULT_CACHE=0 to disable it.
+"""
+import logging
+import os
+import time
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Hashable, Optional
+
+from pydantic import BaseModel
+
+from telemetry.metrics import record_cache
+
+logger = logging.getLogger(__name__)
+
+TOOL_RESULT_CACHE = os.getenv("TOOL_RESULT_CACHE", "1") != "0"
+
+
+def input_key(input_model: BaseModel) -> Hashable:
+  """Default key: the whole validated input."""
+  return input_model.model_dump_json()
+
+
+@dataclass(frozen=True)
+class CachePolicy:
+  ttl: float
+  key: Callable[[BaseModel], Optional[Hashable]] = input_key
+  max_entries: int = 256
+
+
+class ResultCache:
+  """Typed tool outputs by (tool, key), expiring after the tool's TTL."""
+
+  def __init__(self, enabled: Optional[bool] = None, clock: Callable[[], float] = time.monotonic) -> None:
+    self.enabled = TOOL_RESULT_CACHE if enabled is None else enabled
+    self._clock = clock
+    self._policies: dict[str, CachePolicy] = {}
+    self._entries: dict[str, OrderedDict[Hashable, tuple[float, BaseModel]]] = {}
+    # write tool -> cached tools it makes stale
+    self._invalidates: dict[str, tuple[str, ...]] = {}
+    # Bumped on every invalidation, so a result computed across one is not stored
+    self._generations: Counter[str] = Counter()
+    self.hits: Counter[str] = Counter()
+    self.misses: Counter[str] = Counter()
+
+  def set_policy(self, tool: str, policy: Optional[CachePolicy]) -> None:
+    self._entries.pop(tool, None)
+    if policy is None:
+      self._policies.pop(tool, None)
+    else:
+      self._policies[tool] = policy
+      self._entries[tool] = OrderedDict()
+
+  def set_invalidates(self, tool: str, tools: tuple[str, ...]) -> None:
+    if tools:
+      self._invalidates[tool] = tools
+    else:
+      self._invalidates.pop(tool, None)
+
+  def key(self, tool: str, input_model: BaseModel) -> Optional[Hashable]:
+    """Cache key for this input, or None when the tool's results are not cached."""
+    policy = self._policies.get(tool)
+    if not self.enabled or policy is None:
+      return None
+    return policy.key(input_model)
+
+  def get(self, tool: str, key: Hashable) -> Optional[BaseModel]:
+    entries = self._entries[tool]
+    entry = entries.get(key)
+    if entry is not None and entry[0] > self._clock():
+      entries.move_to_end(key)
+      self.hits[tool] += 1
+      record_cache(f"tool.{tool}", True)
+      return entry[1]
+    if entry is not None:
+      del entries[key]
+    self.misses[tool] += 1
+    record_cache(f"tool.{tool}", False)
+    return None
+
+  def generation(self, tool: str) -> int:
+    return self._generations[tool]
+
+  def put(self, tool: str, key: Hashable, output: BaseModel, generation: int) -> None:
+    """Store output unless the tool was invalidated since generation (taken before computing it)."""
+    if generation != self._generations[tool]:
+      return
+    policy = self._policies[tool]
+    entries = self._entries[tool]
+    entries[key] = (self._clock() + policy.ttl, output)
+    entries.move_to_end(key)
+    while len(entries) > policy.max_entries:
+      entries.popitem(last=False)
+
+  def invalidate(self, *tools: str) -> None:
+    """Drop the cached results of the given tools (every tool when none are given)."""
+    for tool in tools or tuple(self._entries):
+      self._generations[tool] += 1
+      if self._entries.get(tool):
+        self._entries[tool].clear()
+        logger.debug(f"Tool result cache cleared: {tool}")
+
+  def after_write(self, tool: str) -> None:
+    """Called after a successful dispatch of tool; drops the results it made stale."""
+    tools = self._invalidates.get(tool)
+    if tools:
+      self.invalidate(*tools)
+
+  def stats(self) -> dict[str, dict[str, int]]:
+    """Hits, misses and live entries per cached tool."""
+    return {
+      tool: {"hits": self.hits[tool], "misses": self.misses[tool], "entries": len(self._entries[tool])}
+      for tool in self._policies
+    }
@@ -1,23 +1,149 @@
+import asyncio
+import contextvars
 import logging
-from typing import Callable, Dict, TypeVar, Generic, Any
+import os
+import time
+from collections import Counter
+from typing import Callable, Dict, Hashable, TypeVar, Generic, Any, Optional
 from pydantic import BaseModel, ValidationError
 
+from telemetry.metrics import record_coalesced
+from telemetry.tracing import traced
+from utils.deadline import deadline
+from .journal import ToolJournal
+from .result_cache import CachePolicy, ResultCache, input_key
+
 I = TypeVar("I", bound=BaseModel)
 O = TypeVar("O", bound=BaseModel)
 
 logger = logging.getLogger(__name__)
 
+# observer(tool_name, duration_seconds, error) - error is None on success
+DispatchObserver = Callable[[str, float, Optional[BaseException]], None]
+
+# "trust": a handler output that is already an instance of the declared output
+# model was validated when it was built, so it is serialized once and returned.
+# "strict": every output is dumped and re-validated against the output model
+# (catches handlers that use model_construct or mutate fields after construction).
+TOOL_OUTPUT_VALIDATION = os.getenv("TOOL_OUTPUT_VALIDATION", "trust")
+
+# Seconds a tool may take (queueing included) before the caller is told to try again;
+# register(timeout=...) overrides it per tool
+TOOL_TIMEOUT = float(os.getenv("TOOL_TIMEOUT", "5"))
+
+# Tools of one call that may run at the same time (the LLM can emit several per turn)
+TOOL_CALL_CONCURRENCY = int(os.getenv("TOOL_CALL_CONCURRENCY", "4"))
+
+
+class DispatchScope:
+  """
+  Dispatch limits for one call: at most `concurrency` tools run at once, and
+  tools that are not read-only run one at a time in the order they were
+  dispatched, so a cancel and a reschedule of the same appointment never race.
+  """
+
+  def __init__(self, concurrency: int = TOOL_CALL_CONCURRENCY) -> None:
+    self.slots = asyncio.Semaphore(max(1, concurrency))
+    self.writes = asyncio.Lock()
+
+
+class ToolDeadlineExceeded(RuntimeError):
+  """A dispatch ran out of time; the handler was cancelled at its next await."""
+
+  def __init__(self, tool: str, timeout: float, read_only: bool) -> None:
+    super().__init__(f"Tool {tool} exceeded its {timeout:g}s deadline")
+    self.tool = tool
+    self.read_only = read_only
+
+  def result(self) -> dict:
+    """What the LLM gets instead of the tool's output, so it can tell the caller."""
+    if self.read_only:
+      message = "The clinic system did not respond in time. Tell the caller and offer to try again."
+    else:
+      message = (
+        "The clinic system did not respond in time, so this may or may not have gone through. "
+        "Tell the caller, and check the appointment before trying again."
+      )
+    return {"status": "timeout", "retryable": True, "message": message}
+
+
+_dispatch_scope: contextvars.ContextVar[Optional[DispatchScope]] = contextvars.ContextVar(
+  "tool_dispatch_scope", default=None
+)
+
+
+def set_dispatch_scope(scope: Optional[DispatchScope]) -> contextvars.Token:
+  """Apply scope to dispatches from the current task (and tasks it spawns)."""
+  return _dispatch_scope.set(scope)
+
 
 class ToolRouter:
-  def __init__(self) -> None:
+  def __init__(
+    self,
+    journal: Optional[ToolJournal] = None,
+    strict_outputs: Optional[bool] = None,
+    cache: Optional[ResultCache] = None,
+  ) -> None:
     self._handlers: Dict[str, Callable[[BaseModel], BaseModel]] = {}
     self._inputs: Dict[str, type[BaseModel]] = {}
     self._outputs: Dict[str, type[BaseModel]] = {}
+    self._observers: list[DispatchObserver] = []
+    # Records every dispatch (validated payload, timing, output size) when set
+    self.journal = journal
+    self.strict_outputs = TOOL_OUTPUT_VALIDATION == "strict" if strict_outputs is None else strict_outputs
+    # Reuses results of tools registered with a CachePolicy
+    self.cache = cache if cache is not None else ResultCache()
+    # Read-only tools run alongside other tools of the call; coalesced ones also
+    # share one handler run between identical concurrent dispatches
+    self._read_only: set[str] = set()
+    self._coalesce: set[str] = set()
+    self._timeouts: Dict[str, float] = {}
+    self.default_timeout = TOOL_TIMEOUT
+    self._in_flight: Dict[tuple[str, int, Hashable], asyncio.Future] = {}
+    self.coalesced: Counter[str] = Counter()
 
-  def register(self, name: str, input_model: type[I], output_model: type[O], handler: Callable[[I], O]) -> None:
+  def add_observer(self, observer: DispatchObserver) -> None:
+    """Notify observer after every dispatch with the tool name, duration and error (if any)."""
+    self._observers.append(observer)
+
+  def remove_observer(self, observer: DispatchObserver) -> None:
+    if observer in self._observers:
+      self._observers.remove(observer)
+
+  def register(
+    self,
+    name: str,
+    input_model: type[I],
+    output_model: type[O],
+    handler: Callable[[I], O],
+    cache: Optional[CachePolicy] = None,
+    invalidates: tuple[str, ...] = (),
+    read_only: bool = False,
+    coalesce: bool = False,
+    timeout: Optional[float] = None,
+  ) -> None:
+    """
+    Register a tool. cache makes its results reusable (see tools/result_cache.py);
+    invalidates names the cached tools a call of this one makes stale. read_only
+    tools have no side effects and are not ordered against the call's other
+    tools. coalesce (implies read_only) is for tools whose results don't depend
+    on the calling CallContext: concurrent dispatches with the same input share
+    one handler run. timeout overrides the default deadline (TOOL_TIMEOUT).
+    """
     self._handlers[name] = handler  # type: ignore[assignment]
     self._inputs[name] = input_model
     self._outputs[name] = output_model
+    self.cache.set_policy(name, cache)
+    self.cache.set_invalidates(name, invalidates)
+    for tools, enabled in ((self._read_only, read_only or coalesce), (self._coalesce, coalesce)):
+      if enabled:
+        tools.add(name)
+      else:
+        tools.discard(name)
+    if timeout is not None:
+      self._timeouts[name] = timeout
+    else:
+      self._timeouts.pop(name, None)
     logger.info(f"Registered tool: {name}")
 
   def unregister(self, name: str) -> None:
@@ -26,6 +152,11 @@ class ToolRouter:
       del self._handlers[name]
       del self._inputs[name]
       del self._outputs[name]
+      self.cache.set_policy(name, None)
+      self.cache.set_invalidates(name, ())
+      self._read_only.discard(name)
+      self._coalesce.discard(name)
+      self._timeouts.pop(name, None)
       logger.info(f"Unregistered tool: {name}")
     else:
       logger.warning(f"Attempted to unregister non-existent tool: {name}")
@@ -36,6 +167,8 @@ class ToolRouter:
       self._handlers[name] = handler  # type: ignore[assignment]
       self._inputs[name] = input_model
       self._outputs[name] = output_model
+      # Results of the old handler are not reused
+      self.cache.invalidate(name)
       logger.info(f"Updated tool: {name}")
     else:
       logger.warning(f"Tool {name} not found. Use register() instead.")
@@ -44,7 +177,79 @@ class ToolRouter:
     """Return list of registered tool names"""
     return list(self._handlers.keys())
 
+  async def dispatch_batch(self, calls: list[tuple[str, dict]], concurrency: Optional[int] = None) -> list[Any]:
+    """
+    Dispatch several tool calls (e.g. all the calls of one LLM turn) concurrently.
+
+    Returns the outputs in order, with the exception in place of a call that
+    failed. Uses the current call's DispatchScope, or a scope of its own
+    (concurrency, default TOOL_CALL_CONCURRENCY) outside a call.
+    """
+    scope = _dispatch_scope.get() or DispatchScope(concurrency or TOOL_CALL_CONCURRENCY)
+    return await asyncio.gather(
+      *(self._dispatch_observed(name, payload, scope) for name, payload in calls),
+      return_exceptions=True,
+    )
+
   async def dispatch(self, name: str, payload: dict) -> dict:
+    return await self._dispatch_observed(name, payload, _dispatch_scope.get())
+
+  async def _dispatch_observed(self, name: str, payload: dict, scope: Optional[DispatchScope]) -> dict:
+    started_at = time.time()
+    start = time.perf_counter()
+    error: Optional[BaseException] = None
+    # Filled in by _dispatch for the journal
+    record: dict[str, Any] = {}
+    timeout = self._timeouts.get(name, self.default_timeout)
+    try:
+      with traced("tool.dispatch", {"tool.name": name}):
+        # Cancelling the handler also cancels the statement or pool checkout it is
+        # waiting on. Calendar/email of a committed write run on (tools/handlers._after_commit)
+        budget = asyncio.timeout(timeout)
+        try:
+          async with budget:
+            with deadline(timeout):
+              record["output"] = await self._dispatch_in_scope(name, payload, scope, record)
+        except TimeoutError as e:
+          if not budget.expired():
+            raise
+          raise ToolDeadlineExceeded(name, timeout, name in self._read_only) from e
+        return record["output"]
+    except ToolDeadlineExceeded as e:
+      error = e
+      logger.warning(f"⏱️  {e} - asking the caller to try again")
+      record["output"] = e.result()
+      return record["output"]
+    except BaseException as e:
+      error = e
+      raise
+    finally:
+      duration = time.perf_counter() - start
+      if self.journal is not None:
+        try:
+          self.journal.record(name, started_at, duration, record.get("input"), record.get("output"), error)
+        except Exception as e:
+          logger.debug(f"Tool journal write failed: {e}")
+      for observer in self._observers:
+        try:
+          observer(name, duration, error)
+        except Exception as e:
+          logger.debug(f"Dispatch observer failed: {e}")
+
+  async def _dispatch_in_scope(
+    self, name: str, payload: dict, scope: Optional[DispatchScope], record: dict[str, Any]
+  ) -> dict:
+    if scope is None:
+      return await self._dispatch(name, payload, record)
+    if name in self._read_only:
+      async with scope.slots:
+        return await self._dispatch(name, payload, record)
+    # Queue for the write turn before taking a slot, so waiting writes don't hold slots
+    async with scope.writes:
+      async with scope.slots:
+        return await self._dispatch(name, payload, record)
+
+  async def _dispatch(self, name: str, payload: dict, record: dict[str, Any]) -> dict:
     logger.info(f"Dispatching tool: {name}")
 
     if name not in self._handlers:
@@ -56,16 +261,78 @@ class ToolRouter:
     except ValidationError as e:
       logger.error(f"Invalid input for {name}: {e}")
       raise RuntimeError(f"Invalid input for {name}: {e}") from e
+    record["input"] = input_model
 
-    out_model = await self._handlers[name](input_model)  # type: ignore[arg-type]
+    cache_key = self.cache.key(name, input_model)
+    if cache_key is not None:
+      cached = self.cache.get(name, cache_key)
+      if cached is not None:
+        logger.info(f"Cached result for tool: {name}")
+        return cached.model_dump()
+    generation = self.cache.generation(name)
 
-    try:
-      output = self._outputs[name].model_validate(out_model.model_dump())
-    except ValidationError as e:
-      logger.error(f"Invalid output from {name}: {e}")
-      raise RuntimeError(f"Invalid output from {name}: {e}") from e
+    if name in self._coalesce:
+      out_model = await self._run_shared(name, input_model, cache_key, generation)
+    else:
+      out_model = await self._run(name, input_model)
 
+    if cache_key is not None:
+      self.cache.put(name, cache_key, out_model, generation)
     logger.info(f"Successfully dispatched tool: {name}")
-    return output.model_dump()
+    return out_model.model_dump()
+
+  async def _run_shared(self, name: str, input_model: BaseModel, cache_key: Optional[Hashable], generation: int) -> BaseModel:
+    """Run a read-only tool, or join an identical dispatch already in flight."""
+    # The generation keeps a dispatch that started before a write from serving callers after it
+    key = (name, generation, cache_key if cache_key is not None else input_key(input_model))
+    while key in self._in_flight:
+      shared = self._in_flight[key]
+      try:
+        out_model = await asyncio.shield(shared)
+      except asyncio.CancelledError:
+        if shared.cancelled():
+          # The dispatch we joined was cancelled, not this one: run it ourselves
+          continue
+        raise
+      self.coalesced[name] += 1
+      record_coalesced(name)
+      logger.info(f"Joined in-flight dispatch of tool: {name}")
+      return out_model
 
+    future = asyncio.get_running_loop().create_future()
+    self._in_flight[key] = future
+    try:
+      out_model = await self._run(name, input_model)
+    except asyncio.CancelledError:
+      future.cancel()
+      raise
+    except BaseException as e:
+      future.set_exception(e)
+      # Marks the exception retrieved, so a flight nobody joined doesn't log it again
+      future.exception()
+      raise
+    else:
+      future.set_result(out_model)
+    finally:
+      if self._in_flight.get(key) is future:
+        del self._in_flight[key]
+    return out_model
+
+  async def _run(self, name: str, input_model: BaseModel) -> BaseModel:
+    """Call the handler and check its output against the declared output model."""
+    try:
+      out_model = await self._handlers[name](input_model)  # type: ignore[arg-type]
+    finally:
+      # Failed writes too: a slot conflict means the cached availability was already stale
+      self.cache.after_write(name)
 
+    output_model = self._outputs[name]
+    if self.strict_outputs or not isinstance(out_model, output_model):
+      try:
+        out_model = output_model.model_validate(
+          out_model.model_dump() if isinstance(out_model, BaseModel) else out_model
+        )
+      except ValidationError as e:
+        logger.error(f"Invalid output from {name}: {e}")
+        raise RuntimeError(f"Invalid output from {name}: {e}") from e
+    return out_model
@@ -0,0 +1,127 @@
+"""
+Call-scoped database unit of work.
+
+One CallUnitOfWork is created per call in the entrypoint and attached to the
+CallContext. Every tool dispatch during the call (and the caller-ID prefetch)
+goes through the same AsyncSession on the same pooled connection, so:
+
+- the pool is checked out once per call instead of once per tool call
+  (each checkout also pays a pre-ping round trip);
+- objects already loaded in the call stay in the session identity map, so
+  relationships like `appointment.patient` resolve without another query;
+- per-session read caches (clinic hours, holidays) are reused across tools.
+
+The transaction is still ended after every dispatch - committed so loaded
+objects stay usable (expire_on_commit=False) - so the connection never sits
+idle in transaction between the caller's turns.
+
+Objects kept in the identity map can fall behind writes made by other
+processes during the call. Reads that decide a write - the FOR UPDATE
+selects in AppointmentService - use populate_existing, so cancel and
+reschedule act on the locked, current row.
+
+Read-only tools that run while the call's session is busy (several tools
+from one LLM turn) use a short-lived session of their own instead of waiting
+for it - see read_session.
+
+The connection stays checked out for the whole call. A production job
+process serves a single call, so that costs nothing; a process running many
+calls at once (benchmarks/load_test.py, benchmarks/synthetic_call.py) holds
+one connection per active call, bounded by pool_size + max_overflow.
+"""
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, AsyncSession, async_sessionmaker
+
+logger = logging.getLogger(__name__)
+
+
+class CallUnitOfWork:
+  """Owns the database session and connection for a single call."""
+
+  def __init__(self, engine: AsyncEngine, session_factory: async_sessionmaker):
+    self._engine = engine
+    self._session_factory = session_factory
+    self._connection: Optional[AsyncConnection] = None
+    self._session: Optional[AsyncSession] = None
+    # AsyncSession is not safe for concurrent use; parallel tool calls queue here
+    self._lock = asyncio.Lock()
+    self.checkouts = 0
+    self.dispatches = 0
+    self.side_reads = 0
+
+  @asynccontextmanager
+  async def session(self) -> AsyncIterator[AsyncSession]:
+    """
+    Use the call's session for one unit of work.
+
+    Commits whatever is still open on success; on error rolls back and starts
+    the next unit with a fresh session (the connection is kept unless it was
+    invalidated).
+    """
+    async with self._lock:
+      session = await self._ensure_session()
+      self.dispatches += 1
+      try:
+        yield session
+      except BaseException:
+        await self._discard_session()
+        raise
+      if session.in_transaction():
+        await session.commit()
+
+  @asynccontextmanager
+  async def read_session(self) -> AsyncIterator[AsyncSession]:
+    """
+    Session for a read-only tool.
+
+    The call's session when it is free; while another tool of the call holds
+    it, a short-lived session on its own pooled connection, so reads of the
+    same LLM turn overlap instead of queueing behind each other or a write.
+    """
+    if not self._lock.locked():
+      async with self.session() as session:
+        yield session
+    else:
+      self.side_reads += 1
+      async with self._session_factory() as session:
+        yield session
+
+  async def _ensure_session(self) -> AsyncSession:
+    if self._connection is not None and self._connection.invalidated:
+      logger.warning("🔌 Call DB connection was invalidated - checking out a new one")
+      await self._discard_session()
+      await self._connection.close()
+      self._connection = None
+    if self._connection is None:
+      # Pinned for the rest of the call (see the module docstring)
+      self._connection = await self._engine.connect()
+      self.checkouts += 1
+    if self._session is None:
+      self._session = self._session_factory(bind=self._connection)
+    return self._session
+
+  async def _discard_session(self) -> None:
+    if self._session is None:
+      return
+    try:
+      await self._session.rollback()
+      await self._session.close()
+    except Exception as e:
+      logger.debug(f"Error discarding call session: {e}")
+    self._session = None
+
+  async def close(self) -> None:
+    """Release the session and return the connection to the pool (job shutdown)."""
+    async with self._lock:
+      await self._discard_session()
+      if self._connection is not None:
+        try:
+          await self._connection.close()
+        except Exception as e:
+          logger.debug(f"Error closing call connection: {e}")
+        self._connection = None
+    logger.info(f"🗄️  Call unit of work closed: {self.dispatches} unit(s) of work on {self.checkouts} connection checkout(s), {self.side_reads} side read(s)")
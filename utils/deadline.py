@@ -0,0 +1,49 @@
+"""
+Deadline of the tool dispatch running in the current task.
+
+ToolRouter sets one per dispatch. The pool checkout wait bounds its own
+timeout by what is left of it, so a saturated pool ends the dispatch at its
+deadline instead of waiting out pool_timeout. Calendar and SMTP calls run
+after the write commits, under no_deadline(), with their fixed timeouts.
+"""
+import contextvars
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+# time.monotonic() value by which the current dispatch must finish
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("deadline", default=None)
+
+
+@contextmanager
+def deadline(seconds: float) -> Iterator[None]:
+    """Run the block with a deadline `seconds` from now (an earlier enclosing deadline still applies)."""
+    at = time.monotonic() + seconds
+    current = _deadline.get()
+    token = _deadline.set(at if current is None else min(current, at))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+@contextmanager
+def no_deadline() -> Iterator[None]:
+    """Run the block (and tasks created in it) without the current deadline."""
+    token = _deadline.set(None)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining() -> Optional[float]:
+    """Seconds left before the current deadline, or None when there is none."""
+    at = _deadline.get()
+    return None if at is None else max(0.0, at - time.monotonic())
+
+
+def bounded_timeout(default: float, minimum: float = 0.5) -> float:
+    """default, shortened to what is left of the current deadline (but never below minimum)."""
+    left = remaining()
+    return default if left is None else max(minimum, min(default, left))
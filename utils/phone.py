@@ -0,0 +1,116 @@
+"""Phone normalization utilities for converting spoken/typed phone numbers to E.164."""
+
+import os
+import re
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Country calling code assumed for numbers given without one (NANP by default).
+DEFAULT_COUNTRY_CODE = os.getenv("PHONE_DEFAULT_COUNTRY_CODE", "1")
+
+# E.164 allows at most 15 digits; anything under 8 is not a full number.
+E164_MIN_DIGITS = 8
+E164_MAX_DIGITS = 15
+
+DIGIT_WORDS = {
+    "zero": "0", "oh": "0", "o": "0",
+    "one": "1", "two": "2", "three": "3", "four": "4",
+    "five": "5", "six": "6", "seven": "7", "eight": "8", "nine": "9",
+}
+
+REPEAT_WORDS = {"double": 2, "triple": 3}
+
+# Anything after these tokens is an extension, not part of the number.
+EXTENSION_WORDS = {"ext", "extension", "x"}
+
+# "+44 (0) 20 ..." - the national trunk 0, written in brackets after the country code
+TRUNK_ZERO_AFTER_COUNTRY_CODE = re.compile(r"(\+\s*\d{1,3})\s*\(\s*0\s*\)")
+
+
+def _spoken_to_digits(raw: str) -> str:
+    """
+    Convert a spoken or formatted phone string to '+'/digit characters.
+
+    Handles digit words ('five five five'), 'double'/'triple' repeats,
+    'plus' for a leading '+', and drops punctuation, filler words and extensions.
+    """
+    out = []
+    repeat = 1
+    for token in re.findall(r"[a-z]+|\d+|\+", raw.lower()):
+        if token in EXTENSION_WORDS and out:
+            break
+        if token in REPEAT_WORDS:
+            repeat = REPEAT_WORDS[token]
+            continue
+        if token in ("+", "plus"):
+            if not out:
+                out.append("+")
+            continue
+        if token.isdigit():
+            digits = token
+        elif token in DIGIT_WORDS:
+            if not out and token in ("oh", "o"):
+                # "Oh, it's five five five..." - interjection, not a leading zero
+                continue
+            digits = DIGIT_WORDS[token]
+        else:
+            # Filler ("my", "number", "is") or a transport prefix like 'sip'
+            repeat = 1
+            continue
+        out.append(digits[0] * repeat + digits[1:])
+        repeat = 1
+    return "".join(out)
+
+
+def normalize_phone(raw: str | None, default_country_code: str = DEFAULT_COUNTRY_CODE) -> str | None:
+    """
+    Normalize a phone number in any spoken or written format to E.164.
+
+    Examples:
+        "(555) 123-4567" -> "+15551234567"
+        "five five five, one two three, four five six seven" -> "+15551234567"
+        "sip_+15551234567" -> "+15551234567"
+        "0044 20 7946 0958" -> "+442079460958"
+        "+44 (0) 20 7946 0958" -> "+442079460958"
+        "eight hundred five five five one two one two" -> None (8 digits, not a NANP number)
+
+    Args:
+        raw: Phone number as spoken, transcribed, typed or from a SIP identity
+        default_country_code: Calling code used when the number has none
+
+    Returns:
+        E.164 string ('+' followed by 8-15 digits), or None if no valid number was found
+    """
+    if not raw:
+        return None
+
+    number = _spoken_to_digits(TRUNK_ZERO_AFTER_COUNTRY_CODE.sub(r"\1 ", raw))
+    if number.startswith("+"):
+        digits = number[1:]
+    elif number.startswith("00"):
+        # International dialing prefix
+        digits = number[2:]
+    elif default_country_code == "1" and number.startswith("011"):
+        # NANP international dialing prefix
+        digits = number[3:]
+    else:
+        digits = number
+        if default_country_code == "1":
+            # NANP: 10-digit national numbers, optionally prefixed with the 1. Any other
+            # length is a misheard number, not an international one without its '+'
+            if len(digits) == 10:
+                digits = "1" + digits
+            elif not (len(digits) == 11 and digits.startswith("1")):
+                logger.debug(f"Not a NANP number: {raw!r}")
+                return None
+        elif digits.startswith("0"):
+            # National trunk prefix (e.g. 0300 1234567)
+            digits = default_country_code + digits[1:]
+        elif not digits.startswith(default_country_code):
+            digits = default_country_code + digits
+
+    if not E164_MIN_DIGITS <= len(digits) <= E164_MAX_DIGITS:
+        logger.debug(f"Could not normalize phone number: {raw!r}")
+        return None
+    return f"+{digits}"